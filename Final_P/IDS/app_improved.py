@@ -2,9 +2,17 @@
 Improved Flask Application with Database Integration
 """
 
-from flask import Flask, redirect, render_template, request, session, url_for, jsonify
+import json
+import os
+from flask import (Flask, redirect, render_template, request, session, url_for, jsonify,
+                   Response, stream_with_context, abort)
 from datetime import datetime, timedelta
-from models import db, Users, Alert, SystemMetrics, TrafficStatistics, AttackTypeMetrics
+from event_broker import EventBroker, start_broker_listener
+from query_cache import QueryCache
+from models import (db, Users, Alert, AlertSeverityCount, SystemMetrics, TrafficStatistics,
+                    AttackTypeMetrics, SystemMetricsRollup, TrafficStatisticsRollup,
+                    AttackTypeMetricsRollup, SEVERITY_LEVELS)
+from rollups import choose_resolution, metrics_series, start_rollup_job
 
 app = Flask(__name__)
 app.secret_key = "any key"  # TODO: Change this to environment variable
@@ -18,6 +26,124 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# The debug reloader's parent process only watches files, so background jobs
+# start in the serving child only (two rollup jobs would race on the same buckets)
+SERVING_PROCESS = __name__ != "__main__" or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+# Keep the 1min/1h/1day metrics rollups up to date
+if SERVING_PROCESS:
+    start_rollup_job(app)
+
+# Live alert/metrics stream fed by the detection pipeline
+broker = EventBroker()
+if SERVING_PROCESS:
+    start_broker_listener(broker)
+
+# Dashboard query cache, invalidated by the pipeline's write notifications
+cache = QueryCache()
+EVENT_TABLES = {
+    'alert': 'alerts',
+    'metrics': 'system_metrics',
+    'attack_metrics': 'attack_type_metrics',
+    'traffic': 'traffic_statistics',
+}
+broker.add_listener(lambda event, data: cache.invalidate(EVENT_TABLES[event])
+                    if event in EVENT_TABLES else None)
+
+ALERTS_PER_PAGE = 20
+API_ALERTS_LIMIT = 100000  # most rows one /api/alerts response streams
+
+
+def alert_to_dict(a):
+    """JSON shape of an alert in the API responses"""
+    return {
+        'id': a.id,
+        'attack_type': a.attack_type,
+        'source_ip': a.source_ip,
+        'anomaly_percentage': a.anomaly_percentage,
+        'severity': a.severity_level,
+        'timestamp': a.timestamp.isoformat(),
+        'acknowledged': a.acknowledged
+    }
+
+
+def filter_alerts(query, args):
+    """Apply the severity/acknowledged/attack_type filters of the alert views"""
+    severity = args.get('severity', None)
+    acknowledged = args.get('acknowledged', None)
+    attack_type = args.get('attack_type', None)
+    
+    if severity in SEVERITY_LEVELS:
+        # Written at insert time (see models.severity_for) and indexed with timestamp
+        query = query.filter(Alert.severity == severity)
+    
+    if acknowledged is not None:
+        query = query.filter(Alert.acknowledged == (acknowledged == 'true'))
+    
+    if attack_type:
+        query = query.filter(Alert.attack_type == attack_type)
+    
+    return query
+
+
+def make_cursor(alert):
+    """Opaque position of an alert in (timestamp, id) order"""
+    return f"{alert.timestamp.isoformat()}_{alert.id}"
+
+
+def parse_cursor(cursor):
+    """(timestamp, id) from make_cursor(); aborts with 400 if malformed"""
+    try:
+        timestamp, alert_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(alert_id)
+    except ValueError:
+        abort(400, description=f"Invalid cursor: {cursor}")
+
+
+def keyset_page(query, before=None, after=None):
+    """
+    Order alerts newest first, starting just past a cursor
+    
+    Seeks on (timestamp, id) instead of counting and skipping rows, so every
+    page costs the same no matter how deep it is.
+    
+    Args:
+        before: Cursor of the last row of the previous page (older rows follow)
+        after: Cursor of the first row of the next page (newer rows, for going back)
+    
+    Returns:
+        Query in display order; with after, the caller must reverse the rows
+    """
+    if after:
+        timestamp, alert_id = parse_cursor(after)
+        return query.filter(db.or_(
+            Alert.timestamp > timestamp,
+            db.and_(Alert.timestamp == timestamp, Alert.id > alert_id)
+        )).order_by(Alert.timestamp.asc(), Alert.id.asc())
+    
+    if before:
+        timestamp, alert_id = parse_cursor(before)
+        query = query.filter(db.or_(
+            Alert.timestamp < timestamp,
+            db.and_(Alert.timestamp == timestamp, Alert.id < alert_id)
+        ))
+    return query.order_by(Alert.timestamp.desc(), Alert.id.desc())
+
+
+def severity_histogram(since):
+    """Alerts per hour and severity since a time, from the alert_severity_counts table"""
+    hour = since.replace(minute=0, second=0, microsecond=0)
+    return AlertSeverityCount.query.filter(
+        AlertSeverityCount.hour >= hour
+    ).order_by(AlertSeverityCount.hour.asc()).all()
+
+
+def attack_type_facet():
+    """Distinct attack types for the filter list (cached until new alerts arrive)"""
+    return cache.get(('attack_types',), lambda: [
+        at[0] for at in db.session.query(Alert.attack_type).distinct().order_by(Alert.attack_type)
+    ], depends=('alerts',), ttl=3600)
+
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -25,16 +151,20 @@ def index():
     if session.get('sessionName') is None:
         return redirect('login')
     
-    # Get latest critical alert
-    latest_alert = Alert.query.filter(
-        Alert.anomaly_percentage >= 40
-    ).order_by(Alert.timestamp.desc()).first()
+    def load():
+        # Get latest critical alert
+        latest_alert = Alert.query.filter(
+            Alert.anomaly_percentage >= 40
+        ).order_by(Alert.timestamp.desc()).first()
+        
+        # Get recent alerts count
+        recent_alerts_count = Alert.query.filter(
+            Alert.timestamp >= datetime.utcnow() - timedelta(hours=24),
+            Alert.acknowledged == False
+        ).count()
+        return latest_alert, recent_alerts_count
     
-    # Get recent alerts count
-    recent_alerts_count = Alert.query.filter(
-        Alert.timestamp >= datetime.utcnow() - timedelta(hours=24),
-        Alert.acknowledged == False
-    ).count()
+    latest_alert, recent_alerts_count = cache.get(('index',), load, depends=('alerts',))
     
     return render_template('index.html', 
                           latest_alert=latest_alert,
@@ -95,16 +225,21 @@ def dashboard():
     if session.get('sessionName') is None:
         return redirect('login')
     
-    # Get latest metrics
-    latest_metrics = SystemMetrics.query.order_by(
-        SystemMetrics.timestamp.desc()
-    ).first()
+    def load():
+        # Get latest metrics
+        latest_metrics = SystemMetrics.query.order_by(
+            SystemMetrics.timestamp.desc()
+        ).first()
+        
+        # Get attack type statistics (last hour)
+        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        attack_stats = AttackTypeMetrics.query.filter(
+            AttackTypeMetrics.timestamp >= one_hour_ago
+        ).all()
+        return latest_metrics, attack_stats
     
-    # Get attack type statistics (last hour)
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    attack_stats = AttackTypeMetrics.query.filter(
-        AttackTypeMetrics.timestamp >= one_hour_ago
-    ).all()
+    latest_metrics, attack_stats = cache.get(
+        ('dashboard',), load, depends=('system_metrics', 'attack_type_metrics'))
     
     return render_template('dashboard.html',
                           metrics=latest_metrics,
@@ -117,45 +252,27 @@ def alerts_page():
     if session.get('sessionName') is None:
         return redirect('login')
     
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
+    # Cursors from the previous page's links (see keyset_page)
+    before = request.args.get('before', None)
+    after = request.args.get('after', None)
     
-    # Filter options
-    severity = request.args.get('severity', None)
-    acknowledged = request.args.get('acknowledged', None)
-    attack_type = request.args.get('attack_type', None)
+    query = keyset_page(filter_alerts(Alert.query, request.args), before, after)
     
-    query = Alert.query
+    # One extra row tells whether there is another page in that direction
+    alerts = query.limit(ALERTS_PER_PAGE + 1).all()
+    more = len(alerts) > ALERTS_PER_PAGE
+    alerts = alerts[:ALERTS_PER_PAGE]
+    if after:
+        alerts.reverse()
     
-    if severity:
-        # Note: severity is calculated property, so we filter by percentage
-        if severity == 'Critical':
-            query = query.filter(Alert.anomaly_percentage >= 75)
-        elif severity == 'High':
-            query = query.filter(Alert.anomaly_percentage >= 50, Alert.anomaly_percentage < 75)
-        elif severity == 'Medium':
-            query = query.filter(Alert.anomaly_percentage >= 25, Alert.anomaly_percentage < 50)
-        elif severity == 'Low':
-            query = query.filter(Alert.anomaly_percentage < 25)
-    
-    if acknowledged is not None:
-        query = query.filter(Alert.acknowledged == (acknowledged == 'true'))
-    
-    if attack_type:
-        query = query.filter(Alert.attack_type == attack_type)
-    
-    alerts_pagination = query.order_by(Alert.timestamp.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    # Get unique attack types for filter
-    attack_types = db.session.query(Alert.attack_type).distinct().all()
-    attack_types = [at[0] for at in attack_types]
+    has_older = more if not after else True
+    has_newer = more if after else before is not None
     
     return render_template('alerts.html',
-                          alerts=alerts_pagination.items,
-                          pagination=alerts_pagination,
-                          attack_types=attack_types)
+                          alerts=alerts,
+                          older_cursor=make_cursor(alerts[-1]) if alerts and has_older else None,
+                          newer_cursor=make_cursor(alerts[0]) if alerts and has_newer else None,
+                          attack_types=attack_type_facet())
 
 
 @app.route('/alert/<int:alert_id>', methods=['GET', 'POST'])
@@ -174,6 +291,7 @@ def alert_detail(alert_id):
             alert.notes = request.form['notes']
         
         db.session.commit()
+        cache.invalidate('alerts')
         return redirect(url_for('alert_detail', alert_id=alert_id))
     
     return render_template('alert_detail.html', alert=alert)
@@ -189,56 +307,122 @@ def statistics():
     hours = request.args.get('hours', 24, type=int)
     time_ago = datetime.utcnow() - timedelta(hours=hours)
     
-    # Get metrics over time
-    metrics_history = SystemMetrics.query.filter(
-        SystemMetrics.timestamp >= time_ago
-    ).order_by(SystemMetrics.timestamp.asc()).all()
+    # Use the coarsest rollup that still resolves the range; raw rows for short ranges
+    resolution = choose_resolution(timedelta(hours=hours))
     
-    # Get traffic statistics
-    traffic_stats = TrafficStatistics.query.filter(
-        TrafficStatistics.timestamp >= time_ago
-    ).order_by(TrafficStatistics.timestamp.asc()).all()
+    def load():
+        # Get metrics over time
+        metrics_history = metrics_series(
+            SystemMetrics, SystemMetricsRollup, time_ago, resolution
+        ).all()
+        
+        # Get traffic statistics
+        traffic_stats = metrics_series(
+            TrafficStatistics, TrafficStatisticsRollup, time_ago, resolution
+        ).all()
+        
+        # Get per attack type detection history
+        attack_history = metrics_series(
+            AttackTypeMetrics, AttackTypeMetricsRollup, time_ago, resolution
+        ).all()
+        
+        # Get alert counts by type
+        alert_counts = db.session.query(
+            Alert.attack_type,
+            db.func.count(Alert.id).label('count')
+        ).filter(Alert.timestamp >= time_ago).group_by(Alert.attack_type).all()
+        
+        # Get alert counts by severity (whole hours, from the hourly counters)
+        severity_counts = {severity: 0 for severity in SEVERITY_LEVELS}
+        for row in severity_histogram(time_ago):
+            severity_counts[row.severity] = severity_counts.get(row.severity, 0) + row.count
+        return metrics_history, traffic_stats, attack_history, alert_counts, severity_counts
     
-    # Get alert counts by type
-    alert_counts = db.session.query(
-        Alert.attack_type,
-        db.func.count(Alert.id).label('count')
-    ).filter(Alert.timestamp >= time_ago).group_by(Alert.attack_type).all()
+    # Rollup-backed ranges only change when the rollup job adds a bucket
+    metrics_history, traffic_stats, attack_history, alert_counts, severity_counts = cache.get(
+        ('statistics', hours), load,
+        depends=('alerts',) if resolution else
+                ('alerts', 'system_metrics', 'traffic_statistics', 'attack_type_metrics'))
     
     return render_template('statistics.html',
                           metrics_history=metrics_history,
                           traffic_stats=traffic_stats,
+                          attack_history=attack_history,
                           alert_counts=alert_counts,
+                          severity_counts=severity_counts,
+                          resolution=resolution or 'raw',
                           hours=hours)
 
 
+@app.route('/api/alerts', methods=['GET'])
+def api_alerts():
+    """
+    Alerts matching the /alerts filters, newest first, as streamed JSON
+    
+    Rows are fetched and serialized in batches while the response is sent, so
+    a large limit never builds the whole result in memory. The response ends
+    with next_cursor, to be passed back as ?before= for the following rows.
+    """
+    if session.get('sessionName') is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    limit = min(max(request.args.get('limit', 100, type=int), 1), API_ALERTS_LIMIT)
+    query = keyset_page(filter_alerts(Alert.query, request.args), request.args.get('before'))
+    rows = query.limit(limit).execution_options(stream_results=True).yield_per(500)
+    
+    def generate():
+        yield '{"alerts": ['
+        last = None
+        count = 0
+        for alert in rows:
+            yield (',' if last is not None else '') + json.dumps(alert_to_dict(alert))
+            last = alert
+            count += 1
+        next_cursor = make_cursor(last) if last is not None and count == limit else None
+        yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+@app.route('/api/alerts/severity', methods=['GET'])
+def api_severity_histogram():
+    """API endpoint for hourly alert counts per severity"""
+    hours = request.args.get('hours', 24, type=int)
+    
+    def load():
+        since = datetime.utcnow() - timedelta(hours=hours)
+        histogram = {}
+        for row in severity_histogram(since):
+            counts = histogram.setdefault(row.hour.isoformat(), {s: 0 for s in SEVERITY_LEVELS})
+            counts[row.severity] = row.count
+        return [dict(hour=hour, **counts) for hour, counts in histogram.items()]
+    
+    return jsonify(cache.get(('api_severity_histogram', hours), load, depends=('alerts',)))
+
+
 @app.route('/api/alerts/recent', methods=['GET'])
 def api_recent_alerts():
     """API endpoint for recent alerts (for AJAX updates)"""
     minutes = request.args.get('minutes', 5, type=int)
-    time_ago = datetime.utcnow() - timedelta(minutes=minutes)
     
-    alerts = Alert.query.filter(
-        Alert.timestamp >= time_ago
-    ).order_by(Alert.timestamp.desc()).all()
+    def load():
+        time_ago = datetime.utcnow() - timedelta(minutes=minutes)
+        
+        alerts = Alert.query.filter(
+            Alert.timestamp >= time_ago
+        ).order_by(Alert.timestamp.desc()).all()
+        
+        return [alert_to_dict(a) for a in alerts]
     
-    return jsonify([{
-        'id': a.id,
-        'attack_type': a.attack_type,
-        'source_ip': a.source_ip,
-        'anomaly_percentage': a.anomaly_percentage,
-        'severity': a.severity_level,
-        'timestamp': a.timestamp.isoformat(),
-        'acknowledged': a.acknowledged
-    } for a in alerts])
+    return jsonify(cache.get(('api_recent_alerts', minutes), load, depends=('alerts',)))
 
 
 @app.route('/api/metrics/current', methods=['GET'])
 def api_current_metrics():
     """API endpoint for current system metrics"""
-    metrics = SystemMetrics.query.order_by(
+    metrics = cache.get(('api_current_metrics',), lambda: SystemMetrics.query.order_by(
         SystemMetrics.timestamp.desc()
-    ).first()
+    ).first(), depends=('system_metrics',))
     
     if metrics:
         return jsonify({
@@ -255,6 +439,30 @@ def api_current_metrics():
     return jsonify({'error': 'No metrics available'}), 404
 
 
+@app.route('/api/stream', methods=['GET'])
+def api_stream():
+    """Server-Sent Events stream of new alerts and metrics snapshots"""
+    if session.get('sessionName') is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    # Browsers resend the last id they saw when the connection drops
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_id'))
+    last_id = int(last_id) if last_id and last_id.isdigit() else None
+    
+    return Response(stream_with_context(broker.stream(last_id)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """Query cache hit/miss counters"""
+    if session.get('sessionName') is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    return jsonify(cache.summary())
+
+
 @app.route('/logout', methods=['GET', 'POST'])
 def logout():
     """User logout"""
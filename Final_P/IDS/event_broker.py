@@ -0,0 +1,186 @@
+"""
+Event Broker Module - Pushes new alerts and metrics to the dashboards
+The detection pipeline publishes each alert and metrics snapshot once to a
+local broker in the web app; every connected dashboard receives it over
+Server-Sent Events instead of polling the database.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+BROKER_HOST = '127.0.0.1'
+BROKER_PORT = 5055
+BROKER_AUTHKEY = b'ids-event-broker'
+HISTORY = 1000  # events kept for clients resuming with Last-Event-ID
+KEEPALIVE = 15  # seconds between SSE comments on an idle stream
+RECONNECT_DELAY = 5  # seconds the publisher waits before reconnecting
+
+try:
+    from config import Config
+    BROKER_HOST = Config.EVENT_BROKER_HOST
+    BROKER_PORT = Config.EVENT_BROKER_PORT
+    BROKER_AUTHKEY = Config.EVENT_BROKER_AUTHKEY.encode()
+except (ImportError, AttributeError, ValueError):
+    pass
+
+
+def _json_default(value):
+    """Timestamps as ISO 8601, like the /api endpoints"""
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class EventBroker:
+    """In-process fan-out of events to any number of stream subscribers"""
+
+    def __init__(self, history=HISTORY):
+        """
+        Every event is numbered and formatted as an SSE frame once, then kept in
+        a bounded history that all subscribers read from, so a client that
+        reconnects with Last-Event-ID gets exactly the events it missed.
+        """
+        self.history = deque(maxlen=history)
+        self.last_id = 0
+        self.condition = threading.Condition()
+        self.listeners = []
+        self.stats = {"published": 0, "subscribers": 0}
+
+    def add_listener(self, callback):
+        """Call callback(event, data) for every published event, e.g. to invalidate caches"""
+        self.listeners.append(callback)
+
+    def publish(self, event, data):
+        """Number, format and store an event, then wake every subscriber"""
+        with self.condition:
+            self.last_id += 1
+            event_id = self.last_id
+            frame = f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+            self.history.append((event_id, frame))
+            self.stats["published"] += 1
+            self.condition.notify_all()
+
+        for callback in self.listeners:
+            callback(event, data)
+        return event_id
+
+    def frames_after(self, last_id):
+        """Frames newer than last_id (all kept frames if the id is unknown or from before a restart)"""
+        if last_id is None or last_id > self.last_id:
+            last_id = 0
+        return [frame for event_id, frame in self.history if event_id > last_id]
+
+    def stream(self, last_id=None, keepalive=KEEPALIVE):
+        """
+        Generator of SSE text for one client
+
+        Args:
+            last_id: Last-Event-ID sent by a reconnecting client; None streams new events only
+            keepalive: Seconds after which an idle stream sends a comment line
+        """
+        with self.condition:
+            self.stats["subscribers"] += 1
+            if last_id is None:
+                last_id = self.last_id
+
+        try:
+            yield f"retry: {RECONNECT_DELAY * 1000}\n\n"
+            while True:
+                with self.condition:
+                    if self.last_id == last_id:
+                        self.condition.wait(keepalive)
+                    frames = self.frames_after(last_id)
+                    last_id = self.last_id
+
+                if frames:
+                    yield "".join(frames)
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            with self.condition:
+                self.stats["subscribers"] -= 1
+
+
+def start_broker_listener(broker, host=None, port=None, authkey=None):
+    """
+    Accept events from the detection pipeline on a local socket
+
+    Each connection is served by its own daemon thread that publishes every
+    received (event, data) tuple to the broker.
+    """
+    address = (host or BROKER_HOST, port or BROKER_PORT)
+    try:
+        listener = Listener(address, authkey=authkey or BROKER_AUTHKEY)
+    except OSError as e:
+        print(f"[Broker] Could not listen on {address[0]}:{address[1]}: {e}")
+        return None
+
+    def serve(conn):
+        with conn:
+            while True:
+                try:
+                    event, data = conn.recv()
+                except (EOFError, OSError):
+                    return
+                broker.publish(event, data)
+
+    def accept():
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"[Broker] Rejected connection: {e}")
+                continue
+            threading.Thread(target=serve, args=(conn,), name="BrokerConnection", daemon=True).start()
+
+    thread = threading.Thread(target=accept, name="BrokerListener", daemon=True)
+    thread.start()
+    print(f"[Broker] Listening for pipeline events on {address[0]}:{address[1]}")
+    return thread
+
+
+class EventPublisher:
+    """Pipeline side: sends events to the web app's broker listener"""
+
+    def __init__(self, host=None, port=None, authkey=None):
+        """
+        Publishing never blocks detection for long: if the web app is not
+        running the event is dropped and the connection is retried after
+        RECONNECT_DELAY seconds.
+        """
+        self.address = (host or BROKER_HOST, port or BROKER_PORT)
+        self.authkey = authkey or BROKER_AUTHKEY
+        self.conn = None
+        self.retry_at = 0
+        self.lock = threading.Lock()
+        self.stats = {"sent": 0, "dropped": 0}
+
+    def publish(self, event, data):
+        """Send one event; returns False if it was dropped"""
+        with self.lock:
+            if self.conn is None and time.monotonic() >= self.retry_at:
+                try:
+                    self.conn = Client(self.address, authkey=self.authkey)
+                except Exception:
+                    self.retry_at = time.monotonic() + RECONNECT_DELAY
+
+            if self.conn is not None:
+                try:
+                    self.conn.send((event, data))
+                    self.stats["sent"] += 1
+                    return True
+                except Exception:
+                    self.close()
+                    self.retry_at = time.monotonic() + RECONNECT_DELAY
+
+            self.stats["dropped"] += 1
+            return False
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
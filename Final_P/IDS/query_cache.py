@@ -0,0 +1,116 @@
+"""
+Query Cache Module - Read-through TTL cache for the dashboard queries
+The index, dashboard, statistics and API views all run the same aggregate
+queries for every analyst. Results are cached per view and parameters, expire
+after a TTL and are dropped as soon as the pipeline reports new rows for a
+table they depend on, so the database sees one query per change instead of
+one per page load.
+"""
+
+import threading
+import time
+
+DEFAULT_TTL = 30  # seconds
+
+try:
+    from config import Config
+    DEFAULT_TTL = Config.QUERY_CACHE_TTL
+except (ImportError, AttributeError, ValueError):
+    pass
+
+
+def _detach(value):
+    """Expunge ORM objects from the request session so they outlive it unexpired"""
+    from models import db
+
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            _detach(item)
+    elif hasattr(value, '_sa_instance_state') and value in db.session:
+        db.session.expunge(value)
+    return value
+
+
+class QueryCache:
+    """TTL cache with per-table invalidation and hit/miss counters"""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        """
+        Args:
+            ttl: Seconds an entry is served before it is reloaded
+        """
+        self.ttl = ttl
+        self.entries = {}  # key -> (expires, depends, value)
+        self.loading = {}  # key -> lock held while one request runs the loader
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key, loader, depends=(), ttl=None):
+        """
+        Cached result of loader(), reloading it when missing, expired or invalidated
+
+        Concurrent misses for the same key wait for a single loader call.
+
+        Args:
+            key: Hashable key, e.g. (view name, parameters...)
+            loader: Function running the queries
+            depends: Tables whose new rows invalidate the entry
+            ttl: Override of the cache TTL for this entry
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[2]
+
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have loaded it while we waited
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[2]
+
+            with self.lock:
+                self.stats["misses"] += 1
+                generation = self.generation
+
+            value = _detach(loader())
+            expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+            with self.lock:
+                # Don't keep a result that may predate an invalidation
+                if generation == self.generation:
+                    self.entries[key] = (expires, frozenset(depends), value)
+                self.loading.pop(key, None)
+            return value
+
+    def _lookup(self, key):
+        """Live (expires, depends, value) entry for key, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self.stats["hits"] += 1
+            return entry
+
+    def invalidate(self, *tables):
+        """Drop entries depending on any of tables (every entry if none are given)"""
+        with self.lock:
+            self.generation += 1
+            self.stats["invalidations"] += 1
+            if not tables:
+                self.entries.clear()
+                return
+            tables = set(tables)
+            for key in [key for key, entry in self.entries.items() if entry[1] & tables]:
+                del self.entries[key]
+
+    def summary(self):
+        """Counters for the cache stats endpoint"""
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats,
+                        entries=len(self.entries),
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else None,
+                        ttl=self.ttl)
@@ -0,0 +1,278 @@
+"""
+Metrics Rollup Module - Downsamples the metrics tables for the statistics views
+SystemMetrics, TrafficStatistics and AttackTypeMetrics get one row per window
+(per model for attack metrics). This module keeps 1-minute, 1-hour and 1-day
+rollups of them up to date incrementally and expires old raw rows, so long
+time ranges are served from a few hundred pre-aggregated rows.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from models import (db, SystemMetrics, TrafficStatistics, AttackTypeMetrics,
+                    SystemMetricsRollup, TrafficStatisticsRollup, AttackTypeMetricsRollup)
+
+# Each resolution is built from the one before it (1min from the raw rows)
+RESOLUTIONS = OrderedDict([
+    ('1min', timedelta(minutes=1)),
+    ('1h', timedelta(hours=1)),
+    ('1day', timedelta(days=1)),
+])
+
+GRACE = timedelta(seconds=30)  # DatabaseLogger writes rows a few seconds after they are logged
+MIN_POINTS = 48  # Views use the coarsest resolution that still gives this many points
+BUCKETS_PER_PASS = 1000  # Backfill in chunks of this many buckets
+ROLLUP_INTERVAL = 60  # seconds between job runs
+
+# Rows older than this are deleted once rolled up (None = keep forever)
+RETENTION = {
+    'raw': timedelta(days=7),
+    '1min': timedelta(days=30),
+    '1h': timedelta(days=365),
+    '1day': None,
+}
+
+try:
+    from config import Config
+    ROLLUP_INTERVAL = Config.METRICS_ROLLUP_INTERVAL
+    RETENTION = {
+        'raw': timedelta(days=Config.METRICS_RAW_RETENTION_DAYS),
+        '1min': timedelta(days=Config.METRICS_MINUTE_RETENTION_DAYS),
+        '1h': timedelta(days=Config.METRICS_HOUR_RETENTION_DAYS),
+        '1day': None,
+    }
+except (ImportError, AttributeError, ValueError):
+    pass
+
+
+def floor_time(value, step):
+    """Start of the bucket of size step containing value (buckets align to midnight)"""
+    return datetime.min + ((value - datetime.min) // step) * step
+
+
+def _weighted_mean(pairs):
+    """Mean of (value, weight) pairs, ignoring missing values"""
+    pairs = [(value, weight) for value, weight in pairs if value is not None]
+    total = sum(weight for _, weight in pairs)
+    return sum(value * weight for value, weight in pairs) / total if total else None
+
+
+def _samples(row):
+    return getattr(row, 'samples', 1) or 1
+
+
+def aggregate_system_metrics(rows):
+    """Totals keep their last value, queue sizes and processing time are averaged"""
+    last = max(rows, key=lambda row: row.timestamp)
+    return {
+        'samples': sum(_samples(row) for row in rows),
+        'captures_total': last.captures_total,
+        'processed_total': last.processed_total,
+        'predictions_total': last.predictions_total,
+        'alerts_total': last.alerts_total,
+        'capture_queue_size': _weighted_mean((row.capture_queue_size, _samples(row)) for row in rows),
+        'processing_queue_size': _weighted_mean((row.processing_queue_size, _samples(row)) for row in rows),
+        'prediction_queue_size': _weighted_mean((row.prediction_queue_size, _samples(row)) for row in rows),
+        'processing_time_avg': _weighted_mean((row.processing_time_avg, _samples(row)) for row in rows),
+    }
+
+
+def aggregate_traffic_statistics(rows):
+    """Flow counts are summed, packet size averaged over flows"""
+    return {
+        'samples': sum(_samples(row) for row in rows),
+        'total_flows': sum(row.total_flows or 0 for row in rows),
+        'normal_flows': sum(row.normal_flows or 0 for row in rows),
+        'anomalous_flows': sum(row.anomalous_flows or 0 for row in rows),
+        'avg_packet_size': _weighted_mean((row.avg_packet_size, row.total_flows or 1) for row in rows),
+    }
+
+
+def aggregate_attack_metrics(rows):
+    """Counts are summed; the percentage is recomputed from the summed counts"""
+    predictions = sum(row.predictions_count or 0 for row in rows)
+    anomalies = sum(row.anomaly_count or 0 for row in rows)
+    peaks = [getattr(row, 'max_anomaly_percentage', row.anomaly_percentage) for row in rows]
+    peaks = [peak for peak in peaks if peak is not None]
+    return {
+        'samples': sum(_samples(row) for row in rows),
+        'predictions_count': predictions,
+        'normal_count': sum(row.normal_count or 0 for row in rows),
+        'anomaly_count': anomalies,
+        'anomaly_percentage': round(anomalies / predictions * 100, 2) if predictions else 0,
+        'max_anomaly_percentage': max(peaks) if peaks else None,
+    }
+
+
+# (raw model, rollup model, columns grouped on besides the bucket, aggregate function)
+ROLLUPS = [
+    (SystemMetrics, SystemMetricsRollup, (), aggregate_system_metrics),
+    (TrafficStatistics, TrafficStatisticsRollup, (), aggregate_traffic_statistics),
+    (AttackTypeMetrics, AttackTypeMetricsRollup, ('attack_type',), aggregate_attack_metrics),
+]
+
+
+def _source_query(session, raw_model, rollup_model, resolution):
+    """Rows a resolution is built from: the raw table or the next finer rollup"""
+    names = list(RESOLUTIONS)
+    position = names.index(resolution)
+    if position == 0:
+        return raw_model, session.query(raw_model)
+    return rollup_model, session.query(rollup_model).filter(
+        rollup_model.resolution == names[position - 1])
+
+
+def rollup_table(session, raw_model, rollup_model, keys, aggregate, resolution, now=None):
+    """
+    Add the complete buckets of one resolution that are not rolled up yet
+
+    Returns:
+        Number of rollup rows written
+    """
+    step = RESOLUTIONS[resolution]
+    now = now or datetime.utcnow()
+    end = floor_time(now - GRACE, step)
+    source, query = _source_query(session, raw_model, rollup_model, resolution)
+
+    last = session.query(db.func.max(rollup_model.timestamp)).filter(
+        rollup_model.resolution == resolution).scalar()
+    if last is not None:
+        start = last + step
+    else:
+        first = query.with_entities(db.func.min(source.timestamp)).scalar()
+        if first is None:
+            return 0
+        start = floor_time(first, step)
+
+    written = 0
+    while start < end:
+        chunk_end = min(start + step * BUCKETS_PER_PASS, end)
+        rows = query.filter(source.timestamp >= start, source.timestamp < chunk_end).all()
+
+        buckets = OrderedDict()
+        for row in rows:
+            bucket = (floor_time(row.timestamp, step),) + tuple(getattr(row, key) for key in keys)
+            buckets.setdefault(bucket, []).append(row)
+
+        mappings = []
+        for bucket, bucket_rows in buckets.items():
+            mapping = dict(resolution=resolution, timestamp=bucket[0], **dict(zip(keys, bucket[1:])))
+            mapping.update(aggregate(bucket_rows))
+            mappings.append(mapping)
+
+        if mappings:
+            session.bulk_insert_mappings(rollup_model, mappings)
+            session.commit()
+            written += len(mappings)
+        start = chunk_end
+
+    return written
+
+
+def apply_retention(session, now=None):
+    """
+    Delete raw and rollup rows past their retention
+
+    Rows are only deleted once the next coarser resolution covers them.
+
+    Returns:
+        Number of rows deleted
+    """
+    now = now or datetime.utcnow()
+    names = list(RESOLUTIONS)
+    deleted = 0
+
+    for raw_model, rollup_model, _, _ in ROLLUPS:
+        for position, level in enumerate(['raw'] + names[:-1]):
+            if RETENTION.get(level) is None:
+                continue
+            covering = names[position]
+            covered_until = session.query(db.func.max(rollup_model.timestamp)).filter(
+                rollup_model.resolution == covering).scalar()
+            if covered_until is None:
+                continue
+            cutoff = min(now - RETENTION[level], covered_until + RESOLUTIONS[covering])
+
+            if level == 'raw':
+                query = session.query(raw_model).filter(raw_model.timestamp < cutoff)
+            else:
+                query = session.query(rollup_model).filter(
+                    rollup_model.resolution == level, rollup_model.timestamp < cutoff)
+            deleted += query.delete(synchronize_session=False)
+
+    session.commit()
+    return deleted
+
+
+def rollup_metrics(session, now=None):
+    """Bring every rollup up to date and apply retention"""
+    written = 0
+    for raw_model, rollup_model, keys, aggregate in ROLLUPS:
+        for resolution in RESOLUTIONS:
+            written += rollup_table(session, raw_model, rollup_model, keys, aggregate, resolution, now)
+    deleted = apply_retention(session, now)
+    return written, deleted
+
+
+def choose_resolution(span):
+    """
+    Coarsest resolution giving at least MIN_POINTS buckets over span
+
+    Returns:
+        Resolution name, or None when the raw rows should be used
+    """
+    for resolution in reversed(RESOLUTIONS):
+        if span / RESOLUTIONS[resolution] >= MIN_POINTS:
+            return resolution
+    return None
+
+
+def metrics_series(raw_model, rollup_model, since, resolution):
+    """Time-ordered query for a statistics series: raw rows, or rollup rows of a resolution"""
+    if resolution is None:
+        return raw_model.query.filter(
+            raw_model.timestamp >= since
+        ).order_by(raw_model.timestamp.asc())
+    return rollup_model.query.filter(
+        rollup_model.resolution == resolution,
+        rollup_model.timestamp >= floor_time(since, RESOLUTIONS[resolution])
+    ).order_by(rollup_model.timestamp.asc())
+
+
+def start_rollup_job(app, interval=None):
+    """Run rollup_metrics every interval seconds in a daemon thread"""
+    interval = interval or ROLLUP_INTERVAL
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    written, deleted = rollup_metrics(db.session)
+                    if written or deleted:
+                        print(f"[Rollup] Wrote {written} rollup rows, expired {deleted} rows")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[Rollup] Error: {e}")
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="MetricsRollup", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # One pass, e.g. from cron when the web app does not run the job
+    from flask import Flask
+    from models import database_uri
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = sys.argv[1] if len(sys.argv) > 1 else database_uri()
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        written, deleted = rollup_metrics(db.session)
+        print(f"✓ Wrote {written} rollup rows, expired {deleted} rows")
@@ -1,5 +1,3 @@
-from matplotlib.pyplot import plot
-import matplotlib.pyplot as plt
 from sklearn import metrics
 from sklearn import tree
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
@@ -10,38 +8,16 @@ from sklearn.preprocessing import LabelEncoder
 
 import numpy as np
 import pandas as pd
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_Bot(B):
 
     # 
     feature_list = ["Destination Port","Bwd Packet Length Mean","Flow IAT Min","Flow IAT Std","Flow IAT Max","Label"]
-    df=pd.read_csv("attacks_datasets/Bot.csv",usecols=feature_list)
-    
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
-
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-
 
-    clf = AdaBoostClassifier()
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/Bot.csv", feature_list, AdaBoostClassifier(), random_state=2)
 
 
     # the given captured network traffic from main.py 
@@ -70,13 +46,6 @@ def ML_Bot(B):
 
 
 
-    ct["Predicted_result"] = predict
-
-            
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (Bot Scan) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-
-    plt.xticks(rotation=0)
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/Bot_Attack.png")
-    plt.legend(['Anomaly - 0', 'Normal - 1'])
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("Bot_Attack", predict, "Bot_Attack.png")
     return ["Bot_Attack",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
\ No newline at end of file
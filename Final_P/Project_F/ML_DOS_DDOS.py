@@ -3,10 +3,10 @@ from sklearn import metrics
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
-import matplotlib.pyplot as plt
 
 import os
 import pandas as pd
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_DOS(B):
 
@@ -27,31 +27,14 @@ def ML_DOS(B):
         a=[]
         
         feature_list=list(features[j[0:-4]])
-        df=pd.read_csv(path+j,usecols=feature_list)#read an attack file.
-        df=df.fillna(0)
-        attack_or_not=[]
-        for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-            
-            if i =="BENIGN":
-                attack_or_not.append(1)
-            else:
-                attack_or_not.append(0)           
-        df["Label"]=attack_or_not
-
-        
-        y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-        del df["Label"]
         feature_list.remove('Label')
-        X = df[feature_list]
-
-        X_train, X_test, y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 10)
 
-        clf = DecisionTreeClassifier(max_depth=5,criterion="entropy")
+        # Fitted once per process and reused from trained_models/legacy/ across runs
+        clf = cached_classifier(path+j, feature_list, DecisionTreeClassifier(max_depth=5,criterion="entropy"), random_state=10)
 
         ct = B[feature_list]
         ct = ct.fillna(0)
 
-        clf.fit(X_train, y_train)
         predict =clf.predict(ct)
         
         B["Predicted_result"] = predict
@@ -77,19 +60,6 @@ def ML_DOS(B):
     # the tested traffic is anomaly with {the_percentage_of_anomaly_traffic}% with DoS_Scan predition ML
     #     """)
 
-        ct["Predicted_result"] = predict
-        # attack_or_not_back = []
-        # for i in ct["Predicted_result"]:
-    
-        #     if i == 1:
-        #         attack_or_not_back.append("Normal")
-        #     else:
-        #         attack_or_not_back.append("Anomaly") 
-        # ct["Predicted_result"] = attack_or_not_back
-        ct["Predicted_result"].value_counts().plot(kind='bar', title=f'Normal and Anomaly ({j[0:-4]}) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-        # pr=precision_score(y_test, predict, average='macro')
-        # print(pr)
-        plt.xticks(rotation=0)
-        plt.savefig(f"/root/Desktop/Final_P/IDS/static/{j[0:-4]}.png")
+        # Drawn by the plot renderer process, not in the window loop
+        plot_predictions(j[0:-4], predict, f"{j[0:-4]}.png")
         return [f"{j[0:-4]}",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
@@ -1,5 +1,3 @@
-from matplotlib.pyplot import plot
-import matplotlib.pyplot as plt
 from sklearn import metrics
 from sklearn import tree
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
@@ -8,36 +6,16 @@ from sklearn.model_selection import train_test_split
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_DS_SL(B):
 
     # 
     feature_list = ["Flow IAT Mean","Avg Bwd Segment Size","Fwd IAT Mean","Bwd Packet Length Mean","min_seg_size_forward","Bwd Packet Length Max","Total Length of Bwd Packets","Label"]
-    df=pd.read_csv("attacks_datasets/DOS_DDOS/DoS slowloris.csv",usecols=feature_list)
-    # df.drop("External IP",axis = 1,inplace = True)
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
-
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
 
-    clf = tree.DecisionTreeClassifier(max_depth=5,criterion="entropy")
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/DOS_DDOS/DoS slowloris.csv", feature_list, tree.DecisionTreeClassifier(max_depth=5,criterion="entropy"), random_state=2)
 
 
     # the given captured network traffic from main.py 
@@ -70,21 +48,7 @@ def ML_DS_SL(B):
     # the tested traffic is anomaly with {the_percentage_of_anomaly_traffic}% with Bot_Scan predition ML
     # """)
 
-    ct["Predicted_result"] = predict
-    # attack_or_not_back = []
-    # for i in ct["Predicted_result"]:
-        
-    #     if i == 1:
-    #         attack_or_not_back.append("Normal")
-    #     else:
-    #         attack_or_not_back.append("Anomaly")
-    # ct["Predicted_result"] = attack_or_not_back
-            
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (DoS slowloris) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-    # pr=precision_score(y_test, predict, average='macro')
-    # print(pr)
-    plt.xticks(rotation=0)
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/DoS slowloris.png")
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("DoS slowloris", predict, "DoS slowloris.png")
 
     return ["DoS slowloris",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
\ No newline at end of file
@@ -1,4 +1,3 @@
-from matplotlib import pyplot as plt
 from sklearn import metrics
 from sklearn import tree
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
@@ -7,35 +6,15 @@ from sklearn.model_selection import train_test_split
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_FTP(B):
 
     feature_list = ["Destination Port","Total Fwd Packets","Bwd Packet Length Std","Bwd Packet Length Max","Total Length of Bwd Packets","Label"]
-    df=pd.read_csv("attacks_datasets/FTP-Patator.csv",usecols=feature_list)
-    # df.drop("External IP",axis = 1,inplace = True)
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
 
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-
-
-    clf = AdaBoostClassifier()
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/FTP-Patator.csv", feature_list, AdaBoostClassifier(), random_state=2)
 
 
 
@@ -67,20 +46,7 @@ def ML_FTP(B):
     # the tested traffic is anomaly with {the_percentage_of_anomaly_traffic}% with FTP_Patator_Scan predition ML
     # """)
 
-    ct["Predicted_result"] = predict
-    # attack_or_not_back = []
-    # for i in ct["Predicted_result"]:
-        
-    #     if i == 1:
-    #         attack_or_not_back.append("Normal")
-    #     else:
-    #         attack_or_not_back.append("Anomaly")
-    # ct["Predicted_result"] = attack_or_not_back
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (FTP-Patator) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-
-    plt.xticks(rotation=0)
-    plt.legend(['Anomaly - 0', 'Normal - 1']);
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/FTP-Patator.png")
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("FTP-Patator", predict, "FTP-Patator.png")
     
     return ["FTP-Patator",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
@@ -1,4 +1,3 @@
-from matplotlib import pyplot as plt
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
@@ -6,35 +5,15 @@ import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.tree import DecisionTreeClassifier
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_Infiltr(B):
     feature_list = ["Fwd Packet Length Max","Fwd Packet Length Mean","Flow Duration","Total Length of Fwd Packets","Bwd Packet Length Mean","Label"]
     
-    df=pd.read_csv("attacks_datasets/Infiltration.csv",usecols=feature_list)
-    # df.drop("External IP",axis = 1,inplace = True)
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
 
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-
-
-    clf = DecisionTreeClassifier(max_depth=5,criterion="entropy")
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/Infiltration.csv", feature_list, DecisionTreeClassifier(max_depth=5,criterion="entropy"), random_state=2)
 
 
     ct = B[feature_list]
@@ -65,19 +44,7 @@ def ML_Infiltr(B):
     # the tested traffic is anomaly with {the_percentage_of_anomaly_traffic}% with Infilteration_Scan predition ML
     # """)
     
-    ct["Predicted_result"] = predict
-    # attack_or_not_back = []
-    # for i in ct["Predicted_result"]:
-        
-    #     if i == 1:
-    #         attack_or_not_back.append("Normal")
-    #     else:
-    #         attack_or_not_back.append("Anomaly")
-    # ct["Predicted_result"] = attack_or_not_back 
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (Infilteration) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-
-    plt.xticks(rotation=0)
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/Infilteration.png")
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("Infilteration", predict, "Infilteration.png")
     
     return ["Infilteration",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
\ No newline at end of file
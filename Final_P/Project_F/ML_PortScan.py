@@ -12,13 +12,11 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.tree import DecisionTreeClassifier
-import matplotlib.pyplot as plt
 from sklearn.metrics import f1_score
 from sklearn.metrics import recall_score
 from sklearn.metrics import precision_score
 
 
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 import pandas as pd
@@ -26,40 +24,16 @@ import csv
 import time
 import warnings
 import math
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_PortScan(B):
 
 
     feature_list =  ["Total Length of Fwd Packets","Flow Bytes/s","Destination Port","Flow Duration","Bwd Packet Length Std","Label"]
-    df=pd.read_csv("attacks_datasets/PortScan.csv",usecols=feature_list)
-    # df.drop("External IP",axis = 1,inplace = True)
-
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-    
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
 
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-
-
-    clf = DecisionTreeClassifier(max_depth=5,criterion="entropy")
-
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/PortScan.csv", feature_list, DecisionTreeClassifier(max_depth=5,criterion="entropy"), random_state=2)
 
 
     ct = B[feature_list]
@@ -84,22 +58,7 @@ def ML_PortScan(B):
         source_ip_addr = fin_df['Source IP'].value_counts().idxmax()
     else:
         pass
-    ct["Predicted_result"] = predict
-    # attack_or_not_back = []
-    # for i in ct["Predicted_result"]:
-        
-    #     if i == 1:
-    #         attack_or_not_back.append("Normal")
-    #     else:
-    #         attack_or_not_back.append("Anomaly")
-    # ct["Predicted_result"] = attack_or_not_back
-
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (Port Scan) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-    # pr=precision_score(y_test, predict, average='macro')
-    # print(pr)
-    plt.xticks(rotation=0)
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/Port_Scan.png")
-    plt.legend(['Anomaly - 0', 'Normal - 1'])
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("Port_Scan", predict, "Port_Scan.png")
 
     return ["Port_Scan",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
\ No newline at end of file
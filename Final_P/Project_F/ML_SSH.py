@@ -1,38 +1,18 @@
-from matplotlib import pyplot as plt
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
+from legacy_models import cached_classifier, plot_predictions
 
 
 def ML_SSH(B):
     feature_list = ["Destination Port","Flow IAT Mean","Flow Packets/s","Flow Duration","Flow IAT Max","Label"]
-    df=pd.read_csv("attacks_datasets/SSH-Patator.csv",usecols=feature_list)
-
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
 
-    X_train, X_test, Y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-
-    clf = RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1)
-    clf.fit(X_train, Y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets/SSH-Patator.csv", feature_list, RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1), random_state=2)
 
 
     ct = B[feature_list]
@@ -65,22 +45,8 @@ def ML_SSH(B):
     # the tested traffic is anomaly with {the_percentage_of_anomaly_traffic}% with SSH_Patator_Scan predition ML
     # """)
     
-    ct["Predicted_result"] = predict
-    # attack_or_not_back = []
-    # for i in ct["Predicted_result"]:
-        
-    #     if i == 1:
-    #         attack_or_not_back.append("Normal")
-    #     else:
-    #         attack_or_not_back.append("Anomaly")
-
-    # ct["Predicted_result"] = attack_or_not_back        
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (SSH-Patator) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-
-    plt.xticks(rotation=0)
-    plt.savefig(f"/root/Desktop/Final_P/IDS/static/SSH-Patator.png")
-    plt.legend(['Anomaly - 0', 'Normal - 1'])
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("SSH-Patator", predict, "SSH-Patator.png")
 
     return ["SSH-Patator",source_ip_addr,fin_df,the_percentage_of_anomaly_traffic]
     # pr=precision_score(y_test, predict, average='macro')
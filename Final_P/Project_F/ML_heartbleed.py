@@ -1,37 +1,17 @@
-from matplotlib import pyplot as plt
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis as QDA
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import numpy as np
 import pandas as pd
+from legacy_models import cached_classifier, plot_predictions
 
 def ML_Heartbleed(B):
 
     feature_list = ["Total Backward Packets","Fwd Packet Length Max","Flow IAT Min","Bwd Packet Length Max","Label"]
-    df=pd.read_csv("attacks_datasets\\Heartbleed.csv",usecols=feature_list)
-
-
-    # perform the dataset initiation
-
-    df=df.fillna(0)
-    attack_or_not=[]
-    for i in df["Label"]: #it changes the normal label to "1" and the attack tag to "0" for use in the machine learning algorithm
-        
-        if i =="BENIGN":
-            attack_or_not.append(1)
-        else:
-            attack_or_not.append(0)           
-    df["Label"]=attack_or_not
-
-
-    y = df["Label"] #this section separates the label and the data into two separate pieces, as Label=y Data=X 
-    del df["Label"]
     feature_list.remove('Label')
-    X = df[feature_list]
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y,test_size = 0.20, random_state = 2)
-    clf = RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1)
-    clf.fit(X_train, y_train)
+    # Fitted once per process and reused from trained_models/legacy/ across runs
+    clf = cached_classifier("attacks_datasets\\Heartbleed.csv", feature_list, RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1), random_state=2)
 
 
 
@@ -52,9 +32,5 @@ def ML_Heartbleed(B):
     the tested traffic is clear with {the_percentage_of_normal_traffic}% with Heartbleed scan predition ML
     """)
     
-    ct["Predicted_result"] = predict
-    ct["Predicted_result"].value_counts().plot(kind='bar', title='Normal and Anomaly (Heartbleed) Prediction', ylabel='occurrences',
-        xlabel='Prediction', figsize=(6, 5))
-
-    plt.xticks(rotation=0)
-    plt.savefig(f"Figures\\Heartbleed_Analysis_Plot.png")
+    # Drawn by the plot renderer process, not in the window loop
+    plot_predictions("Heartbleed", predict, "Heartbleed_Analysis_Plot.png")
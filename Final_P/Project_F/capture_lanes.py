@@ -0,0 +1,188 @@
+"""
+Capture Lanes Module - Sharded capture for links one pipeline can't keep up with
+Each lane is one dumpcap process (an interface, optionally with a BPF filter
+selecting its share of the traffic) with its own conversion and processing
+threads. The processed flows of all lanes are merged per window before the
+models run, so each window still gets a single verdict.
+"""
+
+import os
+import queue
+import re
+import threading
+import time
+import pandas as pd
+from proccessing_captured_data import ChunkedFlows
+
+
+class CaptureLane:
+    """One dumpcap instance and the queues feeding its conversion/processing threads"""
+
+    def __init__(self, name, interface, capture_filter=None, queue_max=5):
+        """
+        Args:
+            name: Lane name used in logs, ring buffer file names and stats
+            interface: Interface dumpcap captures on
+            capture_filter: BPF filter selecting this lane's share, or None for everything
+            queue_max: Size of the lane's capture and processing queues
+        """
+        self.name = name
+        self.interface = interface
+        self.capture_filter = capture_filter
+        self.capture_queue = queue.Queue(maxsize=queue_max)  # (window, pcap path, interface rx bytes)
+        self.processing_queue = queue.Queue(maxsize=queue_max)  # (window, flows, flow file path or None)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.shares_interface = False  # set by build_lanes when another lane captures on it too
+        self.stats = {"windows": 0, "bytes": 0, "flows": 0, "errors": 0, "busy_seconds": 0.0,
+                      "wire_bytes": 0, "snaplen_saved": 0, "filter_saved": 0}
+
+    @property
+    def file_tag(self):
+        """Lane name made safe for file names"""
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", self.name)
+
+    def record(self, **counts):
+        """Add to the lane counters, e.g. record(windows=1, bytes=size)"""
+        with self.lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def summary(self):
+        """Counters plus throughput since the lane started"""
+        with self.lock:
+            stats = dict(self.stats)
+        elapsed = max(time.time() - self.started, 1e-9)
+        busy = stats["busy_seconds"]
+        stats.update(
+            captured_mbps=round(stats["bytes"] * 8 / elapsed / 1e6, 2),
+            flows_per_second=round(stats["flows"] / busy, 1) if busy else None,
+            queued=self.capture_queue.qsize() + self.processing_queue.qsize()
+        )
+        return stats
+
+    def __repr__(self):
+        if self.capture_filter:
+            return f"<CaptureLane {self.name}: {self.interface} '{self.capture_filter}'>"
+        return f"<CaptureLane {self.name}: {self.interface}>"
+
+
+def build_lanes(specs, default_interface, queue_max=5):
+    """
+    Create the capture lanes
+
+    Args:
+        specs: (interface, capture filter or None) pairs, e.g. Config.CAPTURE_LANES;
+            empty for a single lane capturing everything on default_interface
+        default_interface: Interface of the single lane
+        queue_max: Size of each lane's queues
+
+    Returns:
+        List of CaptureLane; lanes sharing an interface are numbered (eth1#1, eth1#2)
+    """
+    specs = list(specs) or [(default_interface, None)]
+    interfaces = [interface for interface, _ in specs]
+    lanes = []
+    for interface, capture_filter in specs:
+        name = interface
+        if interfaces.count(interface) > 1:
+            name = f"{interface}#{sum(lane.interface == interface for lane in lanes) + 1}"
+        lanes.append(CaptureLane(name, interface, capture_filter or None, queue_max))
+        lanes[-1].shares_interface = interfaces.count(interface) > 1
+    return lanes
+
+
+def interface_rx_bytes(interface):
+    """Bytes received on an interface so far (Linux), or None if unavailable"""
+    try:
+        with open(os.path.join("/sys/class/net", interface, "statistics", "rx_bytes")) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+class WindowMerger:
+    """
+    Joins the processed flows of every lane for a window into one DataFrame,
+    or into one ChunkedFlows when a lane's share is too large to process whole
+    """
+
+    def __init__(self, lanes, output_queue, timeout=60):
+        """
+        Args:
+            lanes: All capture lanes
+            output_queue: Queue receiving one merged DataFrame per window
+            timeout: Seconds after a window's first lane reports before it is sent
+                without the lanes still missing (e.g. a lane whose dumpcap failed)
+        """
+        self.lanes = {lane.name for lane in lanes}
+        self.output_queue = output_queue
+        self.timeout = timeout
+        self.pending = {}  # window -> (first arrival, {lane name: DataFrame or None})
+        self.lock = threading.Lock()
+        self.stats = {"windows": 0, "partial": 0, "empty": 0}
+
+    def add(self, window, lane, frame):
+        """
+        Report a lane's processed flows for a window
+
+        Args:
+            window: Window id shared by the lanes (same capture slot, or in micro-batch
+                mode the chunk start time rounded to the chunk duration)
+            lane: CaptureLane reporting
+            frame: Processed flows (DataFrame or ChunkedFlows), or None if the lane
+                produced nothing for the window
+        """
+        with self.lock:
+            first, frames = self.pending.setdefault(window, (time.monotonic(), {}))
+            frames[lane.name] = frame
+            complete = self.lanes <= set(frames)
+            if complete:
+                del self.pending[window]
+
+        if complete:
+            self._emit(window, frames)
+
+    def flush_expired(self):
+        """
+        Send the windows whose lanes have been missing for longer than the timeout,
+        so a lane that never reports doesn't hold up the pipeline. Called periodically
+        (see run), not only when another lane reports.
+        """
+        now = time.monotonic()
+        with self.lock:
+            expired = [w for w, (arrived, _) in self.pending.items() if now - arrived > self.timeout]
+            windows = [(w, self.pending.pop(w)[1]) for w in expired]
+
+        for window, frames in windows:
+            self._emit(window, frames)
+
+    def run(self, interval=1):
+        """Flush expired windows every interval seconds (thread target)"""
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush_expired()
+            except Exception as e:
+                print(f"[Merge] Exception: {e}")
+
+    def _emit(self, window, frames):
+        present = [frame for frame in frames.values() if frame is not None and len(frame) > 0]
+        with self.lock:
+            self.stats["windows"] += 1
+            if not self.lanes <= set(frames):
+                self.stats["partial"] += 1
+                missing = ", ".join(sorted(self.lanes - set(frames)))
+                print(f"[Merge] Window {window}: no data from {missing}, scoring without it")
+            if not present:
+                self.stats["empty"] += 1
+
+        if not present:
+            return
+        if len(present) == 1:
+            merged = present[0]
+        elif any(isinstance(frame, ChunkedFlows) for frame in present):
+            merged = ChunkedFlows.merge(present)
+        else:
+            merged = pd.concat(present, ignore_index=True)
+        self.output_queue.put(merged)
@@ -0,0 +1,246 @@
+"""
+Category Encoder Module - Stable integer codes for string features
+processing() label-encodes string columns per window, so the same Flow ID,
+IP or timestamp gets a different code in every window, and every window pays
+for sorting the unique values of every column. CategoryEncoder keeps one
+dictionary per column that only grows: a value keeps the code it was first
+given, new values are appended, and lookups are hash lookups. The dictionary
+is saved next to the models (trained_models/category_codes.jsonl), extended by
+train_models.py and by MLPredictor, and only holds the columns some model
+uses as a feature.
+
+The file is a JSON-lines log: a header line, then one line per save holding
+the values added to a column since the previous save, so saving a window
+costs the new values rather than the whole dictionary. The log is compacted
+to one line per column when it is loaded.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CODES_FILE = "category_codes.jsonl"
+LEGACY_CODES_FILE = "category_codes.json"  # format 1, converted to the log on load
+FORMAT_VERSION = 2
+MAX_CODES = 1000000  # per column; further new values are encoded as UNKNOWN
+UNKNOWN = -1  # missing values, and new values when the encoder is not allowed to grow
+# Unique per flow or per second: their dictionaries would grow without bound
+IDENTIFIER_COLUMNS = ["Flow ID", "Timestamp"]
+
+
+def refuse_identifiers(columns):
+    """
+    Raises:
+        ValueError: if columns include an identifier that must not be encoded
+    """
+    identifiers = [column for column in columns if column in IDENTIFIER_COLUMNS]
+    if identifiers:
+        raise ValueError(f"{identifiers} are per-flow identifiers and can't be used as features")
+
+
+class CategoryEncoder:
+    """Append-only dictionary encoder for string columns"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON-lines file the codes are loaded from and saved to (None: in memory only)
+        """
+        self.path = path
+        self.values = {}  # column -> values, position = code
+        self.saved = {}  # column -> number of values in the file when last read or written
+        self._index = {}  # column -> pd.Index over values, rebuilt after growing
+        self.dirty = False
+        self.full = set()  # columns that reached MAX_CODES (warned once)
+        self.lock = threading.Lock()
+        self.read_to = 0  # bytes of the log read so far
+        self.inode = None  # of the log when last read; compaction replaces the file
+
+    @classmethod
+    def load(cls, models_dir):
+        """
+        Encoder with the codes saved in models_dir (empty if none were saved yet)
+
+        Raises:
+            ValueError: if the codes file can't be read; starting over would
+                give known values different codes than the models were trained with
+        """
+        encoder = cls(os.path.join(models_dir, CODES_FILE))
+        legacy = os.path.join(models_dir, LEGACY_CODES_FILE)
+        with encoder._file_lock():
+            lines = encoder._read_log()
+            if not os.path.exists(encoder.path) and os.path.exists(legacy):
+                encoder.values = encoder._read_legacy(legacy)
+                encoder._compact()
+                os.remove(legacy)
+            elif lines > len(encoder.values) + 1:
+                encoder._compact()
+        encoder.saved = {column: len(values) for column, values in encoder.values.items()}
+        return encoder
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize saves and compactions with other processes sharing the file"""
+        if fcntl is None or self.path is None or not os.path.isdir(os.path.dirname(self.path) or "."):
+            yield  # nothing to share (yet)
+            return
+        with open(self.path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_log(self):
+        """
+        Read the log into self.values from where the last read stopped,
+        or from the start if the file was replaced since
+
+        Returns:
+            Lines read
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            self.values, self.read_to, self.inode = {}, 0, None
+            self._index.clear()
+            return 0
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self.inode:
+                self.values, self.read_to, self.inode = {}, 0, inode
+                self._index.clear()
+            f.seek(self.read_to)
+            data = f.read()
+
+        lines = data.split(b"\n")
+        lines.pop()  # after the last newline: empty, or a save cut short by a crash
+        for number, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Cannot read {self.path}: {e}")
+            if self.read_to == 0 and number == 0:
+                if entry.get("format") != FORMAT_VERSION:
+                    raise ValueError(f"Unsupported format {entry.get('format')} in {self.path}")
+                continue
+            self.values.setdefault(entry["column"], []).extend(entry["values"])
+            self._index.pop(entry["column"], None)
+        self.read_to += sum(len(line) + 1 for line in lines)
+        return len(lines)
+
+    def _read_legacy(self, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read {path}: {e}")
+        if data.get("format") != 1:
+            raise ValueError(f"Unsupported format {data.get('format')} in {path}")
+        return {column: list(values) for column, values in data["columns"].items()}
+
+    def _compact(self):
+        """Rewrite the log as one line per column (hold the file lock)"""
+        lines = [json.dumps({"format": FORMAT_VERSION})]
+        lines += [json.dumps({"column": column, "values": values}) for column, values in self.values.items()]
+        data = "".join(line + "\n" for line in lines).encode()
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(self.path + ".tmp", self.path)
+        self.read_to, self.inode = len(data), os.stat(self.path).st_ino
+
+    def index(self, column):
+        if column not in self._index:
+            self._index[column] = pd.Index(self.values.get(column, []), dtype=object)
+        return self._index[column]
+
+    def encode(self, column, values, grow=True):
+        """
+        Codes of a column's values
+
+        Args:
+            column: Column name (each column has its own codes)
+            values: Series or array of values; they are compared as strings
+            grow: Give values seen for the first time new codes (else UNKNOWN)
+
+        Returns:
+            int64 array of codes, UNKNOWN for missing values
+
+        Raises:
+            ValueError: for IDENTIFIER_COLUMNS
+        """
+        refuse_identifiers([column])
+        # Look up each distinct value of the window once, not every row
+        positions, uniques = pd.factorize(pd.Series(values, copy=False))  # missing values -> -1
+        keys = pd.Index(uniques, dtype=object).astype(str).to_numpy(dtype=object)
+
+        with self.lock:
+            found = self.index(column).get_indexer(keys)
+            new = found == -1
+            if grow and new.any():
+                known = self.values.setdefault(column, [])
+                added = pd.unique(keys[new])  # in order of first appearance
+                room = MAX_CODES - len(known)
+                if len(added) > room:
+                    if column not in self.full:
+                        self.full.add(column)
+                        print(f"⚠ {column}: {MAX_CODES} codes in use, new values are encoded as {UNKNOWN}")
+                    added = added[:max(room, 0)]
+                if len(added):
+                    known.extend(added.tolist())
+                    self._index.pop(column, None)
+                    self.dirty = True
+                    found[new] = self.index(column).get_indexer(keys[new])
+        found = np.append(found.astype(np.int64), UNKNOWN)  # position -1 picks UNKNOWN
+        return found[positions]
+
+    def save(self):
+        """
+        Append the values added since the last save to the log
+
+        Values another process saved in the meantime (e.g. train_models.py
+        next to a running pipeline) keep their codes; values this encoder
+        added since its last save are renumbered after them.
+        """
+        if self.path is None or not self.dirty:
+            return
+        with self.lock, self._file_lock():
+            ours = self.values
+            self.values = {column: values[:self.saved.get(column, 0)] for column, values in ours.items()}
+            try:
+                self._read_log()
+                for column, values in ours.items():
+                    count = self.saved.get(column, 0)
+                    if self.values.setdefault(column, [])[:count] != values[:count]:
+                        raise ValueError(f"{self.path}: codes of {column} were rewritten")
+            except ValueError:
+                self.values = ours
+                raise
+            in_file = {column: len(values) for column, values in self.values.items()}
+            for column, values in ours.items():
+                known = set(self.values[column])
+                self.values[column] += [v for v in values[self.saved.get(column, 0):] if v not in known]
+                self._index.pop(column, None)
+
+            lines = [] if self.inode is not None else [json.dumps({"format": FORMAT_VERSION})]
+            lines += [json.dumps({"column": column, "values": values[in_file.get(column, 0):]})
+                      for column, values in self.values.items() if len(values) > in_file.get(column, 0)]
+            data = "".join(line + "\n" for line in lines).encode()
+            with open(self.path, "ab") as f:
+                f.truncate(self.read_to)  # drop a save cut short by a crash
+                f.write(data)
+                self.inode = os.fstat(f.fileno()).st_ino
+            self.read_to += len(data)
+            self.saved = {column: len(values) for column, values in self.values.items()}
+            self.dirty = False
+
+    def __repr__(self):
+        return f"<CategoryEncoder {', '.join(f'{c}: {len(v)}' for c, v in self.values.items()) or 'empty'}>"
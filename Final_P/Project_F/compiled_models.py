@@ -0,0 +1,340 @@
+"""
+Compiled Models Module - Flattens trained tree models into NumPy arrays
+Every detector is a DecisionTree, an AdaBoost ensemble of trees or a small
+RandomForest, so it can be evaluated with one vectorized comparison per tree
+level instead of going through sklearn for every window.
+"""
+
+import os
+import pickle
+import sys
+import warnings
+import numpy as np
+
+# Deepest tree that is compiled; every tree is padded to a complete binary tree
+MAX_DEPTH = 12
+
+
+class CompiledModel:
+    """A tree ensemble stored as flat arrays with a batched evaluator"""
+
+    def __init__(self, kind, classes, feature, threshold, value, scale=1.0):
+        """
+        Trees are stored as complete binary trees in heap order (children of
+        node i are 2i+1 and 2i+2), so a row needs exactly one comparison per
+        level and no child pointers have to be looked up.
+
+        Args:
+            kind: "tree", "forest" or "adaboost"
+            classes: Class labels, in the order of the value columns
+            feature: (trees, 2**depth - 1) feature index tested at each split
+            threshold: (trees, 2**depth - 1) split thresholds
+            value: (trees, 2**depth, classes) contribution of each leaf to the score
+            scale: Divisor applied to the summed contributions
+        """
+        self.kind = kind
+        self.classes = np.asarray(classes)
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.scale = float(scale)
+
+    @property
+    def n_trees(self):
+        return self.value.shape[0]
+
+    @property
+    def depth(self):
+        return self.value.shape[1].bit_length() - 1
+
+    def predict(self, X):
+        """
+        Predict classes for a feature matrix (columns in the model's feature order)
+
+        Args:
+            X: 2D array-like of features
+
+        Returns:
+            Array of predicted class labels
+        """
+        # sklearn trees round inputs to float32, then compare against float64 thresholds;
+        # the gathered float32 values are promoted per comparison, so a column slice
+        # of a larger matrix (MLPredictor.predict_fused) is read in place
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D feature matrix, got shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+
+        n_rows, n_features = X.shape
+        if X.strides[1] != X.itemsize or X.strides[0] % X.itemsize:
+            X = np.ascontiguousarray(X)
+        row_stride = X.strides[0] // X.itemsize
+        span = (n_rows - 1) * row_stride + n_features if n_rows else 0
+        flat = np.lib.stride_tricks.as_strided(X, shape=(span,), strides=(X.itemsize,), writeable=False)
+        row_offsets = np.arange(n_rows) * row_stride
+        first_leaf = 2 ** self.depth - 1
+
+        # Same summation order as sklearn: 0 + tree_1 + tree_2 + ...
+        score = 0
+        for tree in range(self.n_trees):
+            feature = self.feature[tree]
+            threshold = self.threshold[tree]
+            node = np.zeros(n_rows, dtype=np.intp)
+
+            if self.depth > 0:
+                # Level 0: every row is at the root, so compare a whole column
+                node = 1 + (X[:, feature[0]].astype(np.float64) > threshold[0])
+            for _ in range(1, self.depth):
+                values = flat.take(row_offsets + feature.take(node))
+                node = 2 * node + 1 + (values > threshold.take(node))
+
+            score = score + self.value[tree].take(node - first_leaf, axis=0)
+
+        if self.kind == "tree":
+            return self.classes.take(np.argmax(score, axis=1), axis=0)
+
+        score /= self.scale
+        if self.kind == "adaboost" and len(self.classes) == 2:
+            score[:, 0] *= -1
+            return self.classes.take(score.sum(axis=1) > 0, axis=0)
+        return self.classes.take(np.argmax(score, axis=1), axis=0)
+
+    def to_arrays(self):
+        """Arrays for np.savez"""
+        return {
+            "kind": np.array(self.kind),
+            "classes": self.classes,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "value": self.value,
+            "scale": np.array(self.scale)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            kind=str(arrays["kind"]),
+            classes=arrays["classes"],
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            value=arrays["value"],
+            scale=float(arrays["scale"])
+        )
+
+
+def _leaf_proba(tree, n_classes):
+    """DecisionTreeClassifier.predict_proba for every node of a tree"""
+    proba = tree.tree_.value[:, 0, :n_classes].copy()
+    normalizer = proba.sum(axis=1)[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    proba /= normalizer
+    return proba
+
+
+def _samme_r_contribution(tree, n_classes):
+    """AdaBoost SAMME.R contribution (sklearn's _samme_proba) for every node"""
+    proba = _leaf_proba(tree, n_classes)
+    np.clip(proba, np.finfo(proba.dtype).eps, None, out=proba)
+    log_proba = np.log(proba)
+    return (n_classes - 1) * (
+        log_proba - (1.0 / n_classes) * log_proba.sum(axis=1)[:, np.newaxis]
+    )
+
+
+def _samme_contribution(tree, weight, classes):
+    """AdaBoost SAMME contribution for every node"""
+    n_classes = len(classes)
+    predicted = classes.take(np.argmax(tree.tree_.value[:, 0, :n_classes], axis=1), axis=0)
+    return np.where((predicted == classes[:, np.newaxis]).T, weight,
+                    -1 / (n_classes - 1) * weight)
+
+
+def _pad_tree(tree, node_values, depth):
+    """
+    Lay a fitted tree out as a complete binary tree of the given depth
+
+    Leaves above the last level are repeated into every leaf below them, so
+    whichever way the padding splits go, the row ends on the same value.
+    """
+    t = tree.tree_
+    feature = np.zeros(2 ** depth - 1, dtype=np.intp)
+    threshold = np.zeros(2 ** depth - 1, dtype=np.float64)
+    value = np.zeros((2 ** depth, node_values.shape[1]), dtype=np.float64)
+
+    stack = [(0, 0, 0)]  # (sklearn node, heap position, level)
+    while stack:
+        node, position, level = stack.pop()
+        if t.children_left[node] == -1:
+            # Leaf: it covers 2**(depth - level) consecutive slots of the last level
+            first = (position - (2 ** level - 1)) * 2 ** (depth - level)
+            value[first:first + 2 ** (depth - level)] = node_values[node]
+            continue
+        feature[position] = t.feature[node]
+        threshold[position] = t.threshold[node]
+        stack.append((t.children_left[node], 2 * position + 1, level + 1))
+        stack.append((t.children_right[node], 2 * position + 2, level + 1))
+
+    return feature, threshold, value
+
+
+def compile_model(model):
+    """
+    Compile a fitted DecisionTree, RandomForest or AdaBoost classifier
+
+    Args:
+        model: Fitted sklearn classifier
+
+    Returns:
+        CompiledModel
+    """
+    name = type(model).__name__
+    classes = np.asarray(model.classes_)
+    n_classes = len(classes)
+    scale = 1.0
+
+    if name == "DecisionTreeClassifier":
+        kind = "tree"
+        trees = [model]
+        values = [model.tree_.value[:, 0, :n_classes]]
+    elif name == "RandomForestClassifier":
+        kind = "forest"
+        trees = list(model.estimators_)
+        values = [_leaf_proba(tree, n_classes) for tree in trees]
+        scale = len(trees)
+    elif name == "AdaBoostClassifier":
+        kind = "adaboost"
+        trees = list(model.estimators_)
+        if model.algorithm == "SAMME.R":
+            values = [_samme_r_contribution(tree, n_classes) for tree in trees]
+        else:
+            values = [_samme_contribution(tree, weight, classes)
+                      for tree, weight in zip(trees, model.estimator_weights_)]
+        scale = model.estimator_weights_.sum()
+    else:
+        raise TypeError(f"Cannot compile {name}")
+
+    depth = max(tree.tree_.max_depth for tree in trees)
+    if depth > MAX_DEPTH:
+        raise ValueError(f"Trees of depth {depth} are too deep to compile (max {MAX_DEPTH})")
+
+    padded = [_pad_tree(tree, node_values, depth) for tree, node_values in zip(trees, values)]
+
+    return CompiledModel(
+        kind=kind,
+        classes=classes,
+        feature=np.stack([p[0] for p in padded]),
+        threshold=np.stack([p[1] for p in padded]),
+        value=np.stack([p[2] for p in padded]),
+        scale=scale
+    )
+
+
+def probe_matrix(compiled, n_features, n_rows=5000, seed=0):
+    """
+    Random inputs that land exactly on, just above and around split thresholds
+
+    Used to check a compiled model against the original sklearn model.
+    """
+    rng = np.random.RandomState(seed)
+    thresholds = compiled.threshold.ravel()
+    candidates = np.concatenate([
+        thresholds,
+        np.nextafter(thresholds.astype(np.float32), np.float32(np.inf)),
+        thresholds * rng.uniform(0, 2, len(thresholds)),
+        [0.0]
+    ])
+    return candidates[rng.randint(len(candidates), size=(n_rows, n_features))].astype(np.float32)
+
+
+def sklearn_predict(model, X):
+    """model.predict on a plain matrix, without the feature-name warning"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict(X)
+
+
+def verify_compiled(model, compiled, n_features):
+    """Return True if the compiled model predicts exactly like the sklearn model"""
+    X = probe_matrix(compiled, n_features)
+    return np.array_equal(sklearn_predict(model, X), compiled.predict(X))
+
+
+def export_compiled_models(models_dir="trained_models"):
+    """
+    Compile every pickled model in models_dir into a .npz file next to it
+
+    Models whose compiled form does not reproduce sklearn's predictions on the
+    probe matrix are skipped, so MLPredictor keeps using the pickle for them.
+    """
+    exported = 0
+
+    for filename in sorted(os.listdir(models_dir)):
+        if not filename.endswith(".pkl"):
+            continue
+
+        model_path = os.path.join(models_dir, filename)
+        compiled_path = model_path[:-len(".pkl")] + ".npz"
+        try:
+            with open(model_path, "rb") as f:
+                model_data = pickle.load(f)
+
+            model = model_data["model"]
+            features = model_data["features"]
+            compiled = compile_model(model)
+
+            if not verify_compiled(model, compiled, len(features)):
+                print(f"✗ {filename}: compiled predictions differ from sklearn, skipped")
+                if os.path.exists(compiled_path):
+                    os.remove(compiled_path)
+                continue
+
+            np.savez(compiled_path, features=np.array(features), **compiled.to_arrays())
+            exported += 1
+            print(f"✓ Compiled {filename} ({compiled.n_trees} trees, depth {compiled.depth})")
+
+        except Exception as e:
+            print(f"✗ Error compiling {filename}: {e}")
+
+    return exported
+
+
+def load_compiled_model(path):
+    """
+    Load a model exported by export_compiled_models()
+
+    Returns:
+        Dictionary with "model" and "features", like the pickled models
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        return {
+            "model": CompiledModel.from_arrays(arrays),
+            "features": [str(f) for f in arrays["features"]]
+        }
+
+
+def test_compiled_parity(models_dir="trained_models", traffic_data=None):
+    """Compare compiled and pickled predictions for every exported model"""
+    print("Testing compiled models...")
+
+    for filename in sorted(os.listdir(models_dir)):
+        if not filename.endswith(".npz"):
+            continue
+
+        with open(os.path.join(models_dir, filename[:-len(".npz")] + ".pkl"), "rb") as f:
+            model_data = pickle.load(f)
+        compiled = load_compiled_model(os.path.join(models_dir, filename))["model"]
+
+        if traffic_data is not None:
+            X = traffic_data[model_data["features"]].fillna(0).to_numpy(dtype=np.float32)
+        else:
+            X = probe_matrix(compiled, len(model_data["features"]), seed=1)
+
+        same = np.array_equal(sklearn_predict(model_data["model"], X), compiled.predict(X))
+        print(f"{'✓' if same else '✗'} {filename}")
+
+
+if __name__ == "__main__":
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else "trained_models"
+    export_compiled_models(models_dir)
+    test_compiled_parity(models_dir)
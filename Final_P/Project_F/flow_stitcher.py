@@ -0,0 +1,317 @@
+"""
+Flow Stitching Module - Joins flows split across micro-batch capture chunks
+CICFlowMeter closes every flow at the end of a pcap file, so with short ring
+buffer chunks a long connection shows up as several partial flows. The stitcher
+holds back flows still active at the end of a chunk and merges them with their
+continuation in the next chunk before the flows are scored.
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# CICFlowMeter Timestamp column, e.g. "27/09/2021 02:32:44 pm"
+TIMESTAMP_FORMAT = "%d/%m/%Y %I:%M:%S %p"
+
+FLOW_KEY = ["Flow ID", "Source IP"]
+
+FWD = "Total Fwd Packets"
+BWD = "Total Backward Packets"
+
+SUM_FEATURES = [
+    "Total Fwd Packets", "Total Backward Packets", "Total Length of Fwd Packets",
+    "Total Length of Bwd Packets", "Fwd IAT Total", "Bwd IAT Total", "Fwd PSH Flags",
+    "Bwd PSH Flags", "Fwd URG Flags", "Bwd URG Flags", "Fwd Header Length",
+    "Bwd Header Length", "FIN Flag Count", "SYN Flag Count", "RST Flag Count",
+    "PSH Flag Count", "ACK Flag Count", "URG Flag Count", "CWE Flag Count", "ECE Flag Count",
+    "Subflow Fwd Packets", "Subflow Fwd Bytes", "Subflow Bwd Packets", "Subflow Bwd Bytes",
+    "act_data_pkt_fwd"
+]
+
+# Statistic -> packet count it is taken over ("all" = both directions, None = unknown)
+MAX_FEATURES = {
+    "Fwd Packet Length Max": FWD, "Bwd Packet Length Max": BWD, "Max Packet Length": "all",
+    "Flow IAT Max": "all", "Fwd IAT Max": FWD, "Bwd IAT Max": BWD,
+    "Active Max": None, "Idle Max": None
+}
+MIN_FEATURES = {
+    "Fwd Packet Length Min": FWD, "Bwd Packet Length Min": BWD, "Min Packet Length": "all",
+    "Flow IAT Min": "all", "Fwd IAT Min": FWD, "Bwd IAT Min": BWD,
+    "Active Min": None, "Idle Min": None, "min_seg_size_forward": FWD
+}
+MEAN_FEATURES = {
+    "Fwd Packet Length Mean": FWD, "Bwd Packet Length Mean": BWD, "Packet Length Mean": "all",
+    "Average Packet Size": "all", "Avg Fwd Segment Size": FWD, "Avg Bwd Segment Size": BWD,
+    "Flow IAT Mean": "all", "Fwd IAT Mean": FWD, "Bwd IAT Mean": BWD,
+    "Active Mean": None, "Idle Mean": None,
+    "Fwd Avg Bytes/Bulk": None, "Fwd Avg Packets/Bulk": None, "Fwd Avg Bulk Rate": None,
+    "Bwd Avg Bytes/Bulk": None, "Bwd Avg Packets/Bulk": None, "Bwd Avg Bulk Rate": None
+}
+# Standard deviation -> matching mean
+STD_FEATURES = {
+    "Fwd Packet Length Std": "Fwd Packet Length Mean",
+    "Bwd Packet Length Std": "Bwd Packet Length Mean",
+    "Packet Length Std": "Packet Length Mean",
+    "Flow IAT Std": "Flow IAT Mean",
+    "Fwd IAT Std": "Fwd IAT Mean",
+    "Bwd IAT Std": "Bwd IAT Mean",
+    "Active Std": "Active Mean",
+    "Idle Std": "Idle Mean"
+}
+IAT_FEATURES = ("Flow IAT", "Fwd IAT", "Bwd IAT")
+
+
+def flow_times(flows):
+    """
+    Start and end time of every flow
+
+    Returns:
+        Tuple of (start, end) datetime Series; NaT where the timestamp can't be parsed
+    """
+    start = pd.to_datetime(flows["Timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    duration = pd.to_timedelta(flows["Flow Duration"].fillna(0), unit="us")
+    return start, start + duration
+
+
+def _column(df, label):
+    return df[label].to_numpy(dtype=np.float64, na_value=0) if label in df.columns else None
+
+
+def _weights(first, second, basis):
+    """Number of observations behind a statistic in each part"""
+    if basis is None:
+        w1 = np.ones(len(first))
+        return w1, np.ones(len(second))
+    if basis == "all":
+        w1 = _column(first, FWD) + _column(first, BWD)
+        w2 = _column(second, FWD) + _column(second, BWD)
+    else:
+        w1, w2 = _column(first, basis), _column(second, basis)
+    return w1, w2
+
+
+def merge_flow_parts(first, second):
+    """
+    Merge two aligned frames of partial flows (row i of second continues row i of first)
+
+    Counts and totals are added, min/max are combined, means are weighted by the
+    packet counts behind them and standard deviations are pooled. Identity
+    columns and initial window sizes come from the first part. The gap between
+    the two parts is not visible to either, so IAT statistics are approximate.
+
+    Returns:
+        DataFrame shaped like first with the merged flows
+    """
+    merged = first.copy()
+    columns = set(first.columns)
+
+    for label in SUM_FEATURES:
+        if label in columns:
+            merged[label] = _column(first, label) + _column(second, label)
+
+    for label, basis in MAX_FEATURES.items():
+        if label in columns:
+            merged[label] = np.maximum(_column(first, label), _column(second, label))
+
+    for label, basis in MIN_FEATURES.items():
+        if label in columns:
+            w1, w2 = _weights(first, second, basis)
+            v1, v2 = _column(first, label), _column(second, label)
+            # A direction without packets reports 0, which is not a real minimum
+            merged[label] = np.where((w1 > 0) & (w2 > 0), np.minimum(v1, v2),
+                                     np.where(w2 > 0, v2, v1))
+
+    for label, mean_label in STD_FEATURES.items():
+        if label not in columns or mean_label not in columns:
+            continue
+        basis = MEAN_FEATURES[mean_label]
+        w1, w2 = _weights(first, second, basis)
+        if label.startswith(IAT_FEATURES):
+            # n packets give n - 1 inter-arrival times
+            w1, w2 = np.maximum(w1 - 1, 0), np.maximum(w2 - 1, 0)
+        m1, m2 = _column(first, mean_label), _column(second, mean_label)
+        s1, s2 = _column(first, label), _column(second, label)
+        n = w1 + w2
+        mean = np.divide(w1 * m1 + w2 * m2, n, out=m1.copy(), where=n > 0)
+        squares = (np.maximum(w1 - 1, 0) * s1 ** 2 + w1 * m1 ** 2 +
+                   np.maximum(w2 - 1, 0) * s2 ** 2 + w2 * m2 ** 2)
+        variance = np.divide(squares - n * mean ** 2, n - 1, out=np.zeros(len(n)), where=n > 1)
+        merged[label] = np.sqrt(np.maximum(variance, 0))
+        if label == "Packet Length Std" and "Packet Length Variance" in columns:
+            merged["Packet Length Variance"] = np.maximum(variance, 0)
+
+    for label, basis in MEAN_FEATURES.items():
+        if label in columns:
+            w1, w2 = _weights(first, second, basis)
+            if label.startswith(IAT_FEATURES):
+                w1, w2 = np.maximum(w1 - 1, 0), np.maximum(w2 - 1, 0)
+            v1, v2 = _column(first, label), _column(second, label)
+            n = w1 + w2
+            merged[label] = np.divide(w1 * v1 + w2 * v2, n, out=v1.copy(), where=n > 0)
+
+    # Duration runs from the first part's start to the second part's end
+    start1, end1 = flow_times(first)
+    start2, end2 = flow_times(second)
+    span = ((end2 - start1).dt.total_seconds() * 1e6).to_numpy(dtype=np.float64, na_value=0)
+    duration = np.maximum(_column(first, "Flow Duration") + _column(second, "Flow Duration"), span)
+    merged["Flow Duration"] = duration
+
+    seconds = duration / 1e6
+    fwd, bwd = _column(merged, FWD), _column(merged, BWD)
+    total_bytes = _column(merged, "Total Length of Fwd Packets") + _column(merged, "Total Length of Bwd Packets")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # CICFlowMeter reports rates of zero-length flows as Infinity/NaN
+        rates = {
+            "Flow Bytes/s": total_bytes / seconds,
+            "Flow Packets/s": (fwd + bwd) / seconds,
+            "Fwd Packets/s": fwd / seconds,
+            "Bwd Packets/s": bwd / seconds
+        }
+    for label, rate in rates.items():
+        if label in columns:
+            merged[label] = np.where(seconds > 0, rate, np.nan)
+    if "Down/Up Ratio" in columns:
+        merged["Down/Up Ratio"] = np.divide(bwd, fwd, out=np.zeros(len(fwd)), where=fwd > 0)
+
+    return merged
+
+
+class FlowStitcher:
+    """Holds flows open at a chunk boundary and merges them with their continuation"""
+
+    def __init__(self, gap=2, max_holds=6):
+        """
+        Args:
+            gap: Seconds before the end of a chunk (and after the start of the next)
+                 within which a flow counts as crossing the boundary
+            max_holds: Chunks a flow can be held back before it is scored anyway
+        """
+        self.gap = pd.Timedelta(seconds=gap)
+        self.max_holds = max_holds
+        self.pending = None
+        self.holds = None
+        self.held_at = None  # time.monotonic() when the pending flows were held back
+
+    def stitch(self, flows):
+        """
+        Merge held flows into a new chunk and hold back the chunk's open flows
+
+        Held flows the chunk doesn't continue are released, never held again.
+        A chunk without flows (an idle link, or a failed conversion) releases
+        all of them, so it doesn't count towards max_holds.
+
+        Args:
+            flows: Raw flow DataFrame of one chunk (from read_flow_csv), or None
+
+        Returns:
+            DataFrame of flows ready to be scored
+        """
+        if flows is None or len(flows) == 0:
+            return self.flush()
+        flows = flows.reset_index(drop=True)
+        holds = np.zeros(len(flows), dtype=np.int64)
+
+        released = None
+        if self.pending is not None and len(self.pending) > 0:
+            flows, holds, released = self.merge_pending(flows, holds)
+
+        start, end = flow_times(flows)
+        if not end.isna().all():
+            open_flows = (end >= end.max() - self.gap).to_numpy() & (holds < self.max_holds)
+            self.pending = flows[open_flows].reset_index(drop=True)
+            self.holds = holds[open_flows] + 1
+            self.held_at = time.monotonic()
+            flows = flows[~open_flows]
+
+        if released is not None and len(released) > 0:
+            flows = pd.concat([flows, released])
+        return flows.reset_index(drop=True)
+
+    def expired(self, age):
+        """True if flows have been held back for more than age seconds"""
+        return self.pending is not None and len(self.pending) > 0 and time.monotonic() - self.held_at > age
+
+    def merge_pending(self, flows, holds):
+        """
+        Replace continued flows with their merged version
+
+        Returns:
+            Tuple of (flows, holds, held flows the chunk doesn't continue)
+        """
+        pending, pending_holds = self.pending, self.holds
+        self.pending, self.holds = None, None
+
+        start, _ = flow_times(flows)
+        candidates = flows[(start <= start.min() + self.gap).to_numpy()]
+        candidates = candidates.assign(_start=start).sort_values("_start")
+        candidates = candidates.drop_duplicates(FLOW_KEY)
+
+        matches = pending.reset_index().merge(
+            candidates[FLOW_KEY].reset_index(), on=FLOW_KEY, suffixes=("_pending", "_chunk")
+        ).drop_duplicates("index_chunk")
+
+        flows = flows.copy()
+        if len(matches) > 0:
+            first = pending.loc[matches["index_pending"].to_numpy()].reset_index(drop=True)
+            second = flows.loc[matches["index_chunk"].to_numpy()].reset_index(drop=True)
+            merged = merge_flow_parts(first, second)
+            merged.index = matches["index_chunk"].to_numpy()
+            flows.loc[merged.index, merged.columns] = merged
+            holds[merged.index] = pending_holds[matches["index_pending"].to_numpy()]
+
+        released = np.ones(len(pending), dtype=bool)
+        released[matches["index_pending"].to_numpy()] = False
+        return flows, holds, pending[released]
+
+    def flush(self):
+        """Return (and forget) the flows still being held back"""
+        pending = self.pending if self.pending is not None else pd.DataFrame()
+        self.pending, self.holds, self.held_at = None, None, None
+        return pending
+
+
+def test_stitcher(chunk_seconds=5, gap=2):
+    """
+    Put two chunks and then an empty one through stitch() and check that every
+    flow is scored once, with the flow crossing the first boundary merged
+
+    Returns:
+        True if the check passed
+    """
+    from proccessing_captured_data import MAIN_LABELS
+
+    base = pd.Timestamp("2026-10-18 12:00:00")
+
+    def flows(*rows):
+        # (flow id, start second, duration seconds, forward packets); other columns 0
+        return pd.DataFrame({
+            "Flow ID": [row[0] for row in rows],
+            "Source IP": "10.0.0.1",
+            "Timestamp": [(base + pd.Timedelta(seconds=row[1])).strftime(TIMESTAMP_FORMAT) for row in rows],
+            "Flow Duration": [row[2] * 1e6 for row in rows],
+            FWD: [float(row[3]) for row in rows]
+        }).reindex(columns=MAIN_LABELS, fill_value=0.0)
+
+    stitcher = FlowStitcher(gap=gap)
+    scored = [
+        # a ends early; b and the short c run up to the first boundary
+        stitcher.stitch(flows(("a", 0, 1, 2), ("b", 1, 4, 3), ("c", 3, 1.5, 1))),
+        # b continues; c doesn't and is released; d runs up to the second boundary
+        stitcher.stitch(flows(("b", chunk_seconds, 1, 4), ("e", chunk_seconds, 0.5, 1),
+                              ("d", chunk_seconds + 2, 3, 5))),
+        # nothing captured: everything still held back is scored now
+        stitcher.stitch(None)
+    ]
+    result = pd.concat(scored, ignore_index=True)
+    counts = result.groupby("Flow ID")[FWD].sum().to_dict()
+    expected = {"a": 2, "b": 7, "c": 1, "d": 5, "e": 1}
+
+    ok = sorted(result["Flow ID"]) == sorted(expected) and counts == expected and len(scored[2]) > 0
+    print(f"{'✓' if ok else '✗'} Stitched flows per chunk: {[len(part) for part in scored]}, "
+          f"forward packets {counts}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_stitcher() else 1)
@@ -0,0 +1,128 @@
+"""
+Legacy Model Cache - Fits the classifiers of the ML_*.py functions once
+main.py calls every ML_* function for each captured window, and each of them
+used to read its training CSV and fit its classifier again. Fitted classifiers
+are now kept for the life of the process and pickled under trained_models/legacy/,
+keyed by the hash of the CSV and the classifier setup, so later windows and
+later runs only pay for inference. Their prediction plots are drawn by a
+plot_renderer.PlotRenderer process instead of matplotlib in the window loop.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from plot_renderer import PlotRenderer
+
+LEGACY_MODEL_DIR = os.path.join("trained_models", "legacy")
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IDS", "static")
+
+_classifiers = {}
+_lock = threading.Lock()
+_renderer = None
+_counts = {}  # attack type -> (normal, anomaly) of the last window
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fit(dataset, feature_list, estimator, random_state):
+    """Same preparation and split the ML_* functions used to run for every window"""
+    df = pd.read_csv(dataset, usecols=feature_list + ["Label"])
+    df = df.fillna(0)
+
+    # Normal traffic is labelled 1, attacks 0
+    y = (df["Label"] == "BENIGN").astype(int)
+    X = df[feature_list]
+
+    X_train, X_test, Y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=random_state)
+
+    clf = clone(estimator)
+    clf.fit(X_train, Y_train)
+    return clf
+
+
+def cached_classifier(dataset, feature_list, estimator, random_state):
+    """
+    Fitted classifier for a legacy ML_* function, trained at most once
+
+    Args:
+        dataset: Training CSV with the features and a Label column
+        feature_list: Feature columns (without Label)
+        estimator: Unfitted sklearn estimator; a clone of it is fitted
+        random_state: Seed of the 80/20 train/test split
+
+    Returns:
+        Fitted classifier
+    """
+    key = (dataset, tuple(feature_list), repr(estimator), random_state)
+    with _lock:
+        if key in _classifiers:
+            return _classifiers[key]
+
+        setup = repr(key[1:]) + sklearn.__version__
+        name = hashlib.sha256((_file_hash(dataset) + setup).encode()).hexdigest()[:24]
+        stem = os.path.splitext(os.path.basename(dataset))[0].replace(" ", "_")
+        path = os.path.join(LEGACY_MODEL_DIR, f"{stem}-{name}.pkl")
+
+        clf = None
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    clf = pickle.load(f)
+            except Exception as e:
+                print(f"[Models] Could not load {path}, refitting: {e}")
+
+        if clf is None:
+            clf = _fit(dataset, list(feature_list), estimator, random_state)
+            os.makedirs(LEGACY_MODEL_DIR, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump(clf, f)
+            os.replace(path + ".tmp", path)
+
+        _classifiers[key] = clf
+        return clf
+
+
+def _plot_renderer():
+    global _renderer
+    with _lock:
+        if _renderer is None:
+            _renderer = PlotRenderer(STATIC_DIR)
+        return _renderer
+
+
+def plot_predictions(attack_type, predict, filename):
+    """
+    Queue the normal/anomaly bar plot of a legacy ML_* function
+
+    Args:
+        attack_type: Name shown in the plot title
+        predict: Predictions of the window (1 normal, 0 anomaly)
+        filename: PNG written in IDS/static (the names the legacy dashboard uses)
+    """
+    counts = (np.count_nonzero(predict == 1), np.count_nonzero(predict == 0))
+    _counts[attack_type] = counts
+    _plot_renderer().submit(attack_type, *counts, filename)
+
+
+def plot_most_severe(attack_type, filename="Attack_pic.png"):
+    """Draw an attack's latest plot again as the dashboard's headline picture"""
+    if attack_type in _counts:
+        _plot_renderer().submit(attack_type, *_counts[attack_type], filename)
+
+
+def close_plots():
+    """Draw what is queued and stop the render process"""
+    if _renderer is not None:
+        _renderer.close()
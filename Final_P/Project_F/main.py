@@ -16,6 +16,7 @@ from ML_PortScan import ML_PortScan
 
 from ML_SSH import ML_SSH
 from ML_Web import ML_Web
+from legacy_models import STATIC_DIR, close_plots, plot_most_severe
 import time
 from datetime import datetime
 def main():
@@ -69,16 +70,12 @@ def ML(captured_traffic):
     result_list = []
     fin_severe_max = ''
 
+    # Classifiers are fitted once (legacy_models.py), so each call is inference only
     result_list.append(ML_Bot(captured_traffic))
-    time.sleep(1)
     result_list.append(ML_SSH(captured_traffic))
-    time.sleep(1)
     # result_list.append(ML_Web(captured_traffic))
-    # time.sleep(2)
     result_list.append(ML_FTP(captured_traffic))
-    time.sleep(1)
     result_list.append(ML_DS_GE(captured_traffic))
-    time.sleep(1)
     result_list.append(ML_PortScan(captured_traffic))
     most_severe_attack = {} # this dictionary holds each attack with its predicted anomaly infection percentage
     for i in result_list:
@@ -99,16 +96,21 @@ def ML(captured_traffic):
                     filedata = filedata.replace("SOURCEE_IPP",f"{i[1]}") # add the Source-IP of the anomaly-traffic.
                     filedata = filedata.replace("PERCENTAGEE",f"{i[-1]}%") # add the percentage of the anomaly traffic.
 
-                    file_out = open("/root/Desktop/Final_P/IDS/static/Attack_Details.txt",'w')
+                    file_out = open(os.path.join(STATIC_DIR, "Attack_Details.txt"),'w')
                     file_out.write(filedata)
 
                     file_in.close()
                     file_out.close()
                     print(fin_severe_max)
                     # Set the figure of the most predicted severe anomaly traffic
-                    os.system(f"cp '/root/Desktop/Final_P/IDS/static/{fin_severe_max}.png' /root/Desktop/Final_P/IDS/static/Attack_pic.png")
+                    plot_most_severe(fin_severe_max)
 
                 print(f"Most in {fin_severe_max} with {most_severe_attack[fin_severe_max]}")
     
     
-main()
+if __name__ == "__main__":
+    # The plots are drawn in a spawned process, which imports this module again
+    try:
+        main()
+    finally:
+        close_plots()
@@ -3,14 +3,24 @@ Improved Main Application with Threading and Queue Architecture
 This replaces the blocking single-threaded design with a producer-consumer pattern
 """
 
+import io
 import os
 import queue
+import shutil
+import tempfile
 import threading
 import time
 import subprocess
+import sys
 from datetime import datetime
-from proccessing_captured_data import processing
+from proccessing_captured_data import (columnar_processing, read_flow_csv, clean_flow_frame,
+                                       ChunkedFlows, count_lines, projected_labels)
+from flow_stitcher import FlowStitcher
+from pcap_sizes import capture_sizes
 from ml_predictor import MLPredictor
+from model_reloader import ModelReloader
+from plot_renderer import PlotRenderer
+from capture_lanes import WindowMerger, build_lanes, interface_rx_bytes
 from database_logger import init_database_logger, get_database_logger
 import pandas as pd
 
@@ -20,26 +30,84 @@ CAPTURE_DURATION = 60  # seconds
 ALERT_THRESHOLD = 40  # percentage
 REPORT_THRESHOLD = 10  # percentage
 STATIC_DIR = "../IDS/static"
+RENDER_PNG_PLOTS = True  # Also draw PNGs; the dashboard draws from prediction_counts.json either way
 REPORTS_DIR = "Reports"
+MODEL_WORKERS = os.cpu_count() or 1  # Models evaluated concurrently per window
+MODEL_EXECUTOR = "thread"  # "thread", "process" or "mixed"
+USE_COMPILED_MODELS = True  # Load models exported by compiled_models.py when present
+MODEL_RELOAD = True  # Swap in retrained models without restarting
+MODEL_RELOAD_INTERVAL = 30  # seconds between checks of trained_models/
+
+# Flow handoff: hand CICFlowMeter output to processing as an in-memory DataFrame
+FLOW_STREAMING = True
+FLOW_SPOOL_DIR = "/dev/shm/ids_flows" if os.path.isdir("/dev/shm") else "flow_data"  # RAM-backed when possible
+FLOW_EXPORTER_COMMAND = None  # e.g. ["flow-exporter", "{pcap}"] for an exporter writing CSV to stdout
+
+# Windows with more flows than this (e.g. during a DoS) are cleaned and scored
+# in chunks of this many rows, bounding memory; 0 processes every window whole
+CHUNK_ROWS = 200000
+# Only extract, parse and clean the columns the loaded models read (plus Source/Destination IP);
+# anomaly reports then carry just those columns. False keeps every flow column
+PROJECT_COLUMNS = True
+
+# Micro-batch mode: one dumpcap ring buffer, every chunk is scored as soon as it closes
+MICRO_BATCH = False
+CHUNK_DURATION = 5  # seconds per ring buffer file
+RING_FILES = 12  # dumpcap keeps at most this many chunks on disk
+STITCH_GAP = 2  # seconds; flows this close to a chunk boundary are stitched to the next chunk
+RING_DIR = "Network_traffic"  # ring buffer files are named ring_<lane>_<sequence>_<timestamp>.pcap
+
+# Sharded capture: one dumpcap per lane, each with its own conversion/processing
+# threads; lanes are merged per window before prediction. Empty: one lane on NETWORK_INTERFACE
+CAPTURE_LANES = []  # (interface, BPF filter or None), e.g. [("eth1", None), ("eth2", None)]
+LANE_MERGE_TIMEOUT = 60  # seconds a window waits for a lagging lane
+
+# Capture pre-filtering: BPF applied to every lane, e.g. "not (host 10.0.0.20 and tcp port 873)"
+# to skip known-benign bulk transfers, and bytes kept per packet (0 = whole packet).
+# Keep the snaplen at 0 with CICFlowMeter, which is not verified on truncated packets
+CAPTURE_FILTER = None
+CAPTURE_SNAPLEN = 0
+
+# config.py lives in Final_P/, one level up
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+try:
+    from config import Config
+    MODEL_WORKERS = Config.MODEL_WORKERS
+    MODEL_EXECUTOR = Config.MODEL_EXECUTOR
+    MICRO_BATCH = Config.MICRO_BATCH
+    CHUNK_DURATION = Config.CHUNK_DURATION
+    RING_FILES = Config.RING_FILES
+    STITCH_GAP = Config.STITCH_GAP
+    CAPTURE_LANES = Config.CAPTURE_LANES
+    LANE_MERGE_TIMEOUT = Config.LANE_MERGE_TIMEOUT
+    CAPTURE_FILTER = Config.CAPTURE_FILTER
+    CAPTURE_SNAPLEN = Config.CAPTURE_SNAPLEN
+except (ImportError, AttributeError, ValueError) as e:
+    print(f"⚠ Could not load config.py ({e}), using the defaults in main_improved.py")
 
 # Create necessary directories
 os.makedirs("Network_traffic", exist_ok=True)
 os.makedirs("flow_data", exist_ok=True)
+os.makedirs(FLOW_SPOOL_DIR, exist_ok=True)
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(STATIC_DIR, exist_ok=True)
 
-# Thread-safe queues
-capture_queue = queue.Queue(maxsize=5)  # Limit backlog
-processing_queue = queue.Queue(maxsize=5)
+# Thread-safe queues; every lane has its own capture and processing queue (limit backlog)
+lanes = build_lanes(CAPTURE_LANES, NETWORK_INTERFACE, queue_max=5)
 prediction_queue = queue.Queue(maxsize=10)
+window_merger = WindowMerger(lanes, prediction_queue, timeout=LANE_MERGE_TIMEOUT)
 
-# Global ML Predictor (loaded once)
+# Global ML Predictor (loaded once, replaced by model_reloader after retraining)
 ml_predictor = None
+model_reloader = None
 predictor_lock = threading.Lock()
 
 # Global Database Logger
 db_logger = None
 
+# Draws the dashboard plots in its own process (started by main())
+plot_renderer = None
+
 # Statistics
 stats = {
     "captures": 0,
@@ -50,144 +118,450 @@ stats = {
 stats_lock = threading.Lock()
 
 
+def capture_filter(lane):
+    """CAPTURE_FILTER combined with the lane's own filter, or None"""
+    filters = [f for f in (CAPTURE_FILTER, lane.capture_filter) if f]
+    if len(filters) > 1:
+        return " and ".join(f"({f})" for f in filters)
+    return filters[0] if filters else None
+
+
+def capture_snaplen():
+    """Snaplen passed to dumpcap, or 0 for whole packets"""
+    return CAPTURE_SNAPLEN
+
+
+def dumpcap_command(lane, *options):
+    """dumpcap invocation for a lane; its BPF filter selects the lane's share of the traffic"""
+    command = ["dumpcap", "-q", "-i", lane.interface]
+    if capture_filter(lane):
+        command += ["-f", capture_filter(lane)]
+    if capture_snaplen():
+        command += ["-s", str(capture_snaplen())]
+    return command + list(options)
+
+
+def report_savings(lane, window, pcap_file, rx_bytes):
+    """
+    Log what the capture filter and snaplen saved for a lane's window
+    
+    Args:
+        rx_bytes: Bytes the interface received during the window, or None if unknown
+    """
+    try:
+        sizes = capture_sizes(pcap_file)
+    except Exception as e:
+        print(f"[Capture] Could not measure {os.path.basename(pcap_file)}: {e}")
+        return
+    snaplen_saved = sizes["wire_bytes"] - sizes["captured_bytes"]
+    
+    # Only attributable when the lane has the interface to itself
+    filter_saved = 0
+    if rx_bytes is not None and capture_filter(lane) and not lane.shares_interface:
+        filter_saved = max(rx_bytes - sizes["wire_bytes"], 0)
+    
+    lane.record(wire_bytes=sizes["wire_bytes"], snaplen_saved=snaplen_saved, filter_saved=filter_saved)
+    
+    seen = sizes["wire_bytes"] + filter_saved
+    if seen:
+        print(f"[Capture] Window {window} on {lane.name}: {seen / 1e6:.1f} MB seen, "
+              f"filter skipped {filter_saved / 1e6:.1f} MB, snaplen trimmed {snaplen_saved / 1e6:.1f} MB, "
+              f"{sizes['captured_bytes'] / 1e6:.1f} MB kept ({1 - sizes['captured_bytes'] / seen:.0%} saved)")
+
+
 def capture_worker():
-    """Thread 1: Continuously capture network traffic"""
+    """Thread 1: Continuously capture network traffic, one dumpcap per lane in lockstep"""
     global stats
     
-    print(f"[Capture] Starting capture worker on interface {NETWORK_INTERFACE}")
+    print(f"[Capture] Starting capture worker on {', '.join(map(repr, lanes))}")
+    window = 0
     
     while True:
         try:
+            window += 1
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"captured_{timestamp}.pcap"
-            filepath = os.path.join("Network_traffic", filename)
             
             print(f"[Capture] Starting {CAPTURE_DURATION}s capture...")
             
             # Use subprocess instead of os.system for better control
-            result = subprocess.run(
-                ["dumpcap", "-i", NETWORK_INTERFACE, "-a", f"duration:{CAPTURE_DURATION}", 
-                 "-w", filepath],
-                capture_output=True,
+            rx_before = {lane.interface: interface_rx_bytes(lane.interface) for lane in lanes}
+            captures = []
+            for lane in lanes:
+                filename = f"captured_{lane.file_tag}_{timestamp}.pcap"
+                filepath = os.path.join("Network_traffic", filename)
+                process = subprocess.Popen(
+                    dumpcap_command(lane, "-a", f"duration:{CAPTURE_DURATION}", "-w", filepath),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True
+                )
+                captures.append((lane, filepath, process))
+            
+            failed = 0
+            errors = {lane.name: process.communicate()[1] for lane, _, process in captures}
+            rx_after = {interface: interface_rx_bytes(interface) for interface in rx_before}
+            
+            for lane, filepath, process in captures:
+                if process.returncode == 0 and os.path.exists(filepath):
+                    print(f"[Capture] Completed: {os.path.basename(filepath)}")
+                    lane.record(bytes=os.path.getsize(filepath))
+                    
+                    before, after = rx_before[lane.interface], rx_after[lane.interface]
+                    rx_bytes = after - before if before is not None and after is not None else None
+                    
+                    # Add to the lane's queue (blocks if queue is full)
+                    lane.capture_queue.put((window, filepath, rx_bytes))
+                    
+                    with stats_lock:
+                        stats["captures"] += 1
+                else:
+                    print(f"[Capture] Error on {lane.name}: {errors[lane.name]}")
+                    lane.record(errors=1)
+                    window_merger.add(window, lane, None)
+                    failed += 1
+            
+            if failed == len(captures):
+                time.sleep(5)  # Wait before retry
+                
+        except Exception as e:
+            print(f"[Capture] Exception: {e}")
+            time.sleep(5)
+
+
+def ring_prefix(lane):
+    return os.path.join(RING_DIR, f"ring_{lane.file_tag}.pcap")
+
+
+def ring_chunks(lane):
+    """Ring buffer files written by a lane's dumpcap, oldest first"""
+    stem = os.path.splitext(os.path.basename(ring_prefix(lane)))[0] + "_"
+    # dumpcap names the files ring_<lane>_<sequence>_<timestamp>.pcap
+    return sorted(os.path.join(RING_DIR, f) for f in os.listdir(RING_DIR)
+                  if f.startswith(stem) and f.endswith(".pcap"))
+
+
+def chunk_window(chunk):
+    """
+    Window id of a ring buffer file: its start time rounded to CHUNK_DURATION.
+    Unlike the sequence number, this stays in step across lanes when one lane's
+    dumpcap restarts and numbers its files from 1 again.
+    """
+    stamp = os.path.splitext(os.path.basename(chunk))[0].rsplit("_", 1)[-1]
+    started = time.mktime(time.strptime(stamp, "%Y%m%d%H%M%S"))
+    return int(round(started / CHUNK_DURATION) * CHUNK_DURATION)
+
+
+def ring_capture_worker(lane):
+    """Thread 1 (micro-batch mode): Capture a lane into a ring buffer and queue each closed chunk"""
+    global stats
+    
+    print(f"[Capture] Starting ring buffer capture on {lane!r} "
+          f"({CHUNK_DURATION}s chunks, {RING_FILES} files)")
+    
+    while True:
+        try:
+            # Chunks left over from a previous run can't be stitched, drop them
+            for chunk in ring_chunks(lane):
+                os.remove(chunk)
+            
+            process = subprocess.Popen(
+                dumpcap_command(lane, "-b", f"duration:{CHUNK_DURATION}", "-b", f"files:{RING_FILES}",
+                                "-w", ring_prefix(lane)),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True
             )
+            queued = set()
+            rx_last = interface_rx_bytes(lane.interface)
             
-            if result.returncode == 0 and os.path.exists(filepath):
-                print(f"[Capture] Completed: {filename}")
+            while True:
+                running = process.poll() is None
+                chunks = ring_chunks(lane)
                 
-                # Add to queue (blocks if queue is full)
-                capture_queue.put(filepath)
-                
-                with stats_lock:
-                    stats["captures"] += 1
-            else:
-                print(f"[Capture] Error: {result.stderr}")
-                time.sleep(5)  # Wait before retry
+                # dumpcap is still writing the newest chunk; the rest are closed
+                closed = chunks[:-1] if running else chunks
+                for chunk in closed:
+                    if chunk not in queued:
+                        # Received since the previous chunk closed (to the nearest poll)
+                        rx_now = interface_rx_bytes(lane.interface)
+                        rx_bytes = rx_now - rx_last if rx_now is not None and rx_last is not None else None
+                        rx_last = rx_now
+                        
+                        lane.record(bytes=os.path.getsize(chunk))
+                        lane.capture_queue.put((chunk_window(chunk), chunk, rx_bytes))
+                        queued.add(chunk)
+                        
+                        with stats_lock:
+                            stats["captures"] += 1
                 
+                queued &= set(chunks)
+                if not running:
+                    break
+                time.sleep(0.5)
+            
+            print(f"[Capture] Error on {lane.name}: dumpcap exited with code {process.returncode}: "
+                  f"{process.stderr.read()}")
+            lane.record(errors=1)
+            time.sleep(5)  # Wait before retry
+            
         except Exception as e:
-            print(f"[Capture] Exception: {e}")
+            print(f"[Capture] Exception on {lane.name}: {e}")
             time.sleep(5)
 
 
-def conversion_worker():
-    """Thread 2: Convert PCAP files to CSV using CICFlowMeter"""
+def required_columns():
+    """
+    Columns preprocessing has to materialize for the current models, or None
+    for every column (projection disabled, or the models are not loaded yet)
+    """
+    if not PROJECT_COLUMNS:
+        return None
+    if model_reloader is not None:
+        return model_reloader.required_columns()
+    if ml_predictor is not None:
+        return ml_predictor.required_columns()
+    return None
+
+
+def convert_in_memory(pcap_file, columns=None):
+    """
+    Convert a PCAP file into a raw flow DataFrame without going through flow_data/
+    
+    With FLOW_EXPORTER_COMMAND set, the exporter's stdout is parsed directly.
+    Otherwise CICFlowMeter writes into a private directory under FLOW_SPOOL_DIR
+    (tmpfs on Linux), which is read once and removed straight away.
+    
+    Args:
+        pcap_file: Path to the captured PCAP file
+        columns: Flow columns to materialize (None: all of them)
+        
+    Returns:
+        DataFrame from read_flow_csv(), or None if conversion failed
+    """
+    if FLOW_EXPORTER_COMMAND:
+        command = [arg.replace("{pcap}", pcap_file) for arg in FLOW_EXPORTER_COMMAND]
+        try:
+            # run() kills the exporter if it hangs, so the lane's thread doesn't
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    timeout=300)
+        except subprocess.TimeoutExpired:
+            print("[Conversion] Error: exporter timed out after 300s")
+            return None
+        
+        if result.returncode != 0:
+            print(f"[Conversion] Error: exporter exited with code {result.returncode}")
+            return None
+        return read_flow_csv(io.BytesIO(result.stdout), usecols=columns)
+    
+    window_dir = tempfile.mkdtemp(prefix="window_", dir=FLOW_SPOOL_DIR)
+    try:
+        result = subprocess.run(
+            ["./cfm", pcap_file, window_dir + "/"],
+            capture_output=True,
+            text=True,
+            timeout=300
+        )
+        
+        if result.returncode != 0:
+            print(f"[Conversion] Error: {result.stderr}")
+            return None
+        
+        flow_files = os.listdir(window_dir)
+        if not flow_files:
+            print("[Conversion] Warning: No flow file generated")
+            return None
+        
+        return read_flow_csv(os.path.join(window_dir, flow_files[0]), usecols=columns)
+    finally:
+        shutil.rmtree(window_dir, ignore_errors=True)
+
+
+def conversion_worker(lane):
+    """Thread 2 (one per lane): Convert PCAP files to CSV using CICFlowMeter"""
     global stats
     
-    print("[Conversion] Starting conversion worker")
+    print(f"[Conversion] Starting conversion worker for {lane.name}")
+    
+    # Flows crossing a chunk boundary only need stitching with short micro-batch chunks
+    stitcher = FlowStitcher(gap=STITCH_GAP) if MICRO_BATCH else None
+    flow_dir = os.path.join("flow_data", lane.file_tag)  # cfm output of this lane only
+    os.makedirs(flow_dir, exist_ok=True)
     
     while True:
+        window = None
         try:
             # Get captured file from queue (blocks until available)
-            pcap_file = capture_queue.get()
+            try:
+                window, pcap_file, rx_bytes = lane.capture_queue.get(
+                    timeout=CHUNK_DURATION if stitcher is not None else None)
+            except queue.Empty:
+                # No chunk for a while (e.g. dumpcap restarting): score the held flows on their own
+                if stitcher.expired(STITCH_GAP + CHUNK_DURATION):
+                    flows = stitcher.flush()
+                    print(f"[Conversion] No chunk on {lane.name}, releasing {len(flows)} held flows")
+                    lane.processing_queue.put((None, flows))
+                continue
+            start_time = time.time()
             
             print(f"[Conversion] Processing {os.path.basename(pcap_file)}...")
             
+            if FLOW_STREAMING:
+                # The stitcher matches flows on every column, so it gets them all
+                report_savings(lane, window, pcap_file, rx_bytes)
+                flows = convert_in_memory(pcap_file, required_columns() if stitcher is None else None)
+                
+                if stitcher is not None:
+                    # An empty or failed chunk releases the flows held at the last boundary
+                    flows = stitcher.stitch(flows)
+                
+                if flows is not None and len(flows) > 0:
+                    print(f"[Conversion] Completed: {len(flows)} flows in memory")
+                else:
+                    flows = None
+                lane.record(busy_seconds=time.time() - start_time)
+                lane.processing_queue.put((window, flows))
+                
+                try:
+                    os.remove(pcap_file)
+                except:
+                    pass
+                
+                lane.capture_queue.task_done()
+                continue
+            
+            report_savings(lane, window, pcap_file, rx_bytes)
+            
             # Convert PCAP to CSV using CICFlowMeter
             result = subprocess.run(
-                ["./cfm", pcap_file, "flow_data/"],
+                ["./cfm", pcap_file, flow_dir + "/"],
                 capture_output=True,
                 text=True,
                 timeout=300  # 5 minute timeout
             )
             
+            latest_flow = None
             if result.returncode == 0:
                 # Remove header line from CSV
-                flow_files = os.listdir("flow_data")
+                flow_files = os.listdir(flow_dir)
                 if flow_files:
-                    latest_flow = max([os.path.join("flow_data", f) for f in flow_files],
+                    latest_flow = max([os.path.join(flow_dir, f) for f in flow_files],
                                      key=os.path.getctime)
                     
                     # Remove first line
                     subprocess.run(["sed", "-i", "1d", latest_flow])
                     
                     print(f"[Conversion] Completed: {os.path.basename(latest_flow)}")
-                    
-                    # Add to processing queue
-                    processing_queue.put(latest_flow)
                 else:
                     print("[Conversion] Warning: No flow file generated")
             else:
                 print(f"[Conversion] Error: {result.stderr}")
             
+            # Add to processing queue (None still tells the merger the lane is done)
+            lane.record(busy_seconds=time.time() - start_time)
+            lane.processing_queue.put((window, latest_flow))
+            
             # Clean up PCAP file
             try:
                 os.remove(pcap_file)
             except:
                 pass
             
-            capture_queue.task_done()
+            lane.capture_queue.task_done()
             
         except queue.Empty:
             time.sleep(1)
         except Exception as e:
-            print(f"[Conversion] Exception: {e}")
-            capture_queue.task_done()
+            print(f"[Conversion] Exception on {lane.name}: {e}")
+            if window is not None:
+                lane.processing_queue.put((window, None))
+            lane.capture_queue.task_done()
 
 
-def processing_worker():
-    """Thread 3: Process flow data and normalize features"""
+def processing_worker(lane):
+    """Thread 3 (one per lane): Process flow data and normalize features"""
     global stats
     
-    print("[Processing] Starting processing worker")
+    print(f"[Processing] Starting processing worker for {lane.name}")
     
     while True:
+        window = None
         try:
-            # Get flow file from queue
-            flow_file = processing_queue.get()
-            
-            print(f"[Processing] Processing {os.path.basename(flow_file)}...")
+            # Get flow file (or in-memory flows) from queue
+            window, flow_file = lane.processing_queue.get()
             start_time = time.time()
             
-            # Process the data
-            processed_data = processing(os.path.basename(flow_file))
+            # Process the data; string columns stay strings, the predictor encodes
+            # the ones its models use with codes that are stable across windows
+            columns = required_columns()
+            if flow_file is None:
+                processed_data = None
+            elif isinstance(flow_file, pd.DataFrame):
+                print(f"[Processing] Processing {len(flow_file)} in-memory flows...")
+                if CHUNK_ROWS and len(flow_file) > CHUNK_ROWS:
+                    processed_data = ChunkedFlows.from_source(flow_file, CHUNK_ROWS, label_encode=False,
+                                                              columns=columns)
+                else:
+                    if columns is not None:
+                        # Stitched flows arrive with every column
+                        labels = projected_labels(columns)
+                        flow_file = flow_file[[c for c in flow_file.columns if c in labels]]
+                    processed_data = clean_flow_frame(flow_file, label_encode=False)
+                flow_file = None
+            elif CHUNK_ROWS and count_lines(flow_file) > CHUNK_ROWS:
+                print(f"[Processing] Processing {os.path.basename(flow_file)} in chunks...")
+                # The file is read again chunk by chunk and removed once the window is scored
+                processed_data = ChunkedFlows.from_source(flow_file, CHUNK_ROWS, remove=True,
+                                                          label_encode=False, columns=columns)
+                flow_file = None
+                if len(processed_data) == 0:
+                    processed_data.close()
+                    processed_data = None
+            else:
+                print(f"[Processing] Processing {os.path.basename(flow_file)}...")
+                processed_data = columnar_processing(os.path.relpath(flow_file, "flow_data"),
+                                                     label_encode=False, columns=columns)
             
             elapsed = time.time() - start_time
-            print(f"[Processing] Completed in {elapsed:.1f}s")
-            
-            # Add to prediction queue
-            prediction_queue.put(processed_data)
+            if processed_data is not None:
+                print(f"[Processing] Completed in {elapsed:.1f}s")
+                lane.record(windows=1, flows=len(processed_data), busy_seconds=elapsed)
+                
+                with stats_lock:
+                    stats["processed"] += 1
             
-            with stats_lock:
-                stats["processed"] += 1
+            # Hand the lane's share of the window to the merger (queues it for prediction)
+            if window is not None:
+                window_merger.add(window, lane, processed_data)
+            elif processed_data is not None and len(processed_data) > 0:
+                # Held flows released between chunks belong to no window
+                prediction_queue.put(processed_data)
             
             # Clean up flow file
-            try:
-                os.remove(flow_file)
-            except:
-                pass
+            if flow_file is not None:
+                try:
+                    os.remove(flow_file)
+                except:
+                    pass
             
-            processing_queue.task_done()
+            lane.processing_queue.task_done()
             
         except queue.Empty:
             time.sleep(1)
         except Exception as e:
-            print(f"[Processing] Exception: {e}")
-            processing_queue.task_done()
+            print(f"[Processing] Exception on {lane.name}: {e}")
+            if window is not None:
+                window_merger.add(window, lane, None)
+            lane.processing_queue.task_done()
+
+
+def load_predictor():
+    return MLPredictor(workers=MODEL_WORKERS, executor=MODEL_EXECUTOR,
+                       compiled=USE_COMPILED_MODELS)
 
 
 def prediction_worker():
     """Thread 4: Run ML predictions in parallel"""
-    global stats, ml_predictor
+    global stats, ml_predictor, model_reloader
     
     print("[Prediction] Starting prediction worker")
     
@@ -195,25 +569,40 @@ def prediction_worker():
     with predictor_lock:
         if ml_predictor is None:
             print("[Prediction] Loading ML models...")
-            ml_predictor = MLPredictor()
-            print(f"[Prediction] Loaded {len(ml_predictor.models)} models")
+            ml_predictor = load_predictor()
+            print(f"[Prediction] Loaded {len(ml_predictor.models)} models ({ml_predictor.version})")
+            if MODEL_RELOAD:
+                model_reloader = ModelReloader(ml_predictor, load_predictor,
+                                               interval=MODEL_RELOAD_INTERVAL).start()
     
     while True:
+        traffic_data = None
         try:
             # Get processed data from queue
             traffic_data = prediction_queue.get()
             
-            print(f"[Prediction] Analyzing {len(traffic_data)} flows...")
-            start_time = time.time()
+            # Models are only swapped here, so one version scores the whole window
+            if model_reloader is not None:
+                ml_predictor = model_reloader.acquire()
+            predictor = ml_predictor
             
-            # Run all predictions (fast since models are pre-loaded)
-            results = ml_predictor.predict_all(traffic_data)
+            start_time = time.time()
+            if isinstance(traffic_data, ChunkedFlows):
+                print(f"[Prediction] Analyzing {len(traffic_data)} flows "
+                      f"in chunks of {traffic_data.chunk_rows}...")
+                results = predictor.predict_chunked(traffic_data)
+            else:
+                print(f"[Prediction] Analyzing {len(traffic_data)} flows...")
+                # Run all predictions (fast since models are pre-loaded)
+                results = predictor.predict_all(traffic_data)
             
             elapsed = time.time() - start_time
-            print(f"[Prediction] Completed {len(results)} predictions in {elapsed:.1f}s")
+            print(f"[Prediction] Completed {len(results)} predictions in {elapsed:.1f}s "
+                  f"with models {predictor.version}")
             
             # Process results
-            handle_prediction_results(results, traffic_data)
+            handle_prediction_results(results, traffic_data, predictor)
+            predictor.release(results)
             
             with stats_lock:
                 stats["predictions"] += 1
@@ -227,10 +616,13 @@ def prediction_worker():
             import traceback
             traceback.print_exc()
             prediction_queue.task_done()
+        finally:
+            if isinstance(traffic_data, ChunkedFlows):
+                traffic_data.close()
 
 
-def handle_prediction_results(results, traffic_data):
-    """Process and save prediction results"""
+def handle_prediction_results(results, traffic_data, predictor):
+    """Process and save prediction results of the window scored by predictor"""
     global stats, db_logger
     
     severe_attacks = {}
@@ -243,9 +635,12 @@ def handle_prediction_results(results, traffic_data):
         attack_type = result["attack_type"]
         percentage = result["anomaly_percentage"]
         
-        # Save visualization
-        if "predictions" in result:
-            ml_predictor.save_visualization(
+        # Save visualization (drawn by the render process, off this thread)
+        if plot_renderer is not None:
+            plot_renderer.submit(attack_type, result.get("normal_count", 0),
+                                 result.get("anomaly_count", 0))
+        elif "predictions" in result:
+            predictor.save_visualization(
                 attack_type, 
                 result["predictions"], 
                 STATIC_DIR
@@ -264,7 +659,7 @@ def handle_prediction_results(results, traffic_data):
         # Save detailed report if above threshold
         if percentage > REPORT_THRESHOLD:
             severe_attacks[attack_type] = percentage
-            ml_predictor.save_anomaly_report(result, REPORTS_DIR)
+            report_file = predictor.save_anomaly_report(result, REPORTS_DIR)
             print(f"[Alert] {attack_type}: {percentage}% anomalous traffic detected")
             
             # Log alert to database
@@ -275,7 +670,7 @@ def handle_prediction_results(results, traffic_data):
                     anomaly_percentage=percentage,
                     normal_count=result.get("normal_count", 0),
                     anomaly_count=result.get("anomaly_count", 0),
-                    report_file=None  # Could add the CSV filename here
+                    report_file=report_file
                 )
     
     # Generate main alert if any attack is above alert threshold
@@ -343,9 +738,27 @@ def stats_reporter():
             print(f"  Processed: {stats['processed']}")
             print(f"  Predictions: {stats['predictions']}")
             print(f"  Alerts: {stats['alerts']}")
-            print(f"  Queue sizes: Capture={capture_queue.qsize()}, "
-                  f"Processing={processing_queue.qsize()}, "
+            if model_reloader is not None:
+                models = model_reloader.summary()
+                print(f"  Models: {models['active']} (previous: {models['previous']}, "
+                      f"reloads={models['reloads']}, rejected={models['rejected']})")
+            elif ml_predictor is not None:
+                print(f"  Models: {ml_predictor.version}")
+            capture_backlog = sum(lane.capture_queue.qsize() for lane in lanes)
+            processing_backlog = sum(lane.processing_queue.qsize() for lane in lanes)
+            print(f"  Queue sizes: Capture={capture_backlog}, "
+                  f"Processing={processing_backlog}, "
                   f"Prediction={prediction_queue.qsize()}")
+            if len(lanes) > 1:
+                merged = window_merger.stats
+                print(f"  Windows merged: {merged['windows']} ({merged['partial']} partial)")
+            for lane in lanes:
+                summary = lane.summary()
+                print(f"  Lane {lane.name}: {summary['windows']} windows, {summary['flows']} flows, "
+                      f"{summary['captured_mbps']} Mbit/s captured, "
+                      f"{summary['flows_per_second']} flows/s converted, {summary['errors']} errors")
+                print(f"    Saved: filter {summary['filter_saved'] / 1e6:.1f} MB, "
+                      f"snaplen {summary['snaplen_saved'] / 1e6:.1f} MB")
             print(f"{'='*60}\n")
             
             # Log metrics to database
@@ -355,33 +768,56 @@ def stats_reporter():
                     processed=stats['processed'],
                     predictions=stats['predictions'],
                     alerts=stats['alerts'],
-                    capture_queue_size=capture_queue.qsize(),
-                    processing_queue_size=processing_queue.qsize(),
+                    capture_queue_size=capture_backlog,
+                    processing_queue_size=processing_backlog,
                     prediction_queue_size=prediction_queue.qsize()
                 )
 
 
 def main():
     """Main entry point - starts all worker threads"""
-    global db_logger
+    global db_logger, plot_renderer
     
     print("="*60)
     print("IDS System Starting - Multi-threaded Architecture")
     print("="*60)
-    print(f"Network Interface: {NETWORK_INTERFACE}")
-    print(f"Capture Duration: {CAPTURE_DURATION}s")
+    if len(lanes) > 1:
+        print(f"Capture Lanes: {', '.join(map(repr, lanes))}")
+    else:
+        print(f"Network Interface: {lanes[0].interface}")
+    if MICRO_BATCH:
+        print(f"Capture Mode: micro-batch ({CHUNK_DURATION}s chunks, {RING_FILES}-file ring)")
+    else:
+        print(f"Capture Duration: {CAPTURE_DURATION}s")
+    if CAPTURE_FILTER:
+        print(f"Capture Filter: {CAPTURE_FILTER}")
+    if capture_snaplen():
+        print(f"Snaplen: {capture_snaplen()} bytes")
+        if not FLOW_EXPORTER_COMMAND:
+            print("⚠ CICFlowMeter is not verified on truncated packets, set CAPTURE_SNAPLEN=0")
     print(f"Alert Threshold: {ALERT_THRESHOLD}%")
     print("="*60)
     print()
     
     # Initialize database logger
     db_logger = init_database_logger()
+    plot_renderer = PlotRenderer(STATIC_DIR, render_png=RENDER_PNG_PLOTS)
     
     # Create and start worker threads
-    threads = [
-        threading.Thread(target=capture_worker, name="Capture", daemon=True),
-        threading.Thread(target=conversion_worker, name="Conversion", daemon=True),
-        threading.Thread(target=processing_worker, name="Processing", daemon=True),
+    if MICRO_BATCH:
+        threads = [threading.Thread(target=ring_capture_worker, args=(lane,),
+                                    name=f"Capture-{lane.name}", daemon=True) for lane in lanes]
+    else:
+        threads = [threading.Thread(target=capture_worker, name="Capture", daemon=True)]
+    for lane in lanes:
+        threads += [
+            threading.Thread(target=conversion_worker, args=(lane,),
+                             name=f"Conversion-{lane.name}", daemon=True),
+            threading.Thread(target=processing_worker, args=(lane,),
+                             name=f"Processing-{lane.name}", daemon=True)
+        ]
+    threads += [
+        threading.Thread(target=window_merger.run, name="Merge", daemon=True),
         threading.Thread(target=prediction_worker, name="Prediction", daemon=True),
         threading.Thread(target=stats_reporter, name="Stats", daemon=True)
     ]
@@ -402,6 +838,12 @@ def main():
         with stats_lock:
             for key, value in stats.items():
                 print(f"  {key}: {value}")
+        
+        # Write out rows still queued for the database
+        if db_logger:
+            db_logger.close()
+        if plot_renderer:
+            plot_renderer.close()
 
 
 if __name__ == "__main__":
@@ -3,45 +3,197 @@ ML Predictor Module - Loads pre-trained models and performs predictions
 This replaces the individual ML_*.py files with a unified prediction system
 """
 
+import hashlib
 import pickle
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+import multiprocessing
 import os
+import sys
+import tempfile
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from multiprocessing import shared_memory
+from category_encoder import IDENTIFIER_COLUMNS, CategoryEncoder, refuse_identifiers
+from compiled_models import load_compiled_model
+from model_store import ModelStoreError, current_version, load_store
+from proccessing_captured_data import IDENTITY_FEATURES
+import report_store
+
+# Models evaluated in a process pool when executor="mixed"; their predict()
+# loops over estimators in Python and holds the GIL for most of the call
+PROCESS_BOUND_MODELS = ("AdaBoostClassifier",)
+
+# Model files by attack type
+MODEL_FILES = {
+    "Bot_Attack": "bot_model.pkl",
+    "SSH-Patator": "ssh_model.pkl",
+    "FTP-Patator": "ftp_model.pkl",
+    "DoS GoldenEye": "dos_goldeneye_model.pkl",
+    "DoS Hulk": "dos_hulk_model.pkl",
+    "DoS slowloris": "dos_slowloris_model.pkl",
+    "DoS Slowhttptest": "dos_slowhttptest_model.pkl",
+    "Port_Scan": "portscan_model.pkl",
+    "Web Attack": "web_model.pkl"
+}
+
+# Models available to process pool workers (set by _init_worker)
+_worker_models = {}
+
+
+def _predict_model(model, X):
+    """Run model.predict on a plain feature matrix"""
+    # Models were fitted on DataFrames; the column order is the same
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict(X)
+
+
+def _init_worker(models, store=None):
+    """
+    Process pool initializer: keep the models in the worker
+
+    With store=(models_dir, version), models only holds the ones that are not
+    in the store; the stored ones are memory-mapped from the same files as the
+    parent, so every worker shares their pages instead of unpickling a copy.
+    """
+    global _worker_models
+    _worker_models = dict(models)
+    if store is not None:
+        # Already verified by the parent
+        _, stored = load_store(*store, verify=False)
+        for attack_name, model_file in MODEL_FILES.items():
+            if attack_name not in _worker_models and model_file[:-len(".pkl")] in stored:
+                _worker_models[attack_name] = stored[model_file[:-len(".pkl")]]["model"]
+
+
+def _predict_shared(attack_type, shm_name, shape, columns):
+    """Process pool task: predict from a slice of a feature matrix held in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    X = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)[:, columns]
+    try:
+        return _predict_model(_worker_models[attack_type], X)
+    finally:
+        del X  # the segment can't be closed while a view of it exists
+        shm.close()
+
 
 class MLPredictor:
     """Unified ML prediction class that loads and uses pre-trained models"""
     
-    def __init__(self, models_dir="trained_models"):
+    def __init__(self, models_dir="trained_models", workers=1, executor="thread", compiled=False,
+                 store=True):
+        """
+        Args:
+            models_dir: Directory holding the pickled models
+            workers: Number of models evaluated concurrently (1 = sequential)
+            executor: "thread", "process" or "mixed" (AdaBoost in processes, trees in threads)
+            compiled: Prefer models exported by compiled_models.py over the pickles
+            store: Load the current version of the model store (model_store.py) when one
+                is published, falling back to the files above otherwise
+        """
         self.models_dir = models_dir
         self.models = {}
+        self.workers = workers
+        self.executor = executor
+        self.compiled = compiled
+        self.store = store
+        self.store_version = None  # model store version, None when loaded from files
+        self.version = None  # reported with every result: store version or files-<hash>
+        self._thread_pool = None
+        self._process_pool = None
+        self._report_stores = {}  # reports_dir -> ReportStore
         self.load_all_models()
+        self.encoder = self.load_encoder()
         
     def load_all_models(self):
         """Load all pre-trained models at startup"""
-        model_files = {
-            "Bot_Attack": "bot_model.pkl",
-            "SSH-Patator": "ssh_model.pkl",
-            "FTP-Patator": "ftp_model.pkl",
-            "DoS GoldenEye": "dos_goldeneye_model.pkl",
-            "DoS Hulk": "dos_hulk_model.pkl",
-            "DoS slowloris": "dos_slowloris_model.pkl",
-            "DoS Slowhttptest": "dos_slowhttptest_model.pkl",
-            "Port_Scan": "portscan_model.pkl",
-            "Web Attack": "web_model.pkl"
-        }
+        if self.store and current_version(self.models_dir) and self.load_from_store():
+            return
         
-        for attack_name, model_file in model_files.items():
+        loaded = []
+        for attack_name, model_file in MODEL_FILES.items():
             model_path = os.path.join(self.models_dir, model_file)
+            compiled_path = model_path[:-len(".pkl")] + ".npz"
             try:
+                if self.compiled and self.is_current(compiled_path, model_path):
+                    self.models[attack_name] = load_compiled_model(compiled_path)
+                    loaded.append(compiled_path)
+                    print(f"✓ Loaded {attack_name} model (compiled)")
+                    continue
+                
                 with open(model_path, "rb") as f:
                     self.models[attack_name] = pickle.load(f)
+                loaded.append(model_path)
                 print(f"✓ Loaded {attack_name} model")
             except FileNotFoundError:
                 print(f"⚠ Warning: {attack_name} model not found at {model_path}")
             except Exception as e:
                 print(f"✗ Error loading {attack_name} model: {e}")
+        
+        # Without a store, name the version after the files that were loaded
+        digest = hashlib.sha256()
+        for path in loaded:
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        self.version = f"files-{digest.hexdigest()[:12]}"
+    
+    def load_from_store(self):
+        """
+        Load the current model store version (arrays are memory-mapped, not copied)
+
+        Returns:
+            True if the store was loaded, False if it failed verification
+        """
+        try:
+            version, stored = load_store(self.models_dir)
+        except ModelStoreError as e:
+            print(f"✗ Model store rejected, loading model files instead: {e}")
+            return False
+        
+        for attack_name, model_file in MODEL_FILES.items():
+            model_data = stored.get(model_file[:-len(".pkl")])
+            if model_data is None:
+                print(f"⚠ Warning: {attack_name} model not in store version {version}")
+                continue
+            self.models[attack_name] = model_data
+            print(f"✓ Loaded {attack_name} model ({model_data['manifest']['format']}, {version})")
+        
+        self.store_version = self.version = version
+        return True
+    
+    @staticmethod
+    def is_current(compiled_path, model_path):
+        """True if the compiled model exists and is not older than its pickle"""
+        if not os.path.exists(compiled_path):
+            return False
+        if os.path.exists(model_path) and os.path.getmtime(compiled_path) < os.path.getmtime(model_path):
+            print(f"⚠ Warning: {compiled_path} is older than {model_path}, using the pickle")
+            return False
+        return True
+    
+    def load_encoder(self):
+        """Codes for string features, shared with train_models.py (None if unreadable)"""
+        try:
+            return CategoryEncoder.load(self.models_dir)
+        except ValueError as e:
+            print(f"✗ {e}; models using string features will fail")
+            return None
+    
+    def encode_categories(self, features):
+        """
+        Replace the string columns of a feature frame with their persistent codes
+        
+        Only columns some model consumes reach this point, so nothing else is
+        encoded. New values get new codes, saved by predict_all().
+        """
+        strings = [column for column in features.columns if features[column].dtype == object]
+        if not strings or self.encoder is None:
+            return features
+        return features.assign(**{column: self.encoder.encode(column, features[column])
+                                  for column in strings})
     
     def predict(self, attack_type, traffic_data):
         """
@@ -67,7 +219,7 @@ class MLPredictor:
             features = model_data["features"]
             
             # Extract required features
-            ct = traffic_data[features].copy()
+            ct = self.encode_categories(traffic_data[features])
             ct = ct.fillna(0)
             
             # Predict
@@ -109,24 +261,327 @@ class MLPredictor:
                 "anomaly_percentage": 0
             }
     
-    def predict_all(self, traffic_data):
+    def feature_union(self):
+        """Union of the feature columns used by all loaded models, in first-seen order"""
+        features = []
+        for model_data in self.models.values():
+            for feature in model_data["features"]:
+                if feature not in features:
+                    features.append(feature)
+        return features
+    
+    def required_columns(self):
+        """
+        Flow columns this predictor reads: every model feature plus the
+        identity columns kept for reports and alerts (Source/Destination IP)
+        
+        Preprocessing only needs to parse and clean these.
+        """
+        features = self.feature_union()
+        return features + [column for column in IDENTITY_FEATURES if column not in features]
+    
+    def feature_layout(self, available=None):
+        """
+        Columns of the shared feature matrix and each model's slice of them
+        
+        Every model's features are one contiguous run of columns in the model's
+        own order, so it reads a view of the matrix rather than a gathered copy.
+        A model whose features are already laid out in that order reuses them;
+        otherwise they are appended, overlapping the end of the layout where
+        possible (features shared in a different order are stored again).
+        
+        Args:
+            available: Feature columns present in the data; models needing
+                others are left out (default: every model)
+            
+        Returns:
+            Tuple of (columns, {attack type: slice})
+        """
+        columns, slices = [], {}
+        for attack_type, model_data in self.models.items():
+            features = list(model_data["features"])
+            if available is not None and not set(features) <= set(available):
+                continue
+            k = len(features)
+            start = next((i for i in range(len(columns) - k + 1) if columns[i:i + k] == features), None)
+            if start is None:
+                overlap = next((n for n in range(min(k, len(columns)), 0, -1)
+                                if columns[-n:] == features[:n]), 0)
+                start = len(columns) - overlap
+                columns += features[overlap:]
+            slices[attack_type] = slice(start, start + k)
+        return columns, slices
+    
+    def build_feature_matrix(self, traffic_data):
+        """
+        Build one contiguous float32 matrix holding every feature any model needs
+        
+        Args:
+            traffic_data: DataFrame containing network traffic features
+            
+        Returns:
+            Tuple of (matrix, {attack type: column slice}); models whose
+            features are missing from traffic_data, or are identifiers, have no slice
+        """
+        # Models using identifiers are left out like models missing a feature
+        columns, slices = self.feature_layout([c for c in traffic_data.columns if c not in IDENTIFIER_COLUMNS])
+        encoded = self.encode_categories(traffic_data[list(dict.fromkeys(columns))])
+        matrix = np.empty((len(traffic_data), len(columns)), dtype=np.float32)
+        for i, feature in enumerate(columns):
+            matrix[:, i] = encoded[feature].to_numpy(dtype=np.float32, na_value=0)
+        return matrix, slices
+    
+    def summarize(self, attack_type, predictions, traffic_data):
+        """
+        Build a prediction result from a prediction array
+        
+        The anomaly subset is taken with a row mask, so only anomalous rows are copied.
+        """
+        normal_count = np.count_nonzero(predictions == 1)
+        anomaly_count = np.count_nonzero(predictions == 0)
+        total = normal_count + anomaly_count
+        
+        anomaly_percentage = round((anomaly_count / total) * 100, 2) if total > 0 else 0
+        
+        source_ip = None
+        anomaly_df = pd.DataFrame()
+        
+        if anomaly_count > 0:
+            anomaly_df = traffic_data[predictions == 0]
+            
+            if "Source IP" in anomaly_df.columns and len(anomaly_df) > 0:
+                source_ip = anomaly_df["Source IP"].value_counts().idxmax()
+        
+        return {
+            "attack_type": attack_type,
+            "source_ip": source_ip,
+            "anomaly_df": anomaly_df,
+            "anomaly_percentage": anomaly_percentage,
+            "normal_count": normal_count,
+            "anomaly_count": anomaly_count,
+            "predictions": predictions
+        }
+    
+    def pool_for(self, model):
+        """Return "thread", "process" or None (run inline) for a model"""
+        if self.workers is None or self.workers <= 1:
+            return None
+        if self.executor == "mixed":
+            return "process" if type(model).__name__ in PROCESS_BOUND_MODELS else "thread"
+        return self.executor
+    
+    def thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix="Model")
+        return self._thread_pool
+    
+    def process_pool(self):
+        if self._process_pool is None:
+            # spawn: the pipeline is multi-threaded, so forking it is unsafe
+            models = {name: data["model"] for name, data in self.models.items()
+                      if data.get("manifest", {}).get("format") != "arrays"}
+            store = (self.models_dir, self.store_version) if self.store_version else None
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(models, store)
+            )
+        return self._process_pool
+    
+    def shutdown(self):
+        """Stop the worker pools (they are recreated on the next prediction)"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._thread_pool = None
+        self._process_pool = None
+    
+    def predict_fused(self, traffic_data):
+        """
+        Run all loaded models against a single shared feature matrix
+        
+        With workers > 1 the models run concurrently; process pool workers read
+        the matrix from shared memory. Results are collected in model order, so
+        they are the same as the sequential path.
+        
+        Args:
+            traffic_data: DataFrame containing network traffic features
+            
+        Returns:
+            List of prediction results for each attack type (same order as predict_all)
+        """
+        matrix, slices = self.build_feature_matrix(traffic_data)
+        shm = None
+        jobs = []
+        
+        try:
+            for attack_type, model_data in self.models.items():
+                model = model_data["model"]
+                features = model_data["features"]
+                pool = self.pool_for(model)
+                
+                if attack_type not in slices:
+                    missing = [f for f in features if f not in traffic_data.columns]
+                    job = Future()
+                    try:
+                        refuse_identifiers(features)
+                        job.set_exception(KeyError(f"{missing} not in index"))
+                    except ValueError as e:
+                        job.set_exception(e)
+                elif pool == "process":
+                    if shm is None:
+                        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+                        np.ndarray(matrix.shape, dtype=np.float32, buffer=shm.buf)[:] = matrix
+                    job = self.process_pool().submit(_predict_shared, attack_type, shm.name,
+                                                     matrix.shape, slices[attack_type])
+                elif pool == "thread":
+                    job = self.thread_pool().submit(_predict_model, model, matrix[:, slices[attack_type]])
+                else:
+                    job = Future()
+                    try:
+                        job.set_result(_predict_model(model, matrix[:, slices[attack_type]]))
+                    except Exception as e:
+                        job.set_exception(e)
+                
+                jobs.append((attack_type, job))
+            
+            results = []
+            for attack_type, job in jobs:
+                try:
+                    results.append(self.summarize(attack_type, job.result(), traffic_data))
+                except Exception as e:
+                    results.append({
+                        "attack_type": attack_type,
+                        "error": str(e),
+                        "anomaly_percentage": 0
+                    })
+            
+            return results
+            
+        finally:
+            if shm is not None:
+                for _, job in jobs:
+                    job.cancel()
+                    try:
+                        job.exception()
+                    except Exception:
+                        pass
+                shm.close()
+                shm.unlink()
+    
+    def predict_all(self, traffic_data, fused=True):
         """
         Run predictions for all loaded models
         
         Args:
             traffic_data: DataFrame containing network traffic features
+            fused: Share one feature matrix between models (see predict_fused)
             
         Returns:
-            List of prediction results for each attack type
+            List of prediction results for each attack type, each tagged with
+            the model version that produced it
         """
-        results = []
+        results = None
+        if fused:
+            try:
+                results = self.predict_fused(traffic_data)
+            except Exception as e:
+                print(f"Fused prediction failed, falling back to per-model: {e}")
         
-        for attack_type in self.models.keys():
-            result = self.predict(attack_type, traffic_data)
-            results.append(result)
+        if results is None:
+            results = []
+            for attack_type in self.models.keys():
+                result = self.predict(attack_type, traffic_data)
+                results.append(result)
         
+        for result in results:
+            result["model_version"] = self.version
+        
+        if self.encoder is not None:
+            try:
+                self.encoder.save()
+            except (OSError, ValueError) as e:
+                print(f"Could not save {self.encoder.path}: {e}")
         return results
     
+    def predict_chunked(self, chunks, spool_dir=None):
+        """
+        Run predictions for all loaded models over a window delivered in chunks
+        
+        Counts are summed over the chunks and the anomalous source IPs counted
+        in first-seen order, so counts, percentages and the top source IP are
+        the same as predict_all() on the whole window. Anomalous rows are
+        spooled to disk per chunk instead of being kept, and read back by
+        save_anomaly_report(). No "predictions" array is returned.
+        
+        Args:
+            chunks: Iterable of preprocessed DataFrames (e.g. ChunkedFlows)
+            spool_dir: Directory for the spooled rows (default: the system temp directory)
+            
+        Returns:
+            List of prediction results like predict_all(); pass it to release()
+            once handled to delete the spooled rows
+        """
+        spool = tempfile.TemporaryDirectory(prefix="anomalies_", dir=spool_dir)
+        totals = {}
+        
+        for number, chunk in enumerate(chunks):
+            for position, result in enumerate(self.predict_all(chunk)):
+                attack_type = result["attack_type"]
+                total = totals.setdefault(attack_type, {
+                    "attack_type": attack_type,
+                    "normal_count": 0,
+                    "anomaly_count": 0,
+                    "anomaly_files": [],
+                    "sources": None
+                })
+                if "error" in total:
+                    continue
+                if "error" in result:
+                    totals[attack_type] = {"attack_type": attack_type, "error": result["error"],
+                                           "anomaly_percentage": 0}
+                    continue
+                
+                total["normal_count"] += result["normal_count"]
+                total["anomaly_count"] += result["anomaly_count"]
+                anomaly_df = result["anomaly_df"]
+                if len(anomaly_df) > 0:
+                    path = os.path.join(spool.name, f"{position}-{number}.pkl")
+                    anomaly_df.to_pickle(path)
+                    total["anomaly_files"].append(path)
+                    
+                    if "Source IP" in anomaly_df.columns:
+                        counts = anomaly_df["Source IP"].value_counts(sort=False)
+                        if total["sources"] is not None:
+                            counts = pd.concat([total["sources"], counts]).groupby(level=0, sort=False).sum()
+                        total["sources"] = counts
+        
+        results = []
+        for total in totals.values():
+            if "error" not in total:
+                total_count = total["normal_count"] + total["anomaly_count"]
+                total["anomaly_percentage"] = round((total["anomaly_count"] / total_count) * 100, 2) \
+                    if total_count > 0 else 0
+                # Same ordering as value_counts() on the whole window, ties included
+                sources = total.pop("sources")
+                total["source_ip"] = sources.sort_values(ascending=False).idxmax() \
+                    if sources is not None and len(sources) > 0 else None
+                total["anomaly_df"] = pd.DataFrame()
+            total["anomaly_spool"] = spool
+            total["model_version"] = self.version
+            results.append(total)
+        return results
+    
+    @staticmethod
+    def release(results):
+        """Delete the anomalous rows predict_chunked() spooled for these results"""
+        for result in results:
+            spool = result.pop("anomaly_spool", None)
+            if spool is not None:
+                spool.cleanup()
+    
     def save_visualization(self, attack_type, predictions, output_dir):
         """
         Generate and save visualization for predictions
@@ -165,46 +620,106 @@ class MLPredictor:
         """
         Save detailed report of anomalous traffic
         
+        Reports go to the Parquet report store (report_store.py) when pyarrow is
+        installed, otherwise to a CSV file per report.
+        
         Args:
             result: Prediction result dictionary
             reports_dir: Directory to save reports
+            
+        Returns:
+            Path of the report written, or None
         """
         try:
-            if result["anomaly_percentage"] > 10 and not result["anomaly_df"].empty:
-                timestamp = datetime.now().strftime('%Y_%m_%d-%I:%M:%S_%p')
+            # Rows spooled by predict_chunked() are written back one chunk at a time
+            spooled = result.get("anomaly_files")
+            if result["anomaly_percentage"] > 10 and (spooled or not result["anomaly_df"].empty):
+                frames = (pd.read_pickle(path) for path in spooled) if spooled else [result["anomaly_df"]]
+                report_time = datetime.now()
+                
+                if report_store.available():
+                    if reports_dir not in self._report_stores:
+                        self._report_stores[reports_dir] = report_store.ReportStore(reports_dir)
+                    paths = [self._report_stores[reports_dir].append(
+                        result["attack_type"], anomaly_df, report_time=report_time,
+                        model_version=result.get("model_version")) for anomaly_df in frames]
+                    print(f"Saved anomaly report: {os.path.relpath(paths[0], reports_dir)}"
+                          + (f" (+{len(paths) - 1} parts)" if len(paths) > 1 else ""))
+                    return paths[0]
+                
+                timestamp = report_time.strftime('%Y_%m_%d-%I:%M:%S_%p')
                 attack_type = result["attack_type"].replace(" ", "_").replace("/", "_")
                 filename = f"anomaly_{attack_type}_{timestamp}.csv"
                 filepath = os.path.join(reports_dir, filename)
                 
-                result["anomaly_df"].to_csv(filepath, encoding="utf-8", index=False)
+                for number, anomaly_df in enumerate(frames):
+                    anomaly_df.assign(Predicted_result=0, Model_version=result.get("model_version")).to_csv(
+                        filepath, encoding="utf-8", index=False, mode="a" if number else "w", header=not number)
                 print(f"Saved anomaly report: {filename}")
+                return filepath
                 
         except Exception as e:
             print(f"Error saving anomaly report: {e}")
+        return None
 
 
-def test_predictor():
-    """Test function to verify predictor works"""
-    print("Testing ML Predictor...")
+def test_predictor(rows=5000, chunk_rows=700):
+    """
+    Test function to verify predictor works
     
-    # Create sample data
-    sample_data = pd.DataFrame({
-        'Destination Port': [80, 443, 22],
-        'Flow Duration': [1000, 2000, 3000],
-        'Total Fwd Packets': [10, 20, 30],
-        'Source IP': ['192.168.1.1', '192.168.1.2', '192.168.1.3']
-    })
+    The sample has every feature of the loaded models (random values) plus
+    the IPs, like the probe of ModelReloader.validate, so the fused,
+    per-model and chunked paths are compared on real predictions.
+    
+    Returns:
+        True if no model failed and all paths agree
+    """
+    print("Testing ML Predictor...")
     
     predictor = MLPredictor()
     print(f"\nLoaded {len(predictor.models)} models")
+    if len(predictor.models) == 0:
+        print("✗ No models loaded (run train_models.py)")
+        return False
     
-    if len(predictor.models) > 0:
-        print("\nRunning test prediction...")
-        results = predictor.predict_all(sample_data)
-        for result in results:
-            if "error" not in result:
-                print(f"{result['attack_type']}: {result['anomaly_percentage']}% anomalous")
+    # Create sample data
+    rng = np.random.default_rng(0)
+    features = predictor.feature_union()
+    sample_data = pd.DataFrame(rng.integers(0, 100000, size=(rows, len(features))).astype(np.float64),
+                               columns=features)
+    sample_data["Source IP"] = rng.choice([f"192.168.1.{i}" for i in range(1, 6)], rows)
+    sample_data["Destination IP"] = "10.0.0.1"
+    
+    ok = True
+    print("\nRunning test prediction...")
+    results = predictor.predict_all(sample_data)
+    for result in results:
+        if "error" in result:
+            ok = False
+            print(f"✗ {result['attack_type']}: {result['error']}")
+        else:
+            print(f"{result['attack_type']}: {result['anomaly_percentage']}% anomalous")
+    
+    print("\nComparing fused and per-model predictions...")
+    sequential = predictor.predict_all(sample_data, fused=False)
+    for fused_result, result in zip(results, sequential):
+        same = ("error" not in result and "error" not in fused_result and
+                np.array_equal(fused_result["predictions"], result["predictions"]))
+        ok &= same
+        print(f"{'✓' if same else '✗'} {result['attack_type']}")
+    
+    print("\nComparing chunked and whole-window predictions...")
+    chunked = predictor.predict_chunked(sample_data.iloc[i:i + chunk_rows]
+                                        for i in range(0, rows, chunk_rows))
+    keys = ("anomaly_percentage", "normal_count", "anomaly_count", "source_ip")
+    for result, chunked_result in zip(results, chunked):
+        same = "error" not in chunked_result and all(result.get(key) == chunked_result.get(key) for key in keys)
+        ok &= same
+        print(f"{'✓' if same else '✗'} {result['attack_type']}")
+    predictor.release(chunked)
+    predictor.shutdown()
+    return ok
 
 
 if __name__ == "__main__":
-    test_predictor()
+    sys.exit(0 if test_predictor() else 1)
@@ -0,0 +1,196 @@
+"""
+Model Reloader Module - Hot swaps retrained models into a running pipeline
+A background thread watches the model directory (the model store's CURRENT
+pointer and the model files). When they change and stay unchanged for one more
+poll, it loads a new MLPredictor, checks it with a probe window and stages it.
+The prediction worker picks the staged predictor up between windows, so every
+window is scored by exactly one version, and the previous predictor is kept
+for an instant rollback.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from model_store import current_version
+
+RELOAD_INTERVAL = 30  # seconds between checks of the model directory
+PROBE_ROWS = 16
+
+
+def artifact_signature(models_dir):
+    """Store version plus name, size and mtime of every model file, for change detection"""
+    files = []
+    try:
+        for filename in sorted(os.listdir(models_dir)):
+            if filename.endswith(("_model.pkl", "_model.npz")):
+                stat = os.stat(os.path.join(models_dir, filename))
+                files.append((filename, stat.st_size, stat.st_mtime_ns))
+    except FileNotFoundError:
+        pass
+    return current_version(models_dir), tuple(files)
+
+
+class ModelReloader:
+    """Watches the model directory and swaps in validated predictors between windows"""
+
+    def __init__(self, predictor, factory, interval=RELOAD_INTERVAL):
+        """
+        Args:
+            predictor: The MLPredictor currently scoring windows
+            factory: Function returning a newly loaded MLPredictor
+            interval: Seconds between checks of predictor.models_dir
+        """
+        self.active = predictor
+        self.previous = None  # Kept loaded for rollback()
+        self.pending = None  # Validated, installed by the next acquire()
+        self.factory = factory
+        self.interval = interval
+        self.models_dir = predictor.models_dir
+        self.signature = artifact_signature(self.models_dir)
+        self.changed = None  # Signature seen on the last poll, waiting to settle
+        self.lock = threading.Lock()
+        self.stats = {"reloads": 0, "rejected": 0, "rollbacks": 0, "last_error": None}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="ModelReloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[Models] Reload check failed: {e}")
+
+    def check(self):
+        """
+        Stage a new predictor if the model artifacts changed
+
+        Returns:
+            True if a predictor was staged
+        """
+        signature = artifact_signature(self.models_dir)
+        if signature == self.signature:
+            self.changed = None
+            return False
+        if signature != self.changed:
+            # Wait one more poll in case training is still writing files
+            self.changed = signature
+            return False
+
+        self.signature = signature
+        self.changed = None
+        version = signature[0]
+
+        with self.lock:
+            active, previous = self.active, self.previous
+        if version is not None and active.store_version == version:
+            # Already scoring with it (e.g. after a rollback); file changes don't matter
+            return False
+        if version is not None and previous is not None and previous.store_version == version:
+            # The store was pointed back at the version we still hold
+            print(f"[Models] Store reverted to {version}, rolling back")
+            return self.rollback()
+
+        print("[Models] Model artifacts changed, loading in the background...")
+        try:
+            candidate = self.factory()
+            self.validate(candidate, expected_version=version)
+        except Exception as e:
+            with self.lock:
+                self.stats["rejected"] += 1
+                self.stats["last_error"] = str(e)
+            print(f"[Models] New models rejected, keeping {self.active.version}: {e}")
+            return False
+
+        with self.lock:
+            self.pending = candidate
+        print(f"[Models] Version {candidate.version} validated, swapping in before the next window")
+        return True
+
+    def validate(self, candidate, expected_version=None):
+        """
+        Raise ValueError unless candidate can replace the active predictor
+
+        It must come from the published store version (not a fallback after a
+        failed checksum), cover every attack type the active predictor scores,
+        and score a probe window without errors.
+        """
+        if expected_version is not None and candidate.store_version != expected_version:
+            raise ValueError(f"store version {expected_version} did not load")
+
+        missing = set(self.active.models) - set(candidate.models)
+        if missing:
+            raise ValueError(f"models missing: {', '.join(sorted(missing))}")
+
+        probe = pd.DataFrame(np.zeros((PROBE_ROWS, len(candidate.feature_union()))),
+                             columns=candidate.feature_union())
+        probe["Source IP"] = "0.0.0.0"
+        probe["Destination IP"] = "0.0.0.0"
+
+        for result in candidate.predict_all(probe):
+            if "error" in result:
+                raise ValueError(f"{result['attack_type']}: {result['error']}")
+            if len(result["predictions"]) != PROBE_ROWS:
+                raise ValueError(f"{result['attack_type']}: wrong number of predictions")
+
+    def acquire(self):
+        """
+        Predictor for the next window, installing a staged one first
+
+        Called by the prediction worker at the start of every window; the
+        returned predictor must be used for the whole window.
+        """
+        with self.lock:
+            if self.pending is None:
+                return self.active
+            staged, self.pending = self.pending, None
+            self.stats["rollbacks" if staged is self.previous else "reloads"] += 1
+            self.previous, self.active = self.active, staged
+            retired = self.previous
+
+        # The retired predictor's pools are idle between windows; they are
+        # recreated if it is rolled back to
+        retired.shutdown()
+        print(f"[Models] Now scoring with {self.active.version} (previous: {retired.version})")
+        return self.active
+
+    def rollback(self):
+        """
+        Swap the previous predictor back in before the next window
+
+        Returns:
+            True if there was a previous version to roll back to
+        """
+        with self.lock:
+            if self.previous is None:
+                return False
+            self.pending = self.previous
+        return True
+
+    def required_columns(self):
+        """
+        Columns needed by the active, staged and previous predictors, so
+        windows preprocessed before a swap or rollback still carry every feature
+        """
+        with self.lock:
+            predictors = [self.active, self.pending, self.previous]
+        columns = []
+        for predictor in predictors:
+            if predictor is not None:
+                columns += [c for c in predictor.required_columns() if c not in columns]
+        return columns
+
+    def summary(self):
+        """Active and previous versions plus reload counters"""
+        with self.lock:
+            return dict(self.stats,
+                        active=self.active.version,
+                        previous=self.previous.version if self.previous else None,
+                        pending=self.pending.version if self.pending else None)
@@ -0,0 +1,274 @@
+"""
+Model Store Module - Versioned, memory-mapped model registry
+Each published version is a directory under trained_models/store/ holding the
+compiled tree arrays as raw .npy files and a manifest.json with the feature
+list, sklearn version, training data hash, metrics and a SHA-256 per file.
+Arrays are opened with np.load(mmap_mode="r"), so loading copies nothing and
+every process using the same version shares one copy through the page cache.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+import numpy as np
+from compiled_models import CompiledModel, compile_model, verify_compiled
+
+STORE_DIR = "store"  # inside the models directory
+CURRENT_FILE = "CURRENT"  # names the active version
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+ARRAYS = ("classes", "feature", "threshold", "value")
+
+
+class ModelStoreError(Exception):
+    """A store version is missing, incomplete or fails its checksums"""
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_path(models_dir):
+    return os.path.join(models_dir, STORE_DIR)
+
+
+def current_version(models_dir):
+    """Name of the active store version, or None if nothing was published"""
+    try:
+        with open(os.path.join(store_path(models_dir), CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current_version(models_dir, version):
+    """Atomically point CURRENT at a version"""
+    path = os.path.join(store_path(models_dir), CURRENT_FILE)
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def list_versions(models_dir):
+    """Published versions, oldest first"""
+    root = store_path(models_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+
+
+def publish_models(models_dir="trained_models", keep=5):
+    """
+    Publish every pickled model in models_dir as a new store version
+
+    Models whose compiled form reproduces sklearn's predictions are stored as
+    arrays; any other model is stored as its pickle (still checksummed, but
+    loaded with a copy). Dataset hashes and accuracies are taken from the
+    training manifest written by train_models.py when present.
+
+    Args:
+        keep: Number of versions to keep (older ones are deleted)
+
+    Returns:
+        Name of the new version, now current
+    """
+    import sklearn
+
+    root = store_path(models_dir)
+    os.makedirs(root, exist_ok=True)
+
+    try:
+        with open(os.path.join(models_dir, "training_manifest.json")) as f:
+            training = json.load(f)
+    except (OSError, ValueError):
+        training = {}
+
+    created = time.strftime("%Y%m%dT%H%M%S")
+    staging = os.path.join(root, f".staging-{created}-{os.getpid()}")
+    os.makedirs(staging)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": created,
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "models": {}
+    }
+
+    try:
+        for filename in sorted(os.listdir(models_dir)):
+            if not filename.endswith("_model.pkl"):
+                continue
+            name = filename[:-len(".pkl")]
+            with open(os.path.join(models_dir, filename), "rb") as f:
+                model_data = pickle.load(f)
+            model, features = model_data["model"], model_data["features"]
+
+            entry = {
+                "source": filename,
+                "estimator": type(model).__name__,
+                "features": list(features),
+                "files": {}
+            }
+            trained = training.get(name[:-len("_model")], {})
+            if trained:
+                entry["dataset"] = trained.get("dataset")
+                entry["dataset_sha256"] = trained.get("dataset_sha256")
+                entry["metrics"] = {"accuracy": trained.get("accuracy")}
+                entry["trained_at"] = trained.get("trained_at")
+
+            try:
+                compiled = compile_model(model)
+                if not verify_compiled(model, compiled, len(features)):
+                    raise ValueError("compiled predictions differ from sklearn")
+                entry.update(kind=compiled.kind, scale=compiled.scale, format="arrays")
+                arrays = compiled.to_arrays()
+                for array in ARRAYS:
+                    path = os.path.join(staging, f"{name}.{array}.npy")
+                    np.save(path, np.ascontiguousarray(arrays[array]))
+                    entry["files"][array] = os.path.basename(path)
+            except Exception as e:
+                print(f"⚠ {filename}: storing the pickle ({e})")
+                for fname in entry["files"].values():
+                    os.remove(os.path.join(staging, fname))
+                entry["files"] = {}
+                entry.pop("kind", None)
+                entry.pop("scale", None)
+                shutil.copyfile(os.path.join(models_dir, filename), os.path.join(staging, filename))
+                entry.update(format="pickle")
+                entry["files"]["pickle"] = filename
+
+            entry["checksums"] = {
+                fname: sha256_file(os.path.join(staging, fname)) for fname in entry["files"].values()
+            }
+            manifest["models"][name] = entry
+
+        if not manifest["models"]:
+            raise ModelStoreError(f"No *_model.pkl files in {models_dir}")
+
+        # The version name covers the contents, so republishing the same models is a no-op
+        content = hashlib.sha256(json.dumps(
+            {name: entry["checksums"] for name, entry in manifest["models"].items()},
+            sort_keys=True).encode()).hexdigest()[:12]
+        for version in list_versions(models_dir):
+            if version.endswith(content):
+                shutil.rmtree(staging)
+                set_current_version(models_dir, version)
+                print(f"✓ Models unchanged, version {version} is current")
+                return version
+
+        version = f"{created}-{content}"
+        manifest["version"] = version
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.rename(staging, os.path.join(root, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    set_current_version(models_dir, version)
+    print(f"✓ Published model store version {version} ({len(manifest['models'])} models)")
+
+    for old in list_versions(models_dir)[:-keep] if keep else []:
+        if old != version:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+    return version
+
+
+def read_manifest(models_dir, version=None):
+    version = version or current_version(models_dir)
+    if version is None:
+        raise ModelStoreError(f"No model store in {store_path(models_dir)}")
+    path = os.path.join(store_path(models_dir), version, MANIFEST_FILE)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelStoreError(f"Cannot read {path}: {e}")
+
+
+def load_store(models_dir="trained_models", version=None, verify=True):
+    """
+    Load a store version (the current one by default)
+
+    Args:
+        verify: Check every file against its manifest checksum first
+
+    Returns:
+        Tuple of (version, {model name: {"model", "features", "manifest"}})
+
+    Raises:
+        ModelStoreError: if the version is missing or a checksum does not match
+    """
+    manifest = read_manifest(models_dir, version)
+    version = manifest["version"]
+    directory = os.path.join(store_path(models_dir), version)
+
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ModelStoreError(f"Unsupported store format {manifest.get('format')} in {version}")
+
+    models = {}
+    for name, entry in manifest["models"].items():
+        for fname, checksum in entry["checksums"].items():
+            path = os.path.join(directory, fname)
+            if not os.path.exists(path):
+                raise ModelStoreError(f"{version}: {fname} is missing")
+            if verify and sha256_file(path) != checksum:
+                raise ModelStoreError(f"{version}: checksum mismatch for {fname}")
+
+        if entry["format"] == "arrays":
+            arrays = {array: np.load(os.path.join(directory, fname), mmap_mode="r")
+                      for array, fname in entry["files"].items()}
+            model = CompiledModel(entry["kind"], arrays["classes"], arrays["feature"],
+                                  arrays["threshold"], arrays["value"], entry["scale"])
+        else:
+            with open(os.path.join(directory, entry["files"]["pickle"]), "rb") as f:
+                model = pickle.load(f)["model"]
+
+        models[name] = {"model": model, "features": entry["features"], "manifest": entry}
+
+    return version, models
+
+
+def describe_store(models_dir="trained_models"):
+    """Print the versions in the store and the models of the current one"""
+    current = current_version(models_dir)
+    for version in list_versions(models_dir):
+        print(f"{'*' if version == current else ' '} {version}")
+    if current:
+        for name, entry in read_manifest(models_dir)["models"].items():
+            accuracy = entry.get("metrics", {}).get("accuracy")
+            accuracy = f"{accuracy:.2%}" if accuracy is not None else "n/a"
+            print(f"    {name}: {entry['estimator']} ({entry['format']}), accuracy {accuracy}, "
+                  f"data {str(entry.get('dataset_sha256'))[:12]}")
+
+
+if __name__ == "__main__":
+    # python model_store.py [publish|list|verify] [models_dir]
+    # python model_store.py activate VERSION [models_dir]  (running pipelines follow CURRENT)
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "activate":
+        version = sys.argv[2]
+        models_dir = sys.argv[3] if len(sys.argv) > 3 else "trained_models"
+        load_store(models_dir, version)
+        set_current_version(models_dir, version)
+        print(f"✓ {version} is current")
+        sys.exit(0)
+    models_dir = sys.argv[2] if len(sys.argv) > 2 else "trained_models"
+    if command == "publish":
+        publish_models(models_dir)
+    elif command == "verify":
+        version, models = load_store(models_dir)
+        print(f"✓ {version}: {len(models)} models verified")
+    else:
+        describe_store(models_dir)
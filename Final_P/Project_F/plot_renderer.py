@@ -0,0 +1,164 @@
+"""
+Plot Renderer Module - Draws the dashboard prediction plots in a separate process
+The prediction thread only hands over the normal/anomaly counts of each model.
+A render process coalesces them, redraws a plot only when its counts changed,
+reuses one matplotlib figure for every plot and replaces the files atomically.
+It also writes all counts to prediction_counts.json, from which the dashboard
+draws the charts in the browser.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+from datetime import datetime
+
+COUNTS_FILE = "prediction_counts.json"
+BATCH_DELAY = 0.5  # seconds to collect the rest of a window's results before drawing
+QUEUE_MAX = 1000
+
+
+def plot_filename(attack_type):
+    """PNG name used by MLPredictor.save_visualization"""
+    return attack_type.replace(" ", "_").replace("/", "_") + ".png"
+
+
+def _write_atomic(path, write):
+    """Write through a temporary file and rename it, so readers never see half a file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_text(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class _Canvas:
+    """One figure and Agg canvas reused for every plot"""
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.figure = Figure(figsize=(6, 5))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.bars = self.axes.bar(['Anomaly (0)', 'Normal (1)'], [0, 0], color=['red', 'green'])
+        self.axes.set_ylabel('Occurrences')
+        self.axes.set_xlabel('Prediction')
+
+    def render(self, attack_type, normal, anomaly, path):
+        self.bars[0].set_height(anomaly)
+        self.bars[1].set_height(normal)
+        self.axes.set_ylim(0, max(normal, anomaly, 1) * 1.05)
+        self.axes.set_title(f'Normal and Anomaly ({attack_type}) Prediction')
+        _write_atomic(path, lambda tmp: self.figure.savefig(tmp, format="png"))
+
+
+def _render_loop(requests, output_dir, render_png):
+    """Render process: collect counts, redraw what changed, repeat"""
+    canvas = _Canvas() if render_png else None
+    drawn = {}  # file name -> (attack type, normal, anomaly) last written
+    plots = {}  # file name -> (attack type, normal, anomaly) to draw
+    counts = {}
+
+    while True:
+        message = requests.get()
+        batch = [message]
+        # Results of one window arrive together; take them all before drawing
+        deadline = time.monotonic() + BATCH_DELAY
+        while message is not None:
+            try:
+                message = requests.get(timeout=max(deadline - time.monotonic(), 0))
+                batch.append(message)
+            except queue.Empty:
+                break
+
+        for message in batch:
+            if message is not None:
+                attack_type, normal, anomaly, updated, filename = message
+                counts[attack_type] = {"normal": normal, "anomaly": anomaly, "updated": updated}
+                plots[filename] = (attack_type, normal, anomaly)
+
+        changed = [f for f, plot in plots.items() if drawn.get(f) != plot]
+        for filename in changed:
+            attack_type, normal, anomaly = plots[filename]
+            if canvas is not None:
+                try:
+                    canvas.render(attack_type, normal, anomaly, os.path.join(output_dir, filename))
+                except Exception as e:
+                    print(f"[Render] Error drawing {attack_type}: {e}")
+                    continue
+            drawn[filename] = plots[filename]
+
+        if changed:
+            data = json.dumps({"updated": datetime.now().isoformat(timespec="seconds"),
+                               "models": counts}, indent=1, sort_keys=True)
+            try:
+                _write_atomic(os.path.join(output_dir, COUNTS_FILE), lambda tmp: _write_text(tmp, data))
+            except OSError as e:
+                print(f"[Render] Error writing {COUNTS_FILE}: {e}")
+
+        if None in batch:
+            return
+
+
+class PlotRenderer:
+    """Hands prediction counts to the render process without blocking the caller"""
+
+    def __init__(self, output_dir, render_png=True):
+        """
+        Args:
+            output_dir: Directory served as /static by the dashboard
+            render_png: Also draw a PNG per model; with False only the JSON
+                counts are written and the browser draws the charts
+        """
+        self.output_dir = output_dir
+        self.render_png = render_png
+        self.submitted = {}  # file name -> (attack type, counts) last sent
+        self.stats = {"submitted": 0, "unchanged": 0, "dropped": 0}
+        # spawn: the pipeline is multi-threaded, so forking it is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue(maxsize=QUEUE_MAX)
+        self.process = context.Process(target=_render_loop, name="PlotRenderer",
+                                       args=(self.requests, output_dir, render_png),
+                                       daemon=True)
+        self.process.start()
+
+    def submit(self, attack_type, normal_count, anomaly_count, filename=None):
+        """
+        Queue a model's counts for drawing; repeated counts are not sent again
+
+        Args:
+            filename: PNG to draw in output_dir (default: plot_filename(attack_type))
+        """
+        filename = filename or plot_filename(attack_type)
+        counts = (int(normal_count), int(anomaly_count))
+        if self.submitted.get(filename) == (attack_type, counts):
+            self.stats["unchanged"] += 1
+            return
+        try:
+            self.requests.put_nowait((attack_type, *counts, datetime.now().isoformat(timespec="seconds"),
+                                      filename))
+            self.submitted[filename] = (attack_type, counts)
+            self.stats["submitted"] += 1
+        except queue.Full:
+            # The renderer is behind; the next window brings newer counts anyway
+            self.stats["dropped"] += 1
+
+    def close(self, timeout=5):
+        """Draw what is queued and stop the render process"""
+        try:
+            self.requests.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
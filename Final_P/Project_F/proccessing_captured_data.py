@@ -1,8 +1,53 @@
 import pandas as pd
+import numpy as np
+import io
 import os
+import re
+import sys
 from sklearn import preprocessing
 import time
 
+# Headers of column
+MAIN_LABELS = ["Flow ID","Source IP","Source Port","Destination IP","Destination Port","Protocol","Timestamp","Flow Duration","Total Fwd Packets",
+"Total Backward Packets","Total Length of Fwd Packets","Total Length of Bwd Packets","Fwd Packet Length Max","Fwd Packet Length Min",
+"Fwd Packet Length Mean","Fwd Packet Length Std","Bwd Packet Length Max","Bwd Packet Length Min","Bwd Packet Length Mean","Bwd Packet Length Std",
+"Flow Bytes/s","Flow Packets/s","Flow IAT Mean","Flow IAT Std","Flow IAT Max","Flow IAT Min","Fwd IAT Total","Fwd IAT Mean","Fwd IAT Std","Fwd IAT Max",
+"Fwd IAT Min","Bwd IAT Total","Bwd IAT Mean","Bwd IAT Std","Bwd IAT Max","Bwd IAT Min","Fwd PSH Flags","Bwd PSH Flags","Fwd URG Flags","Bwd URG Flags",
+"Fwd Header Length","Bwd Header Length","Fwd Packets/s","Bwd Packets/s","Min Packet Length","Max Packet Length","Packet Length Mean","Packet Length Std",
+"Packet Length Variance","FIN Flag Count","SYN Flag Count","RST Flag Count","PSH Flag Count","ACK Flag Count","URG Flag Count","CWE Flag Count",
+"ECE Flag Count","Down/Up Ratio","Average Packet Size","Avg Fwd Segment Size","Avg Bwd Segment Size","Fwd Avg Bytes/Bulk",
+"Fwd Avg Packets/Bulk","Fwd Avg Bulk Rate","Bwd Avg Bytes/Bulk","Bwd Avg Packets/Bulk","Bwd Avg Bulk Rate","Subflow Fwd Packets","Subflow Fwd Bytes",
+"Subflow Bwd Packets","Subflow Bwd Bytes","Init_Win_bytes_forward","Init_Win_bytes_backward","act_data_pkt_fwd",
+"min_seg_size_forward","Active Mean","Active Std","Active Max","Active Min","Idle Mean","Idle Std","Idle Max","Idle Min","Label"]
+
+# Columns CICFlowMeter writes as text; every other column is parsed as float64
+STRING_FEATURES = ["Flow ID", "Source IP", "Destination IP", "Timestamp", "Label"]
+# Columns kept as raw strings for reporting (never label-encoded)
+IDENTITY_FEATURES = ["Source IP", "Destination IP"]
+# Columns label-encoded by processing()
+ENCODED_FEATURES = [label for label in STRING_FEATURES if label not in IDENTITY_FEATURES and label != "Label"]
+RATE_FEATURES = ["Flow Bytes/s", "Flow Packets/s"]
+DROPPED_FEATURE = MAIN_LABELS[61]  # "Fwd Avg Bytes/Bulk", dropped by processing() as well
+
+FLOW_DTYPES = {label: (object if label in STRING_FEATURES else np.float64) for label in MAIN_LABELS}
+INFINITY_VALUES = ["Infinity", "-Infinity", "inf", "-inf", "NaN"]
+# pyarrow matches usecols against the file's own header, not against names=
+FLOW_HEADER = (",".join(MAIN_LABELS) + "\n").encode()
+
+# Header lines and incomplete streams do not start with a digit
+NON_FLOW_LINE = re.compile(rb"\n[^0-9\n]")
+
+# Chunked processing of windows too large to hold whole (see ChunkedFlows)
+CHUNK_ROWS = 200000  # rows per chunk
+READ_BLOCK = 1 << 22  # bytes read from a flow file at a time
+
+# pyarrow is optional; it roughly halves CSV parse time when installed
+try:
+    import pyarrow
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
 def processing(File_name):
     seconds = time.time()
     print("This process may take 5 to 10 minutes, depending on the performance of your computer.\n\n\n")
@@ -10,18 +55,7 @@ def processing(File_name):
     # CSV files names:
     csv_files=[File_name]
 
-    # Headers of column
-    main_labels = ["Flow ID","Source IP","Source Port","Destination IP","Destination Port","Protocol","Timestamp","Flow Duration","Total Fwd Packets",
-    "Total Backward Packets","Total Length of Fwd Packets","Total Length of Bwd Packets","Fwd Packet Length Max","Fwd Packet Length Min",
-    "Fwd Packet Length Mean","Fwd Packet Length Std","Bwd Packet Length Max","Bwd Packet Length Min","Bwd Packet Length Mean","Bwd Packet Length Std",
-    "Flow Bytes/s","Flow Packets/s","Flow IAT Mean","Flow IAT Std","Flow IAT Max","Flow IAT Min","Fwd IAT Total","Fwd IAT Mean","Fwd IAT Std","Fwd IAT Max",
-    "Fwd IAT Min","Bwd IAT Total","Bwd IAT Mean","Bwd IAT Std","Bwd IAT Max","Bwd IAT Min","Fwd PSH Flags","Bwd PSH Flags","Fwd URG Flags","Bwd URG Flags",
-    "Fwd Header Length","Bwd Header Length","Fwd Packets/s","Bwd Packets/s","Min Packet Length","Max Packet Length","Packet Length Mean","Packet Length Std",
-    "Packet Length Variance","FIN Flag Count","SYN Flag Count","RST Flag Count","PSH Flag Count","ACK Flag Count","URG Flag Count","CWE Flag Count",
-    "ECE Flag Count","Down/Up Ratio","Average Packet Size","Avg Fwd Segment Size","Avg Bwd Segment Size","Fwd Avg Bytes/Bulk",
-    "Fwd Avg Packets/Bulk","Fwd Avg Bulk Rate","Bwd Avg Bytes/Bulk","Bwd Avg Packets/Bulk","Bwd Avg Bulk Rate","Subflow Fwd Packets","Subflow Fwd Bytes",
-    "Subflow Bwd Packets","Subflow Bwd Bytes","Init_Win_bytes_forward","Init_Win_bytes_backward","act_data_pkt_fwd",
-    "min_seg_size_forward","Active Mean","Active Std","Active Max","Active Min","Idle Mean","Idle Std","Idle Max","Idle Min","Label"]
+    main_labels = list(MAIN_LABELS)
 
     main_labels2=main_labels
     main_labels=( ",".join( i for i in main_labels ) )
@@ -112,4 +146,358 @@ def processing(File_name):
     
 
 
+def read_flow_csv(source, usecols=None):
+    """
+    Parse CICFlowMeter output in a single pass with explicit dtypes
+
+    Args:
+        source: Path to a flow CSV file, or an open binary stream
+        usecols: Only parse these columns (e.g. MLPredictor.required_columns())
+
+    Returns:
+        DataFrame with MAIN_LABELS columns (or usecols), numeric columns as float64
+    """
+    labels = projected_labels(usecols)
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            data = file.read()
+    else:
+        data = source.read()
+
+    # Drop the header line(s), then only filter line by line if something else needs removing
+    while data and not data[:1].isdigit():
+        newline = data.find(b"\n")
+        data = b"" if newline < 0 else data[newline + 1:]
+    if NON_FLOW_LINE.search(data):
+        data = b"\n".join(line for line in data.split(b"\n") if line[:1].isdigit())
+    if " – ".encode() in data:
+        data = data.replace(" – ".encode(), b" - ")
+
+    if not data:
+        return pd.DataFrame({label: pd.Series(dtype=FLOW_DTYPES[label]) for label in labels})
+
+    options = dict(header=None, names=MAIN_LABELS, dtype=FLOW_DTYPES, na_values=INFINITY_VALUES,
+                   usecols=usecols and labels)
+    if CSV_ENGINE == "pyarrow":
+        try:
+            if usecols:
+                return pd.read_csv(io.BytesIO(FLOW_HEADER + data), engine="pyarrow", header=0,
+                                   dtype=FLOW_DTYPES, na_values=INFINITY_VALUES, usecols=labels)
+            return pd.read_csv(io.BytesIO(data), engine="pyarrow", **options)
+        except Exception:
+            pass  # e.g. incomplete rows, which only the C engine pads with NaN
+    return pd.read_csv(io.BytesIO(data), low_memory=False, **options)
+
+
+def projected_labels(columns):
+    """MAIN_LABELS that are in columns (all of them for None), in file order"""
+    return [label for label in MAIN_LABELS if columns is None or label in columns]
+
+
+def clean_flow_frame(df, encoding=None, label_encode=True):
+    """
+    Vectorized equivalent of the cleanup done by processing()
+
+    Infinity/NaN values become 0, the rate columns are truncated to integers,
+    string columns are label-encoded (except Source/Destination IP and Label)
+    and the DROPPED_FEATURE column is removed.
+
+    Args:
+        df: DataFrame returned by read_flow_csv()
+        encoding: {column: sorted values, or None if the column has missing
+            values} from flow_encoding(), to encode a chunk with the codes of
+            the whole window; by default the codes come from df itself
+        label_encode: False keeps the ENCODED_FEATURES columns as strings, for
+            MLPredictor to encode with its persistent CategoryEncoder
+
+    Returns:
+        Cleaned DataFrame, same values as processing()
+    """
+    numeric = [label for label in df.columns if label not in STRING_FEATURES]
+    values = df[numeric].to_numpy(dtype=np.float64)
+    values[~np.isfinite(values)] = 0
+
+    cleaned = {}
+    for position, label in enumerate(numeric):
+        cleaned[label] = values[:, position]
+    for label in RATE_FEATURES:
+        if label in cleaned:
+            cleaned[label] = np.trunc(cleaned[label]).astype(np.int64)
+
+    for label in STRING_FEATURES:
+        if label not in df.columns:
+            continue
+        column = df[label]
+        if label in IDENTITY_FEATURES or (not label_encode and label in ENCODED_FEATURES):
+            cleaned[label] = column
+        elif encoding is not None and label in encoding:
+            values = encoding[label]
+            cleaned[label] = column.fillna(0) if values is None else np.searchsorted(values, column.to_numpy())
+        elif column.isna().any() or label == "Label":
+            cleaned[label] = column.fillna(0)
+        else:
+            cleaned[label] = pd.factorize(column, sort=True)[0]
+
+    columns = [label for label in df.columns if label != DROPPED_FEATURE]
+    return pd.DataFrame({label: cleaned[label] for label in columns}, index=df.index)
+
+
+def columnar_processing(File_name, label_encode=True, columns=None):
+    """
+    Columnar replacement for processing(): no scratch file, no per-row loops
+
+    Args:
+        File_name: Name of the flow CSV inside flow_data/
+        label_encode: See clean_flow_frame()
+        columns: Only parse and clean these columns (default: all)
+
+    Returns:
+        Preprocessed DataFrame ready for MLPredictor
+    """
+    seconds = time.time()
+    df = clean_flow_frame(read_flow_csv(os.path.join("flow_data", File_name), usecols=columns),
+                          label_encode=label_encode)
+    print("Total operation time: = ", time.time() - seconds, "seconds")
+    return df
+
+
+class _FlowLines(io.RawIOBase):
+    """Binary stream over a flow file holding only the lines read_flow_csv() keeps"""
+
+    def __init__(self, file, block_size=READ_BLOCK):
+        self.file = file
+        self.block_size = block_size
+        self.partial = b""  # incomplete last line of the block read last
+        self.lines = b""
+        self.offset = 0
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def _read_lines(self):
+        data = self.file.read(self.block_size)
+        if not data:
+            self.eof = True
+            lines, self.partial = self.partial, b""
+        else:
+            lines = self.partial + data
+            end = lines.rfind(b"\n") + 1
+            lines, self.partial = lines[:end], lines[end:]
+
+        if lines[:1] and not lines[:1].isdigit() or NON_FLOW_LINE.search(lines):
+            kept = [line for line in lines.split(b"\n") if line[:1].isdigit()]
+            lines = b"\n".join(kept) + b"\n" if kept else b""
+        if " – ".encode() in lines:
+            lines = lines.replace(" – ".encode(), b" - ")
+        return lines
+
+    def readinto(self, buffer):
+        while self.offset == len(self.lines) and not self.eof:
+            self.lines, self.offset = self._read_lines(), 0
+        size = min(len(buffer), len(self.lines) - self.offset)
+        buffer[:size] = self.lines[self.offset:self.offset + size]
+        self.offset += size
+        return size
+
+
+def iter_flow_csv(path, chunk_rows=CHUNK_ROWS, usecols=None):
+    """
+    Parse a flow file like read_flow_csv(), chunk_rows rows at a time
+
+    Args:
+        path: Path to a flow CSV file
+        chunk_rows: Rows per DataFrame
+        usecols: Only parse these columns
+
+    Yields:
+        DataFrames with MAIN_LABELS columns (or usecols), indexed by row number in the file
+    """
+    with open(path, "rb") as file:
+        try:
+            reader = pd.read_csv(io.BufferedReader(_FlowLines(file)), header=None, names=MAIN_LABELS,
+                                 dtype=FLOW_DTYPES, na_values=INFINITY_VALUES,
+                                 usecols=usecols and projected_labels(usecols), chunksize=chunk_rows)
+        except pd.errors.EmptyDataError:
+            return
+        with reader:
+            yield from reader
+
+
+def count_lines(path):
+    """Number of lines in a file, without parsing it (an upper bound on its flows)"""
+    with open(path, "rb") as file:
+        return sum(block.count(b"\n") for block in iter(lambda: file.read(READ_BLOCK), b""))
+
+
+def flow_encoding(frames, labels=ENCODED_FEATURES):
+    """
+    Label encoding of a whole window, built chunk by chunk
+
+    Args:
+        frames: Iterable of raw flow DataFrames making up the window (only
+            the labels columns are needed)
+        labels: Columns to encode; with none the frames are only counted
+
+    Returns:
+        Tuple of ({column: sorted values, or None if the column has missing values}, rows)
+    """
+    values = {}
+    rows = 0
+    for frame in frames:
+        rows += len(frame)
+        for label in labels:
+            if label not in frame.columns or values.get(label, set()) is None:
+                continue
+            column = frame[label]
+            if column.isna().any():
+                values[label] = None  # processing() replaces the missing values instead of encoding
+            else:
+                values.setdefault(label, set()).update(column.unique())
+    encoding = {label: None if found is None else np.array(sorted(found), dtype=object)
+                for label, found in values.items()}
+    return encoding, rows
+
+
+class ChunkedFlows:
+    """
+    A window cleaned and scored a chunk at a time
+
+    Only the label-encoding dictionary of the window is kept in memory;
+    iterating yields cleaned DataFrames of at most chunk_rows rows, which
+    concatenated are equal to clean_flow_frame() of the whole window.
+    """
+
+    def __init__(self, chunk_rows=CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        # (kind, flow file or DataFrame, encoding, label_encode, columns); kind is "file", "frame" or "cleaned"
+        self.segments = []
+        self.rows = 0
+        self.owned_files = []  # removed by close()
+
+    @classmethod
+    def from_source(cls, source, chunk_rows=CHUNK_ROWS, remove=False, label_encode=True, columns=None):
+        """
+        Read the string columns of a window and return it as chunks
+
+        Args:
+            source: Flow file path, or raw flows from read_flow_csv()
+            remove: Delete the flow file in close()
+            label_encode: See clean_flow_frame(); without it only the rows are counted
+            columns: Only parse and clean these columns (default: all)
+        """
+        flows = cls(chunk_rows)
+        labels = [label for label in ENCODED_FEATURES
+                  if label_encode and (columns is None or label in columns)]
+        if isinstance(source, str):
+            encoding, rows = flow_encoding(iter_flow_csv(source, chunk_rows, usecols=labels or MAIN_LABELS[:1]),
+                                           labels)
+            flows.segments.append(("file", source, encoding, label_encode, columns))
+            if remove:
+                flows.owned_files.append(source)
+        else:
+            if columns is not None:
+                source = source[[label for label in source.columns if label in columns]]
+            encoding, rows = flow_encoding([source[[c for c in labels if c in source.columns]]], labels)
+            flows.segments.append(("frame", source, encoding, label_encode, None))
+        flows.rows = rows
+        return flows
+
+    @classmethod
+    def merge(cls, parts):
+        """One window from several lanes' ChunkedFlows and cleaned DataFrames, in order"""
+        merged = cls(max(part.chunk_rows for part in parts if isinstance(part, cls)))
+        for part in parts:
+            if isinstance(part, cls):
+                merged.segments += part.segments
+                merged.owned_files += part.owned_files
+            else:
+                merged.segments.append(("cleaned", part, None, False, None))
+            merged.rows += len(part)
+        return merged
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        offset = 0
+        for kind, source, encoding, label_encode, columns in self.segments:
+            if kind == "file":
+                frames = iter_flow_csv(source, self.chunk_rows, usecols=columns)
+            else:
+                frames = (source.iloc[start:start + self.chunk_rows]
+                          for start in range(0, len(source), self.chunk_rows))
+            for frame in frames:
+                if kind != "cleaned":
+                    frame = clean_flow_frame(frame, encoding, label_encode)
+                # Row labels continue across chunks and segments, as in one concatenated frame
+                frame.index = pd.RangeIndex(offset, offset + len(frame))
+                offset += len(frame)
+                yield frame
+
+    def close(self):
+        """Delete the flow files handed over with remove=True"""
+        for path in self.owned_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.owned_files = []
+
+
+def chunked_processing(File_name, chunk_rows=CHUNK_ROWS):
+    """
+    Chunked replacement for columnar_processing() for oversized flow files
+
+    Args:
+        File_name: Name of the flow CSV inside flow_data/
+
+    Returns:
+        ChunkedFlows yielding preprocessed DataFrames of at most chunk_rows rows
+    """
+    return ChunkedFlows.from_source(os.path.join("flow_data", File_name), chunk_rows)
+
+
+def test_chunked_parity(File_name, chunk_rows=1000):
+    """Check that chunked_processing() yields columnar_processing() in pieces"""
+    print(f"Comparing columnar_processing() and chunked_processing() on {File_name}...")
+
+    whole = columnar_processing(File_name)
+    chunks = list(chunked_processing(File_name, chunk_rows))
+
+    try:
+        pd.testing.assert_frame_equal(whole, pd.concat(chunks), check_dtype=False)
+        print(f"✓ Identical output ({len(whole)} flows in {len(chunks)} chunks)")
+        return True
+    except AssertionError as e:
+        print(f"✗ Output differs: {e}")
+        return False
+
+
+def test_processing_parity(File_name):
+    """Check that columnar_processing() matches processing() on a flow file"""
+    print(f"Comparing processing() and columnar_processing() on {File_name}...")
+
+    legacy = processing(File_name)
+    columnar = columnar_processing(File_name)
+
+    try:
+        pd.testing.assert_frame_equal(legacy, columnar, check_dtype=False)
+        print(f"✓ Identical output ({len(columnar)} flows, {len(columnar.columns)} columns)")
+        return True
+    except AssertionError as e:
+        print(f"✗ Output differs: {e}")
+        return False
+    finally:
+        try:
+            os.remove("0.csv")
+        except OSError:
+            pass
+
 
+if __name__ == "__main__":
+    # Usage: python proccessing_captured_data.py <flow file in flow_data/> [chunk rows]
+    if len(sys.argv) > 2:
+        test_chunked_parity(sys.argv[1], int(sys.argv[2]))
+    elif len(sys.argv) > 1:
+        test_processing_parity(sys.argv[1])
@@ -0,0 +1,334 @@
+"""
+Report Store Module - Append-only Parquet store for anomaly reports
+Anomalous flows are written as zstd-compressed Parquet files partitioned by
+hour and attack type (Reports/store/hour=YYYYMMDDHH/attack_type=.../part-*.parquet)
+instead of one wide CSV per model per window. Once an hour is over, its parts
+are compacted into one file sorted by source IP, and once a day is over its
+hours are merged into day=YYYYMMDD/attack_type=.../. A small SQLite index maps
+every source IP and report time to the files and row groups holding its flows,
+so the flows of one IP over a week are read without scanning anything else.
+
+pyarrow is optional; without it MLPredictor keeps writing CSV reports.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from proccessing_captured_data import FLOW_DTYPES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+STORE_DIR = "store"  # inside the reports directory
+INDEX_FILE = "index.sqlite"
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 1024  # rows per row group of compacted files; the index points at row groups
+
+# Reports written before the store: anomaly_[saved_traffic_]<attack>_<%Y_%m_%d-%I:%M:%S_%p>.csv
+CSV_REPORT = re.compile(r"^anomaly_(?:saved_traffic_)?(?P<attack>.+)_(?P<time>\d{4}_\d{2}_\d{2}-\d{2}:\d{2}:\d{2}_[AP]M)\.csv$")
+
+
+def available():
+    return pa is not None
+
+
+def _safe(value):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+
+
+class ReportStore:
+    """Writes and queries the Parquet anomaly reports"""
+
+    def __init__(self, reports_dir="Reports"):
+        """
+        Args:
+            reports_dir: Reports directory; the store lives in its store/ subdirectory
+        """
+        if not available():
+            raise ImportError("pyarrow is required for the report store")
+        self.root = os.path.join(reports_dir, STORE_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.lock = threading.Lock()  # index writes
+        self.compacting = threading.Lock()  # one compaction at a time
+        self.hour = None  # hour of the last append; older hours get compacted
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS flows (
+                    source_ip TEXT NOT NULL,
+                    report_time TEXT NOT NULL,
+                    attack_type TEXT NOT NULL,
+                    file TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    row_groups TEXT  -- comma-separated, NULL for the whole file
+                );
+                CREATE INDEX IF NOT EXISTS ix_flows_source_ip_time ON flows (source_ip, report_time);
+                CREATE INDEX IF NOT EXISTS ix_flows_time ON flows (report_time);
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.root, INDEX_FILE), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def append(self, attack_type, flows, report_time=None, model_version=None):
+        """
+        Write one window's anomalous flows for a model
+
+        Args:
+            attack_type: Model that flagged the flows
+            flows: DataFrame of anomalous flows
+            report_time: Time of the window (defaults to now)
+            model_version: Model version that scored the window
+
+        Returns:
+            Path of the Parquet file written
+        """
+        report_time = (report_time or datetime.now()).replace(microsecond=0)
+        self._compact_closed_hours(report_time)
+        table = flows.assign(Predicted_result=0)
+        # Fixed types for the flow features, so a column that happens to hold only
+        # whole numbers in one window (int64) still concatenates with float64 parts
+        numeric = [c for c in table.columns if FLOW_DTYPES.get(c) is np.float64]
+        table[numeric] = table[numeric].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+        # String features are stored as strings even when a window holds codes or
+        # fillna(0) ints; other mixed object columns can't be typed by Arrow either
+        for column in table.columns:
+            if FLOW_DTYPES.get(column) is object or table[column].dtype == object:
+                table[column] = table[column].astype(str)
+        if "Source IP" in table.columns:
+            # Keeps each IP in few row groups for the filtered reads in query()
+            table = table.sort_values("Source IP", kind="stable")
+        table = table.assign(report_time=pd.Timestamp(report_time), attack_type=attack_type,
+                             model_version=pd.Series(model_version, index=table.index, dtype="string"))
+
+        directory = os.path.join(self.root, f"hour={report_time:%Y%m%d%H}", f"attack_type={_safe(attack_type)}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{report_time:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(pa.Table.from_pandas(table, preserve_index=False), path + ".tmp",
+                       compression=COMPRESSION)
+        os.replace(path + ".tmp", path)
+
+        if "Source IP" in table.columns:
+            per_ip = table["Source IP"].value_counts()
+            rows = [(str(ip), report_time.isoformat(), attack_type, os.path.relpath(path, self.root), int(n), None)
+                    for ip, n in per_ip.items()]
+        else:
+            rows = [("", report_time.isoformat(), attack_type, os.path.relpath(path, self.root), len(table), None)]
+        with self.lock, self._connect() as conn:
+            conn.executemany("INSERT INTO flows VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return path
+
+    def _compact_closed_hours(self, report_time):
+        """Start compacting in the background when the first report of a new hour arrives"""
+        hour = report_time.replace(minute=0, second=0)
+        if self.hour is not None and hour > self.hour:
+            threading.Thread(target=self.compact, args=(hour,), name="ReportCompaction",
+                             daemon=True).start()
+        self.hour = hour if self.hour is None else max(hour, self.hour)
+
+    def compact(self, before=None):
+        """
+        Merge the parts of every hour before `before` into one file per attack
+        type, then the hours of every day before it into one file per attack type
+
+        Rows are sorted by source IP, so each IP occupies a few row groups,
+        which are recorded in the index. Readers of a replaced file retry.
+
+        Args:
+            before: Leave hours from this time on alone (default: the current hour)
+
+        Returns:
+            Number of files written
+        """
+        before = before or datetime.now().replace(minute=0, second=0, microsecond=0)
+        with self.compacting:
+            return self._compact(before, by_day=False) + \
+                self._compact(before.replace(hour=0, minute=0, second=0, microsecond=0), by_day=True)
+
+    def _compact(self, before, by_day):
+        with self.lock, self._connect() as conn:
+            files = conn.execute("SELECT DISTINCT file FROM flows WHERE report_time < ? AND file LIKE ?",
+                                 (before.isoformat(), "hour=%" if by_day else "hour=%/part-%")).fetchall()
+        partitions = {}
+        for (path,) in files:
+            hour, attack_dir = os.path.dirname(path).split(os.sep)
+            directory = os.path.join(f"day={hour[len('hour='):][:8]}", attack_dir) if by_day \
+                else os.path.dirname(path)
+            partitions.setdefault(directory, []).append(path)
+
+        written = 0
+        for directory, paths in sorted(partitions.items()):
+            try:
+                # Permissive: parts written before the fixed types may disagree (int64/float64)
+                table = pa.concat_tables([pq.read_table(os.path.join(self.root, p)) for p in paths],
+                                         promote_options="permissive")
+                table = table.sort_by([("Source IP", "ascending"), ("report_time", "ascending")]) \
+                    if "Source IP" in table.column_names else table
+                name = os.path.join(directory, f"compact-{uuid.uuid4().hex[:8]}.parquet")
+                path = os.path.join(self.root, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Statistics of every column in every row group make the footer slow to parse
+                pq.write_table(table, path + ".tmp", compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE,
+                               write_statistics=["Source IP", "report_time"])
+                os.replace(path + ".tmp", path)
+
+                # Row groups holding each IP (rows are sorted, so they are contiguous)
+                updates = [(name, None, None)]
+                if "Source IP" in table.column_names:
+                    ips = table.column("Source IP").to_pandas()
+                    positions = pd.Series(range(len(ips)), index=ips.values)
+                    bounds = positions.groupby(level=0).agg(["min", "max"])
+                    updates = [(name, ",".join(str(g) for g in range(lo // ROW_GROUP_SIZE, hi // ROW_GROUP_SIZE + 1)),
+                                str(ip)) for ip, (lo, hi) in bounds.iterrows()]
+
+                marks = ",".join("?" * len(paths))
+                with self.lock, self._connect() as conn:
+                    for file, groups, ip in updates:
+                        if ip is not None:
+                            conn.execute(f"UPDATE flows SET file = ?, row_groups = ? "
+                                         f"WHERE source_ip = ? AND file IN ({marks})", [file, groups, ip, *paths])
+                    # Rows of parts without Source IP (indexed as "") have no IP row groups
+                    conn.execute(f"UPDATE flows SET file = ?, row_groups = NULL WHERE file IN ({marks})",
+                                 [name, *paths])
+                for p in paths:
+                    os.remove(os.path.join(self.root, p))
+                    try:
+                        os.removedirs(os.path.dirname(os.path.join(self.root, p)))
+                    except OSError:
+                        pass  # other files left in the partition
+                written += 1
+            except Exception as e:
+                print(f"✗ Could not compact {directory}: {e}")
+        return written
+
+    def _locate(self, source_ip=None, since=None, until=None, attack_type=None):
+        """{file: set of row groups, or None for the whole file} matching the filters"""
+        clauses, params = [], []
+        for clause, value in (("source_ip = ?", source_ip), ("report_time >= ?", since),
+                              ("report_time < ?", until), ("attack_type = ?", attack_type)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value.isoformat() if isinstance(value, datetime) else value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT DISTINCT file, row_groups FROM flows {where}", params).fetchall()
+
+        located = {}
+        for file, groups in rows:
+            if groups is None or source_ip is None:
+                located[file] = None
+            elif located.get(file, set()) is not None:
+                located.setdefault(file, set()).update(int(g) for g in groups.split(","))
+        return located
+
+    def query(self, source_ip=None, since=None, until=None, attack_type=None):
+        """
+        Anomalous flows matching the filters
+
+        Args:
+            source_ip: Only flows from this IP
+            since, until: Report time range (datetime)
+            attack_type: Only flows flagged by this model
+
+        Returns:
+            DataFrame ordered by report time
+        """
+        for attempt in range(3):
+            try:
+                frames = []
+                for file, groups in sorted(self._locate(source_ip, since, until, attack_type).items()):
+                    parquet = pq.ParquetFile(os.path.join(self.root, file))
+                    table = parquet.read() if groups is None else parquet.read_row_groups(sorted(groups))
+                    frames.append(table.to_pandas())
+                break
+            except FileNotFoundError:
+                # A part was compacted between reading the index and the file
+                if attempt == 2:
+                    raise
+
+        if not frames:
+            return pd.DataFrame()
+        flows = pd.concat(frames, ignore_index=True)
+
+        # Files and row groups hold other IPs, times and models too
+        mask = pd.Series(True, index=flows.index)
+        if source_ip is not None:
+            mask &= flows["Source IP"] == source_ip
+        if since is not None:
+            mask &= flows["report_time"] >= pd.Timestamp(since)
+        if until is not None:
+            mask &= flows["report_time"] < pd.Timestamp(until)
+        if attack_type is not None:
+            mask &= flows["attack_type"] == attack_type
+        return flows[mask].sort_values("report_time", kind="stable").reset_index(drop=True)
+
+    def summary(self, since=None):
+        """Anomalous flows per source IP and attack type, from the index only"""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT source_ip, attack_type, SUM(rows) AS flows, MIN(report_time) AS first_seen, "
+                "MAX(report_time) AS last_seen FROM flows WHERE report_time >= ? "
+                "GROUP BY source_ip, attack_type ORDER BY flows DESC",
+                conn, params=((since or datetime.min).isoformat(),))
+
+    def import_csv_reports(self, reports_dir="Reports", remove=False):
+        """
+        Move the CSV reports written before the store into it
+
+        Args:
+            remove: Delete each CSV once it is stored
+
+        Returns:
+            Number of reports imported
+        """
+        imported = 0
+        for filename in sorted(os.listdir(reports_dir)):
+            match = CSV_REPORT.match(filename)
+            if not match:
+                continue
+            path = os.path.join(reports_dir, filename)
+            try:
+                flows = pd.read_csv(path, low_memory=False).drop(columns=["Predicted_result"], errors="ignore")
+                model_version = None
+                if "Model_version" in flows.columns:
+                    model_version = flows.pop("Model_version").iloc[0] if len(flows) else None
+                self.append(match["attack"], flows,
+                            report_time=datetime.strptime(match["time"], "%Y_%m_%d-%I:%M:%S_%p"),
+                            model_version=model_version)
+                imported += 1
+                if remove:
+                    os.remove(path)
+            except Exception as e:
+                print(f"✗ Could not import {filename}: {e}")
+        return imported
+
+
+if __name__ == "__main__":
+    # python report_store.py <source ip> [days]     flows of one IP
+    # python report_store.py --summary [days]       anomalous flows per IP
+    # python report_store.py --import [--remove]    move the old CSV reports into the store
+    # python report_store.py --compact              merge the parts of past hours
+    store = ReportStore()
+    args = sys.argv[1:]
+    if args and args[0] == "--import":
+        print(f"✓ Imported {store.import_csv_reports(remove='--remove' in args)} CSV reports")
+        print(f"✓ Compacted {store.compact()} partitions")
+    elif args and args[0] == "--compact":
+        print(f"✓ Compacted {store.compact()} partitions")
+    elif args and args[0] != "--summary":
+        days = float(args[1]) if len(args) > 1 else 7
+        flows = store.query(source_ip=args[0], since=datetime.now() - timedelta(days=days))
+        print(flows.to_string(max_rows=50))
+        print(f"{len(flows)} anomalous flows from {args[0]} in the last {days:g} days")
+    else:
+        days = float(args[1]) if len(args) > 1 else 7
+        print(store.summary(since=datetime.now() - timedelta(days=days)).to_string())
@@ -2,15 +2,31 @@
 Model Training Script
 This script trains all ML models once and saves them for later use.
 Run this script when you want to retrain models with new attack datasets.
+
+The per-attack jobs run in a process pool. Parsed datasets are cached as NumPy
+arrays keyed by the hash of their CSV, and a model is only retrained when its
+dataset, features or hyperparameters changed (use --force to retrain all).
+String features are encoded with the persistent codes of category_encoder.py,
+which the predictor uses too.
 """
 
+import hashlib
+import json
 import os
 import pickle
+import sys
+import time
 import pandas as pd
 import numpy as np
+import sklearn
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import train_test_split
+from category_encoder import CategoryEncoder, refuse_identifiers
+from compiled_models import export_compiled_models
+from model_store import current_version, publish_models
+from proccessing_captured_data import STRING_FEATURES
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -20,264 +36,378 @@ if not os.path.exists(MODEL_DIR):
     os.makedirs(MODEL_DIR)
     print(f"Created {MODEL_DIR} directory")
 
-def train_bot_model():
-    """Train and save Bot detection model"""
-    print("Training Bot detection model...")
-    feature_list = ["Destination Port", "Bwd Packet Length Mean", "Flow IAT Min", 
-                    "Flow IAT Std", "Flow IAT Max", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/Bot.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    # Convert labels to binary
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]  # Exclude Label
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=2)
-    
-    clf = AdaBoostClassifier()
+DATASET_CACHE_DIR = "attacks_datasets/cache"
+# Text columns a model may use as features; they are encoded, never parsed as numbers
+CATEGORICAL_FEATURES = [label for label in STRING_FEATURES if label != "Label"]
+MANIFEST_FILE = os.path.join(MODEL_DIR, "training_manifest.json")
+
+ESTIMATORS = {
+    "AdaBoostClassifier": AdaBoostClassifier,
+    "DecisionTreeClassifier": DecisionTreeClassifier,
+    "RandomForestClassifier": RandomForestClassifier,
+}
+
+# One job per model: dataset, features, estimator and split seed
+MODEL_SPECS = {
+    "bot": {
+        "title": "Bot",
+        "dataset": "attacks_datasets/Bot.csv",
+        "features": ["Destination Port", "Bwd Packet Length Mean", "Flow IAT Min",
+                     "Flow IAT Std", "Flow IAT Max"],
+        "estimator": "AdaBoostClassifier", "params": {},
+        "random_state": 2,
+    },
+    "ssh": {
+        "title": "SSH-Patator",
+        "dataset": "attacks_datasets/SSH-Patator.csv",
+        "features": ["Destination Port", "Flow Duration", "Total Fwd Packets",
+                     "Total Backward Packets", "Total Length of Bwd Packets"],
+        "estimator": "AdaBoostClassifier", "params": {},
+        "random_state": 2,
+    },
+    "ftp": {
+        "title": "FTP-Patator",
+        "dataset": "attacks_datasets/FTP-Patator.csv",
+        "features": ["Destination Port", "Total Fwd Packets", "Bwd Packet Length Std",
+                     "Bwd Packet Length Max", "Total Length of Bwd Packets"],
+        "estimator": "AdaBoostClassifier", "params": {},
+        "random_state": 2,
+    },
+    "dos_goldeneye": {
+        "title": "DoS GoldenEye",
+        "dataset": "attacks_datasets/DOS_DDOS/DoS GoldenEye.csv",
+        "features": ["Flow IAT Max", "Bwd Packet Length Std", "Flow IAT Min",
+                     "Total Backward Packets", "Flow IAT Mean"],
+        "estimator": "DecisionTreeClassifier", "params": {"max_depth": 5, "criterion": "entropy"},
+        "random_state": 10,
+    },
+    "dos_hulk": {
+        "title": "DoS Hulk",
+        "dataset": "attacks_datasets/DOS_DDOS/DoS Hulk.csv",
+        "features": ["Bwd Packet Length Std", "Fwd Packet Length Std", "Fwd Packet Length Max",
+                     "Flow IAT Min", "Flow IAT Mean"],
+        "estimator": "DecisionTreeClassifier", "params": {"max_depth": 5, "criterion": "entropy"},
+        "random_state": 10,
+    },
+    "dos_slowloris": {
+        "title": "DoS Slowloris",
+        "dataset": "attacks_datasets/DOS_DDOS/DoS slowloris.csv",
+        "features": ["Flow IAT Mean", "Total Length of Bwd Packets", "Bwd Packet Length Mean",
+                     "Total Fwd Packets"],
+        "estimator": "DecisionTreeClassifier", "params": {"max_depth": 5, "criterion": "entropy"},
+        "random_state": 10,
+    },
+    "dos_slowhttptest": {
+        "title": "DoS Slowhttptest",
+        "dataset": "attacks_datasets/DOS_DDOS/DoS Slowhttptest.csv",
+        "features": ["Flow IAT Mean", "Fwd Packet Length Min", "Bwd Packet Length Mean",
+                     "Total Length of Bwd Packets"],
+        "estimator": "DecisionTreeClassifier", "params": {"max_depth": 5, "criterion": "entropy"},
+        "random_state": 10,
+    },
+    "portscan": {
+        "title": "Port Scan",
+        "dataset": "attacks_datasets/PortScan.csv",
+        "features": ["Total Length of Fwd Packets", "Flow Bytes/s", "Destination Port",
+                     "Flow Duration", "Bwd Packet Length Std"],
+        "estimator": "DecisionTreeClassifier", "params": {"max_depth": 5, "criterion": "entropy"},
+        "random_state": 2,
+    },
+    "web": {
+        "title": "Web Attack",
+        "dataset": "attacks_datasets/Web Attack.csv",
+        "features": ["Total Length of Fwd Packets", "Fwd Packet Length Mean",
+                     "Bwd Packet Length Mean", "Flow IAT Mean", "Flow IAT Max"],
+        "estimator": "RandomForestClassifier",
+        "params": {"max_depth": 5, "n_estimators": 10, "max_features": 1},
+        "random_state": 2,
+        "optional": True,
+    },
+}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_dataset(path, features, source_hash=None):
+    """
+    Features and binary labels of a dataset, parsed from CSV at most once
+
+    The parsed columns are saved as .npy arrays under DATASET_CACHE_DIR, named
+    after the CSV's hash and the requested features, and memory-mapped on
+    later runs instead of parsing the CSV again.
+
+    Returns:
+        Tuple of (X DataFrame, y Series) with y = 1 for BENIGN, 0 for attacks
+    """
+    source_hash = source_hash or file_hash(path)
+    columns_hash = hashlib.sha256("\0".join(features).encode()).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    prefix = os.path.join(DATASET_CACHE_DIR, f"{stem}-{source_hash[:16]}-{columns_hash}")
+
+    if os.path.exists(prefix + ".y.npy"):
+        X = np.load(prefix + ".X.npy", mmap_mode="r")
+        y = np.load(prefix + ".y.npy", mmap_mode="r")
+    else:
+        df = pd.read_csv(path, usecols=features + ["Label"])
+        categorical = [feature for feature in features if feature in CATEGORICAL_FEATURES]
+        if categorical:
+            # Codes are append-only, so the cached arrays stay valid
+            encoder = CategoryEncoder.load(MODEL_DIR)
+            df = df.assign(**{feature: encoder.encode(feature, df[feature]) for feature in categorical})
+            encoder.save()
+        X = df[features].fillna(0).to_numpy(dtype=np.float64)
+        y = (df["Label"].to_numpy() == "BENIGN").astype(np.int64)
+
+        os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+        # Write y last: its presence marks a complete cache entry
+        for suffix, array in ((".X.npy", X), (".y.npy", y)):
+            np.save(prefix + suffix + ".tmp.npy", array)
+            os.replace(prefix + suffix + ".tmp.npy", prefix + suffix)
+
+    return pd.DataFrame(X, columns=features), pd.Series(y, name="Label")
+
+
+def spec_fingerprint(spec, source_hash):
+    """Hash of everything a trained model depends on"""
+    key = {
+        "dataset": source_hash,
+        "features": spec["features"],
+        "estimator": spec["estimator"],
+        "params": spec["params"],
+        "random_state": spec["random_state"],
+        "sklearn": sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def train_model(name, spec, source_hash=None):
+    """
+    Train one model and save it to MODEL_DIR/<name>_model.pkl
+
+    Returns:
+        Test accuracy
+    """
+    X, y = load_dataset(spec["dataset"], spec["features"], source_hash)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.20, random_state=spec["random_state"])
+
+    clf = ESTIMATORS[spec["estimator"]](**spec["params"])
     clf.fit(X_train, y_train)
-    
+
     # Save model and feature list
-    with open(f"{MODEL_DIR}/bot_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ Bot model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    model_path = os.path.join(MODEL_DIR, f"{name}_model.pkl")
+    with open(model_path + ".tmp", "wb") as f:
+        pickle.dump({"model": clf, "features": spec["features"]}, f)
+    os.replace(model_path + ".tmp", model_path)
+
+    return clf.score(X_test, y_test)
+
+
+def extend_category_codes(specs):
+    """
+    Give the values of every string feature in the training data a code
+
+    Runs before the worker processes start, so they only look codes up and
+    never hand out conflicting ones.
+    """
+    encoder = CategoryEncoder.load(MODEL_DIR)
+    for spec in specs:
+        categorical = [feature for feature in spec["features"] if feature in CATEGORICAL_FEATURES]
+        if categorical:
+            df = pd.read_csv(spec["dataset"], usecols=categorical, dtype=str)
+            for feature in categorical:
+                encoder.encode(feature, df[feature])
+    encoder.save()
+
+
+def _training_job(name, spec, source_hash):
+    """Process pool entry point: (name, accuracy, seconds)"""
+    start = time.perf_counter()
+    accuracy = train_model(name, spec, source_hash)
+    return name, accuracy, time.perf_counter() - start
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_FILE + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(MANIFEST_FILE + ".tmp", MANIFEST_FILE)
+
+
+def train_all(force=False, workers=None):
+    """
+    Train every model whose dataset or specification changed, in parallel
+
+    Args:
+        force: Retrain models even if they are up to date
+        workers: Worker processes (default: one per CPU, at most one per job)
+
+    Returns:
+        Dictionary of model name -> "trained", "unchanged", "missing" or "failed"
+    """
+    manifest = load_manifest()
+    status = {}
+    jobs = {}
+
+    for name, spec in MODEL_SPECS.items():
+        if not os.path.exists(spec["dataset"]):
+            level = "⚠" if spec.get("optional") else "✗"
+            print(f"{level} {spec['title']} dataset not found, skipping...")
+            status[name] = "missing"
+            continue
+        try:
+            refuse_identifiers(spec["features"])
+        except ValueError as e:
+            print(f"✗ {spec['title']}: {e}, skipping...")
+            status[name] = "failed"
+            continue
+
+        source_hash = file_hash(spec["dataset"])
+        fingerprint = spec_fingerprint(spec, source_hash)
+        model_path = os.path.join(MODEL_DIR, f"{name}_model.pkl")
+        if (not force and os.path.exists(model_path)
+                and manifest.get(name, {}).get("fingerprint") == fingerprint):
+            print(f"= {spec['title']} model is up to date")
+            status[name] = "unchanged"
+            continue
+
+        jobs[name] = (spec, source_hash, fingerprint)
+
+    if not jobs:
+        return status
+
+    extend_category_codes(spec for spec, _, _ in jobs.values())
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    print(f"Training {len(jobs)} models with {workers} worker processes...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_training_job, name, spec, source_hash): name
+                   for name, (spec, source_hash, _) in jobs.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            spec, source_hash, fingerprint = jobs[name]
+            try:
+                _, accuracy, seconds = future.result()
+            except Exception as e:
+                print(f"✗ Error training {spec['title']} model: {e}")
+                status[name] = "failed"
+                continue
+
+            manifest[name] = {
+                "fingerprint": fingerprint,
+                "dataset": spec["dataset"],
+                "dataset_sha256": source_hash,
+                "accuracy": accuracy,
+                "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            status[name] = "trained"
+            print(f"✓ {spec['title']} model trained and saved "
+                  f"(Accuracy: {accuracy:.2%}, {seconds:.1f}s)")
+
+    save_manifest(manifest)
+    return status
+
+
+def train_bot_model():
+    """Train and save Bot detection model"""
+    return train_model("bot", MODEL_SPECS["bot"])
+
 
 def train_ssh_model():
     """Train and save SSH-Patator detection model"""
-    print("Training SSH-Patator detection model...")
-    feature_list = ["Destination Port", "Flow Duration", "Total Fwd Packets", 
-                    "Total Backward Packets", "Total Length of Bwd Packets", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/SSH-Patator.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=2)
-    
-    clf = AdaBoostClassifier()
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/ssh_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ SSH model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("ssh", MODEL_SPECS["ssh"])
+
 
 def train_ftp_model():
     """Train and save FTP-Patator detection model"""
-    print("Training FTP-Patator detection model...")
-    feature_list = ["Destination Port", "Total Fwd Packets", "Bwd Packet Length Std", 
-                    "Bwd Packet Length Max", "Total Length of Bwd Packets", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/FTP-Patator.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=2)
-    
-    clf = AdaBoostClassifier()
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/ftp_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ FTP model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("ftp", MODEL_SPECS["ftp"])
+
 
 def train_dos_goldeneye_model():
     """Train and save DoS GoldenEye detection model"""
-    print("Training DoS GoldenEye detection model...")
-    feature_list = ["Flow IAT Max", "Bwd Packet Length Std", "Flow IAT Min", 
-                    "Total Backward Packets", "Flow IAT Mean", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/DOS_DDOS/DoS GoldenEye.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=10)
-    
-    clf = DecisionTreeClassifier(max_depth=5, criterion="entropy")
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/dos_goldeneye_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ DoS GoldenEye model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("dos_goldeneye", MODEL_SPECS["dos_goldeneye"])
+
 
 def train_dos_hulk_model():
     """Train and save DoS Hulk detection model"""
-    print("Training DoS Hulk detection model...")
-    feature_list = ["Bwd Packet Length Std", "Fwd Packet Length Std", "Fwd Packet Length Max", 
-                    "Flow IAT Min", "Flow IAT Mean", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/DOS_DDOS/DoS Hulk.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=10)
-    
-    clf = DecisionTreeClassifier(max_depth=5, criterion="entropy")
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/dos_hulk_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ DoS Hulk model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("dos_hulk", MODEL_SPECS["dos_hulk"])
+
 
 def train_dos_slowloris_model():
     """Train and save DoS Slowloris detection model"""
-    print("Training DoS Slowloris detection model...")
-    feature_list = ["Flow IAT Mean", "Total Length of Bwd Packets", "Bwd Packet Length Mean", 
-                    "Total Fwd Packets", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/DOS_DDOS/DoS slowloris.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=10)
-    
-    clf = DecisionTreeClassifier(max_depth=5, criterion="entropy")
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/dos_slowloris_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ DoS Slowloris model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("dos_slowloris", MODEL_SPECS["dos_slowloris"])
+
 
 def train_dos_slowhttptest_model():
     """Train and save DoS Slowhttptest detection model"""
-    print("Training DoS Slowhttptest detection model...")
-    feature_list = ["Flow IAT Mean", "Fwd Packet Length Min", "Bwd Packet Length Mean", 
-                    "Total Length of Bwd Packets", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/DOS_DDOS/DoS Slowhttptest.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=10)
-    
-    clf = DecisionTreeClassifier(max_depth=5, criterion="entropy")
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/dos_slowhttptest_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ DoS Slowhttptest model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("dos_slowhttptest", MODEL_SPECS["dos_slowhttptest"])
+
 
 def train_portscan_model():
     """Train and save Port Scan detection model"""
-    print("Training Port Scan detection model...")
-    feature_list = ["Total Length of Fwd Packets", "Flow Bytes/s", "Destination Port", 
-                    "Flow Duration", "Bwd Packet Length Std", "Label"]
-    
-    df = pd.read_csv("attacks_datasets/PortScan.csv", usecols=feature_list)
-    df = df.fillna(0)
-    
-    attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-    df["Label"] = attack_or_not
-    
-    y = df["Label"]
-    X = df[feature_list[:-1]]
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=2)
-    
-    clf = DecisionTreeClassifier(max_depth=5, criterion="entropy")
-    clf.fit(X_train, y_train)
-    
-    with open(f"{MODEL_DIR}/portscan_model.pkl", "wb") as f:
-        pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-    
-    print(f"✓ Port Scan model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
+    return train_model("portscan", MODEL_SPECS["portscan"])
+
 
 def train_web_model():
     """Train and save Web Attack detection model"""
-    print("Training Web Attack detection model...")
-    feature_list = ["Total Length of Fwd Packets", "Fwd Packet Length Mean", 
-                    "Bwd Packet Length Mean", "Flow IAT Mean", "Flow IAT Max", "Label"]
-    
-    try:
-        df = pd.read_csv("attacks_datasets/Web Attack.csv", usecols=feature_list)
-        df = df.fillna(0)
-        
-        attack_or_not = [1 if i == "BENIGN" else 0 for i in df["Label"]]
-        df["Label"] = attack_or_not
-        
-        y = df["Label"]
-        X = df[feature_list[:-1]]
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=2)
-        
-        clf = RandomForestClassifier(max_depth=5, n_estimators=10, max_features=1)
-        clf.fit(X_train, y_train)
-        
-        with open(f"{MODEL_DIR}/web_model.pkl", "wb") as f:
-            pickle.dump({"model": clf, "features": feature_list[:-1]}, f)
-        
-        print(f"✓ Web Attack model trained and saved (Accuracy: {clf.score(X_test, y_test):.2%})")
-    except FileNotFoundError:
-        print("⚠ Web Attack dataset not found, skipping...")
+    return train_model("web", MODEL_SPECS["web"])
+
 
 def main():
-    """Train all models"""
+    """Train all models: python train_models.py [--force] [--workers N]"""
+    force = "--force" in sys.argv
+    workers = None
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+
     print("=" * 60)
     print("Starting Model Training Process")
     print("=" * 60)
     print()
-    
+
     try:
-        train_bot_model()
-        train_ssh_model()
-        train_ftp_model()
-        train_dos_goldeneye_model()
-        train_dos_hulk_model()
-        train_dos_slowloris_model()
-        train_dos_slowhttptest_model()
-        train_portscan_model()
-        train_web_model()
-        
+        start = time.perf_counter()
+        status = train_all(force=force, workers=workers)
+
+        if "trained" in status.values():
+            print()
+            print("Compiling models for the vectorized evaluator...")
+            export_compiled_models(MODEL_DIR)
+
+        if "trained" in status.values() or current_version(MODEL_DIR) is None:
+            print()
+            print("Publishing the model store...")
+            publish_models(MODEL_DIR)
+
+        counts = {s: list(status.values()).count(s) for s in ("trained", "unchanged", "missing", "failed")}
         print()
         print("=" * 60)
-        print("✓ All models trained and saved successfully!")
+        print(f"✓ Training finished in {time.perf_counter() - start:.1f}s: " +
+              ", ".join(f"{n} {s}" for s, n in counts.items() if n))
         print(f"Models saved in: {MODEL_DIR}/")
         print("=" * 60)
-        
+
     except Exception as e:
         print(f"\n✗ Error during training: {e}")
         import traceback
         traceback.print_exc()
 
+
 if __name__ == "__main__":
     main()
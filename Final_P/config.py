@@ -9,6 +9,21 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+
+def parse_capture_lanes(value):
+    """
+    Parse CAPTURE_LANES: lanes separated by ';', each "interface" or "interface=BPF filter"
+
+    e.g. "eth1;eth2" or "eth1=src net 10.0.0.0/9;eth1=not src net 10.0.0.0/9"
+    """
+    lanes = []
+    for lane in value.split(';'):
+        if lane.strip():
+            interface, _, capture_filter = lane.partition('=')
+            lanes.append((interface.strip(), capture_filter.strip() or None))
+    return lanes
+
+
 class Config:
     """Base configuration"""
     
@@ -26,9 +41,44 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool and background writer (database_logger.py)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))  # seconds
+    DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', '200'))  # rows per bulk insert
+    DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', '2'))  # seconds
+    DB_QUEUE_MAX = int(os.getenv('DB_QUEUE_MAX', '10000'))  # rows buffered before dropping
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True
+    }
+    
+    # Metrics rollups and retention (IDS/rollups.py)
+    METRICS_ROLLUP_INTERVAL = int(os.getenv('METRICS_ROLLUP_INTERVAL', '60'))  # seconds
+    METRICS_RAW_RETENTION_DAYS = int(os.getenv('METRICS_RAW_RETENTION_DAYS', '7'))
+    METRICS_MINUTE_RETENTION_DAYS = int(os.getenv('METRICS_MINUTE_RETENTION_DAYS', '30'))
+    METRICS_HOUR_RETENTION_DAYS = int(os.getenv('METRICS_HOUR_RETENTION_DAYS', '365'))
+    
+    # Live dashboard stream: pipeline -> web app broker (IDS/event_broker.py)
+    EVENT_BROKER_HOST = os.getenv('EVENT_BROKER_HOST', '127.0.0.1')
+    EVENT_BROKER_PORT = int(os.getenv('EVENT_BROKER_PORT', '5055'))
+    EVENT_BROKER_AUTHKEY = os.getenv('EVENT_BROKER_AUTHKEY', 'ids-event-broker')
+    QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', '30'))  # seconds (IDS/query_cache.py)
+    
     # Network Capture Configuration
     NETWORK_INTERFACE = os.getenv('NETWORK_INTERFACE', 'eth1')
     CAPTURE_DURATION = int(os.getenv('CAPTURE_DURATION', '60'))  # seconds
+    MICRO_BATCH = os.getenv('MICRO_BATCH', 'False') == 'True'  # dumpcap ring buffer instead of fixed windows
+    CHUNK_DURATION = int(os.getenv('CHUNK_DURATION', '5'))  # seconds per ring buffer file
+    RING_FILES = int(os.getenv('RING_FILES', '12'))
+    STITCH_GAP = int(os.getenv('STITCH_GAP', '2'))  # seconds
+    CAPTURE_LANES = parse_capture_lanes(os.getenv('CAPTURE_LANES', ''))  # empty: one lane on NETWORK_INTERFACE
+    LANE_MERGE_TIMEOUT = int(os.getenv('LANE_MERGE_TIMEOUT', '60'))  # seconds to wait for a lagging lane
+    CAPTURE_FILTER = os.getenv('CAPTURE_FILTER', '') or None  # BPF applied to every lane (e.g. skip backup traffic)
+    # Bytes kept per packet, 0 = whole packet. Keep 0 with CICFlowMeter: it has not been
+    # checked that its features survive truncated packets. Only set it for a
+    # FLOW_EXPORTER_COMMAND that reads packet lengths from the headers
+    CAPTURE_SNAPLEN = int(os.getenv('CAPTURE_SNAPLEN', '0'))
     
     # Alert Thresholds
     ALERT_THRESHOLD = int(os.getenv('ALERT_THRESHOLD', '40'))  # percentage
@@ -51,6 +101,8 @@ class Config:
     # Performance Configuration
     PROCESSING_TIMEOUT = int(os.getenv('PROCESSING_TIMEOUT', '300'))  # seconds
     STATS_REPORT_INTERVAL = int(os.getenv('STATS_REPORT_INTERVAL', '60'))  # seconds
+    MODEL_WORKERS = int(os.getenv('MODEL_WORKERS', str(os.cpu_count() or 1)))  # models run concurrently
+    MODEL_EXECUTOR = os.getenv('MODEL_EXECUTOR', 'thread')  # thread, process or mixed
     
     # Attack Models Configuration
     ATTACK_MODELS = [